@@ -24,7 +24,8 @@ from agents.roadmap_agent import get_roadmap_agent
 from agents.content_curator_agent import get_content_curator_agent
 from agents.assessment_agent import get_assessment_agent
 from agents.quiz_validation_agent import get_quiz_validation_agent
-from models.user import UserManager, User
+from models.user import User, get_user_manager
+from models.user_store import ConcurrentUpdateError
 
 # Sayfa yapılandırması
 st.set_page_config(
@@ -170,7 +171,7 @@ def render_login_page():
                 submit = st.form_submit_button("Giriş Yap", use_container_width=True)
                 
                 if submit and email and password:
-                    um = UserManager()
+                    um = get_user_manager()
                     success, user = um.login(email, password)
                     if success:
                         st.session_state.user = user
@@ -210,7 +211,7 @@ def render_login_page():
                     elif len(new_password) < 4:
                         st.error("❌ Şifre en az 4 karakter olmalı!")
                     elif new_username and new_email and new_password:
-                        um = UserManager()
+                        um = get_user_manager()
                         success, result = um.register(new_username, new_email, new_password)
                         if success:
                             st.success("✅ Kayıt başarılı! Giriş yapabilirsiniz.")
@@ -475,7 +476,7 @@ def render_create_curriculum():
         st.session_state.completed_days = []
         
         # Kullanıcıya kaydet (veritabanına) - yeni müfredat olarak
-        um = UserManager()
+        um = get_user_manager()
         user = st.session_state.user
         curriculum_id = um.save_curriculum(
             user.user_id,
@@ -511,7 +512,7 @@ def render_dashboard():
         st.rerun()
         return
     
-    um = UserManager()
+    um = get_user_manager()
     stats = um.get_user_stats(user.user_id)
     
     # Header
@@ -739,6 +740,29 @@ def render_current_day_content():
             st.button("🔒 Önce Quiz Çöz", use_container_width=True, disabled=True)
 
 
+def save_progress(lesson_id: str, study_hours: float, quiz_score: int = None):
+    """
+    Ders/quiz kaydını ve oturumdaki ilerlemeyi tek yazmayla kaydeder. Kayıt
+    başka bir oturumla aynı anda değişirse güncel kayıtla yeniden denenir.
+    """
+    um = get_user_manager()
+    user_id = st.session_state.user.user_id
+    
+    def apply(user):
+        um.record_progress(user_id, lesson_id, study_hours, quiz_score)
+        um.update_progress(
+            user_id,
+            st.session_state.current_day,
+            st.session_state.completed_days,
+            st.session_state.day_quiz_completed
+        )
+    
+    try:
+        um.update_with_retry(user_id, apply)
+    except ConcurrentUpdateError:
+        st.error("⚠️ İlerleme kaydedilemedi, kayıt aynı anda başka bir oturumda değişti. Lütfen tekrar deneyin.")
+
+
 def complete_day():
     """Günü tamamlar."""
     current_day = st.session_state.current_day
@@ -746,21 +770,13 @@ def complete_day():
     if current_day not in st.session_state.completed_days:
         st.session_state.completed_days.append(current_day)
     
-    um = UserManager()
-    um.record_progress(st.session_state.user.user_id, f"day_{current_day}", 1.0)
-    
     total_days = len(st.session_state.curriculum.get("daily_lessons", []))
     if current_day < total_days:
         st.session_state.current_day = current_day + 1
         st.session_state.view_day = st.session_state.current_day
     
-    # İlerlemeyi kaydet
-    um.update_progress(
-        st.session_state.user.user_id,
-        st.session_state.current_day,
-        st.session_state.completed_days,
-        st.session_state.day_quiz_completed
-    )
+    # İlerlemeyi tek yazmayla kaydet
+    save_progress(f"day_{current_day}", 1.0)
     
     st.success(f"🎉 Gün {current_day} tamamlandı!")
 
@@ -788,24 +804,35 @@ def render_lesson_page():
     
     st.markdown(f"## 📚 {theme}")
     
+    st.markdown("---")
+    
     # İçerik oluştur veya göster
+    streamed = False
     if st.session_state.daily_content is None:
-        with st.spinner("📖 Ders içeriği hazırlanıyor..."):
-            if lesson.get("learning_content"):
-                content = lesson["learning_content"]
-            elif lesson.get("content"):
-                content = lesson["content"]
-            else:
-                # YENİ AGENT ÇAĞRISI: ContentCuratorAgent (İçerik Üretimi için)
-                content_curator = get_content_curator_agent()
-                goal = curriculum.get("goal", "")
-                level = curriculum.get("level", "beginner")
-                content = content_curator.generate_lesson_content(theme, level, goal)
-            
-            st.session_state.daily_content = content
+        if lesson.get("learning_content"):
+            content = lesson["learning_content"]
+        elif lesson.get("content"):
+            content = lesson["content"]
+        else:
+            # YENİ AGENT ÇAĞRISI: ContentCuratorAgent (İçerik Üretimi için)
+            # İçerik üretilirken parça parça ekrana yazılır
+            content_curator = get_content_curator_agent()
+            goal = curriculum.get("goal", "")
+            level = curriculum.get("level", "beginner")
+            stream = content_curator.stream_lesson_content(theme, level, goal)
+            content = st.write_stream(stream)
+            if not isinstance(content, str):
+                content = "".join(str(part) for part in content)
+            streamed = True
+            if not stream.complete:
+                # Fallback ya da yarım içerik saklanmaz; sayfa yenilenince yeniden denenir
+                st.warning("⚠️ Ders içeriği tam oluşturulamadı. Sayfayı yenileyerek tekrar deneyebilirsiniz.")
+                content = None
+        
+        st.session_state.daily_content = content
     
-    st.markdown("---")
-    st.markdown(st.session_state.daily_content)
+    if not streamed:
+        st.markdown(st.session_state.daily_content)
     
     st.markdown("---")
     
@@ -1027,36 +1054,25 @@ def render_quiz_page():
             from tools.ai_service import get_ai_service
             ai_service = get_ai_service()
             
+            # Tüm yanlış cevaplar tek AI çağrısında açıklanır
+            with st.spinner("🤖 AI açıklamaları hazırlıyor..."):
+                explanations = ai_service.explain_wrong_answers_batch(
+                    [{"id": str(q["number"]), **q} for q in wrong_questions],
+                    topic=theme,
+                    level=level
+                )
+            
             for wrong_q in wrong_questions:
                 with st.expander(f"❌ Soru {wrong_q['number']}: {wrong_q['question'][:50]}...", expanded=True):
                     st.markdown(f"**Soru:** {wrong_q['question']}")
                     st.markdown(f"**Sizin Cevabınız:** {wrong_q['user_answer']}")
                     st.markdown(f"**Doğru Cevap:** {wrong_q['correct_answer']}")
                     
-                    # AI'dan açıklama al
-                    with st.spinner("🤖 AI açıklama hazırlıyor..."):
-                        explanation = ai_service.explain_wrong_answer(
-                            question=wrong_q['question'],
-                            user_answer=wrong_q['user_answer'],
-                            correct_answer=wrong_q['correct_answer'],
-                            topic=wrong_q['topic'],
-                            level=level
-                        )
-                    
                     st.markdown("**💡 Açıklama:**")
-                    st.success(explanation)
+                    st.success(explanations[str(wrong_q['number'])])
         
-        # Skoru veritabanına kaydet
-        um = UserManager()
-        um.record_progress(st.session_state.user.user_id, f"quiz_day_{current_day}", 0.5, score)
-        
-        # İlerlemeyi kaydet
-        um.update_progress(
-            st.session_state.user.user_id,
-            st.session_state.current_day,
-            st.session_state.completed_days,
-            st.session_state.day_quiz_completed
-        )
+        # Skoru ve ilerlemeyi veritabanına kaydet
+        save_progress(f"quiz_day_{current_day}", 0.5, score)
         
         st.markdown("---")
         
@@ -1084,12 +1100,12 @@ def render_sidebar():
     with st.sidebar:
         if st.session_state.user:
             user = st.session_state.user
-            um = UserManager()
+            um = get_user_manager()
             
             st.markdown(f"### 👤 {user.username}")
             
             # Tüm müfredatları göster
-            all_curriculums = um.get_all_curriculums(user.user_id)
+            all_curriculums = um.get_all_curriculums(user.user_id, include_content=False)
             active_curriculums = [c for c in all_curriculums if c.get("status") == "active"]
             
             if len(active_curriculums) > 1:
@@ -0,0 +1,66 @@
+"""
+Asenkron AI servisi benchmark'ı
+===============================
+Gecikmeli sahte bir modelle günün dersi + quiz'ini ve N yanlış cevap
+açıklamasını önce AIService ile sırayla, sonra AsyncAIService ile eşzamanlı
+üretir. Eşzamanlı duvar süresi çağrıların toplamına değil en yavaşına yakın
+olmalıdır (eşzamanlılık sınırı kadar).
+
+Çalıştırmak için: python benchmarks/bench_async_ai.py [--latency 0.8] [--explanations 4] [--concurrency 4]
+"""
+
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tools.ai_gateway import AIGateway
+from tools.ai_service import AIService, AsyncAIService, run_async
+from tools.fake_gemini import FakeGeminiModel
+
+
+def sequential(service: AIService, n_explanations: int) -> float:
+    start = time.perf_counter()
+    service.explain_topic("Döngüler")
+    service.generate_quiz_questions("Döngüler", num_questions=5)
+    for i in range(n_explanations):
+        service.explain_wrong_answer(f"Soru {i}?", "B", "A", "Döngüler")
+    return time.perf_counter() - start
+
+
+def concurrent(service: AsyncAIService, n_explanations: int) -> float:
+    async def run():
+        await service.gather(
+            service.generate_day_content_async("Döngüler", num_questions=5),
+            *(service.explain_wrong_answer_async(f"Soru {i}?", "B", "A", "Döngüler") for i in range(n_explanations))
+        )
+
+    start = time.perf_counter()
+    run_async(run())
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Asenkron AI servisi benchmark'ı")
+    parser.add_argument("--latency", type=float, default=0.8, help="sahte model gecikmesi (s)")
+    parser.add_argument("--explanations", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    model = FakeGeminiModel(latency=args.latency)
+    sync_service = AIService(model=model, use_cache=False, gateway=AIGateway(rate_per_minute=0))
+    async_service = AsyncAIService(model=model, use_cache=False, max_concurrency=args.concurrency,
+                                   gateway=AIGateway(rate_per_minute=0))
+
+    calls = 2 + args.explanations
+    seq_s = sequential(sync_service, args.explanations)
+    con_s = concurrent(async_service, args.explanations)
+    waves = -(-calls // args.concurrency)
+
+    print("=" * 60)
+    print(f"⚡ Asenkron AI benchmark ({calls} çağrı, {args.latency:.2f} s gecikme, sınır {args.concurrency})")
+    print("=" * 60)
+    print(f"Sıralı (AIService):          {seq_s:>6.2f} s  (beklenen ~{calls * args.latency:.2f} s)")
+    print(f"Eşzamanlı (AsyncAIService): {con_s:>6.2f} s  (beklenen ~{waves * args.latency:.2f} s)")
+    print(f"Hızlanma: {seq_s / con_s:.1f}x")
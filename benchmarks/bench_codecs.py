@@ -0,0 +1,60 @@
+"""
+Depolama codec benchmark'ı
+==========================
+Mevcut users.json içeriğini her codec ile kodlayıp çözer; dosya boyutunu ve
+okuma/yazma hızını karşılaştırır. Yüklü olmayan codec'ler atlanır.
+
+Çalıştırmak için: python benchmarks/bench_codecs.py [--path data/users.json] [--rounds 200]
+"""
+
+import argparse
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from memory.codecs import MSGPACK_AVAILABLE, ORJSON_AVAILABLE, decode, get_codec, read_document
+
+
+def bench(payload, name: str, rounds: int) -> dict:
+    codec = get_codec(name)
+    data = codec.dumps(payload)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        codec.dumps(payload)
+    save_s = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        decode(data)
+    load_s = (time.perf_counter() - start) / rounds
+
+    mb = len(data) / 1e6
+    return {"codec": name, "size_kb": len(data) / 1024, "save_mb_s": mb / save_s, "load_mb_s": mb / load_s,
+            "save_ms": save_s * 1000, "load_ms": load_s * 1000}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Depolama codec benchmark'ı")
+    parser.add_argument("--path", default=os.path.join(os.path.dirname(__file__), '..', 'data', 'users.json'))
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    payload = read_document(args.path)
+    names = ["json-pretty", "json"]
+    if ORJSON_AVAILABLE:
+        names.append("orjson")
+    if MSGPACK_AVAILABLE:
+        names.append("msgpack")
+
+    print("=" * 60)
+    print(f"🗜️ Codec benchmark ({args.path})")
+    print("=" * 60)
+    print(f"{'codec':>12} {'boyut (KB)':>11} {'yazma (ms)':>11} {'okuma (ms)':>11} {'yazma MB/s':>11} {'okuma MB/s':>11}")
+    for name in names:
+        r = bench(payload, name, args.rounds)
+        print(f"{r['codec']:>12} {r['size_kb']:>11.1f} {r['save_ms']:>11.3f} {r['load_ms']:>11.3f} "
+              f"{r['save_mb_s']:>11.1f} {r['load_mb_s']:>11.1f}")
+    if not MSGPACK_AVAILABLE:
+        print("ℹ️ msgpack yüklü değil (pip install msgpack), atlandı")
@@ -0,0 +1,73 @@
+"""
+Kullanıcı yükleme (hydration) benchmark'ı
+=========================================
+Eski şemadaki bir kaydın her okumada yükseltilmesi ile tek seferlik göç
+sonrası düz alan kopyası arasındaki farkı ölçer.
+
+Çalıştırmak için: python benchmarks/bench_hydration.py [--rounds 20000]
+"""
+
+import argparse
+import copy
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.migrations import migrate_record
+from models.user import UserManager
+
+
+def legacy_record(n_days: int = 30, n_scores: int = 100) -> dict:
+    """Göç öncesi (schema_version 0) tipik bir kayıt üretir."""
+    return {
+        "user_id": "user_1", "username": "bench", "email": "bench@example.com",
+        "password_hash": "x", "created_at": "2026-01-01T00:00:00",
+        "goal_input": "Python", "user_level": "beginner", "current_day": 5,
+        "completed_days": None,
+        "curriculum": {
+            "goal": "Python",
+            "daily_lessons": [{"day": d, "title": f"Gün {d}", "topics": ["a", "b"]} for d in range(1, n_days + 1)]
+        },
+        "completed_lessons": [{"lesson_id": f"day_{i}", "date": "2026-01-02"} for i in range(n_scores)],
+        "quiz_scores": [{"lesson_id": f"quiz_day_{i}", "score": i % 100, "date": "2026-01-02"} for i in range(n_scores)],
+    }
+
+
+def bench(rounds: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        um = UserManager(os.path.join(tmp, "users.json"), backend="json")
+        legacy = legacy_record()
+        copies = [copy.deepcopy(legacy) for _ in range(rounds)]
+
+        start = time.perf_counter()
+        for record in copies:
+            um._from_record(record)
+        legacy_us = (time.perf_counter() - start) / rounds * 1e6
+
+        migrated = copy.deepcopy(legacy)
+        migrate_record(migrated, um._store_curriculum)
+        copies = [copy.deepcopy(migrated) for _ in range(rounds)]
+
+        start = time.perf_counter()
+        for record in copies:
+            um._from_record(record)
+        migrated_us = (time.perf_counter() - start) / rounds * 1e6
+
+        um.store.close()
+        return {"legacy_us": legacy_us, "migrated_us": migrated_us}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kullanıcı yükleme benchmark'ı")
+    parser.add_argument("--rounds", type=int, default=20_000)
+    args = parser.parse_args()
+
+    r = bench(args.rounds)
+    print("=" * 60)
+    print("💧 Hydration benchmark")
+    print("=" * 60)
+    print(f"Eski şema (okumada göç): {r['legacy_us']:>8.1f} µs/kayıt")
+    print(f"Göç edilmiş kayıt:       {r['migrated_us']:>8.1f} µs/kayıt")
+    print(f"Hızlanma:                {r['legacy_us'] / r['migrated_us']:>8.1f}x")
@@ -0,0 +1,82 @@
+"""
+Login / kayıt gecikmesi benchmark'ı
+===================================
+Kullanıcı sayısı 10'dan 100k'ya çıkarken login ve kayıt (email çakışma
+kontrolü) süresinin sabit kaldığını gösterir. Varsayılan olarak json ve
+sqlite depoları yan yana ölçülür; json'da dosya değiştiğinde ilk okuma tüm
+dosyayı yeniden ayrıştırır (indeks kurulum sütunu).
+
+Çalıştırmak için: python benchmarks/bench_login.py [--backend json sqlite] [--max-users 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import asdict
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.user import User, UserManager
+
+
+def populate(um: UserManager, n_users: int):
+    """n_users kullanıcıyı toplu olarak depoya yazar."""
+    password_hash = um._hash_password("secret")
+    records = {}
+    for i in range(n_users):
+        user = User(
+            user_id=f"user_{i + 1}",
+            username=f"user{i}",
+            email=f"user{i}@example.com",
+            password_hash=password_hash,
+            created_at="2026-01-01T00:00:00"
+        )
+        records[user.user_id] = asdict(user)
+    um.store.put_many(records)
+
+
+def bench(backend: str, n_users: int, rounds: int = 200) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        um = UserManager(os.path.join(tmp, "users.json"), backend=backend)
+        populate(um, n_users)
+
+        # İlk arama indeksi kurar (başlangıç maliyeti ayrı raporlanır)
+        start = time.perf_counter()
+        um.login("user0@example.com", "secret")
+        warmup_ms = (time.perf_counter() - start) * 1000
+
+        emails = [f"user{random.randrange(n_users)}@example.com" for _ in range(rounds)]
+        start = time.perf_counter()
+        for email in emails:
+            ok, _ = um.login(email, "secret")
+            assert ok
+        login_us = (time.perf_counter() - start) / rounds * 1e6
+
+        start = time.perf_counter()
+        for email in emails:
+            ok, _ = um.register("yeni", email, "secret")
+            assert not ok
+        dup_us = (time.perf_counter() - start) / rounds * 1e6
+
+        um.store.close()
+        return {"users": n_users, "warmup_ms": warmup_ms, "login_us": login_us, "dup_check_us": dup_us}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Login gecikmesi benchmark'ı")
+    parser.add_argument("--backend", nargs="+", default=["json", "sqlite"], choices=["json", "sqlite"])
+    parser.add_argument("--max-users", type=int, default=100_000)
+    args = parser.parse_args()
+
+    sizes = [n for n in (10, 100, 1_000, 10_000, 100_000) if n <= args.max_users]
+
+    print("=" * 60)
+    print(f"🔐 Login benchmark ({', '.join(args.backend)})")
+    print("=" * 60)
+    print(f"{'depo':<8}{'kullanıcı':>10} {'indeks kurulum (ms)':>20} {'login (µs)':>12} {'çakışma (µs)':>14}")
+    for n in sizes:
+        for backend in args.backend:
+            r = bench(backend, n)
+            print(f"{backend:<8}{r['users']:>10} {r['warmup_ms']:>20.1f} {r['login_us']:>12.1f} {r['dup_check_us']:>14.1f}")
@@ -0,0 +1,142 @@
+"""
+Çevrimdışı agent yük testi
+==========================
+FakeGeminiModel ile N eşzamanlı kullanıcının uygulama akışını (müfredat,
+ders içeriği akışı, quiz, yanlış cevap açıklamaları) API anahtarı olmadan
+çalıştırır. Gecikme dağılımı ve hata enjeksiyonu ayarlanabilir; sonuçlar
+akış bazında p50/p95 süreler, AIService metrikleri ve geçit sayaçlarıdır.
+
+--record ile çalıştırmanın model trafiği bir cassette dosyasına yazılır
+(--real ile sahte model yerine GEMINI_API_KEY'li gerçek API kullanılır);
+--replay aynı trafiği ağa çıkmadan, kaydedilen gecikmelerle tekrar oynatır.
+
+Çalıştırmak için:
+    python benchmarks/bench_offline_agents.py [--users 8] [--latency lognormal:0.8:0.5]
+        [--faults rate_limit=0.05,truncate=0.1,fence=0.2] [--weeks 4] [--rpm 0]
+        [--record data/cassettes/load.jsonl [--real] | --replay data/cassettes/load.jsonl]
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from agents.content_curator_agent import ContentCuratorAgent
+from agents.quiz_validation_agent import QuizValidationAgent
+from agents.roadmap_agent import RoadmapAgent
+from tools.ai_gateway import AIGateway
+from tools.ai_metrics import AIMetrics
+from tools.ai_service import AIService
+from tools.cassette import Cassette, CassetteModel
+from tools.fake_gemini import FakeGeminiModel, parse_faults, parse_latency
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def user_flow(user: int, service: AIService, weeks: int) -> dict:
+    """Bir kullanıcının ilk oturumu; akış adı → süre (s)."""
+    timings = {}
+    goal = f"Python öğrenmek #{user}"
+
+    roadmap = RoadmapAgent()
+    roadmap.ai_service = service
+    start = time.perf_counter()
+    curriculum = roadmap.generate_curriculum(goal, "beginner", duration_weeks=weeks)
+    timings["müfredat"] = time.perf_counter() - start
+    topic = curriculum["daily_lessons"][0]["theme"]
+
+    curator = ContentCuratorAgent()
+    curator.ai_service = service
+    start = time.perf_counter()
+    for i, _ in enumerate(curator.stream_lesson_content(topic, "beginner", goal)):
+        if i == 0:
+            timings["ders (ilk parça)"] = time.perf_counter() - start
+    timings["ders (tamamı)"] = time.perf_counter() - start
+
+    quiz_agent = QuizValidationAgent()
+    quiz_agent.ai_service = service
+    start = time.perf_counter()
+    questions = quiz_agent.generate_quiz(topic, "beginner", 5, goal)
+    timings["quiz"] = time.perf_counter() - start
+
+    answers = {q["question_id"]: q["options"][-1] for q in questions}
+    wrong = [
+        {"id": q["question_id"], "question": q["question"], "user_answer": answers[q["question_id"]],
+         "correct_answer": q["correct_answer"]}
+        for q in questions if answers[q["question_id"]] != q["correct_answer"]
+    ]
+    start = time.perf_counter()
+    quiz_agent.validate_quiz(answers, questions)
+    if wrong:
+        service.explain_wrong_answers_batch(wrong, topic, "beginner")
+    timings["quiz sonucu"] = time.perf_counter() - start
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Çevrimdışı agent yük testi")
+    parser.add_argument("--users", type=int, default=8, help="eşzamanlı kullanıcı sayısı")
+    parser.add_argument("--latency", default="lognormal:0.8:0.5", help="model gecikmesi (bkz. AI_FAKE_LATENCY)")
+    parser.add_argument("--chunk-delay", type=float, default=0.05, help="akış parçaları arası gecikme (s)")
+    parser.add_argument("--faults", default="rate_limit=0.05,truncate=0.1,fence=0.2,prose=0.1")
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--rpm", type=float, default=0, help="geçit dakikalık kotası (0: sınırsız)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--record", metavar="PATH", help="model trafiğini cassette dosyasına kaydet")
+    parser.add_argument("--real", action="store_true", help="kayıtta gerçek Gemini API'sini kullan")
+    parser.add_argument("--replay", metavar="PATH", help="kaydedilmiş trafiği tekrar oynat")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="tekrarda gecikme çarpanı")
+    args = parser.parse_args()
+
+    fake = FakeGeminiModel(seed=args.seed, latency=parse_latency(args.latency),
+                           chunk_delay=args.chunk_delay, faults=parse_faults(args.faults))
+    model = fake
+    if args.replay:
+        model = CassetteModel(Cassette(args.replay, "replay", preserve_timing=True, time_scale=args.time_scale))
+    elif args.record:
+        inner = AIService(use_cache=False).model if args.real else fake
+        if inner is None:
+            sys.exit("❌ --real için GEMINI_API_KEY ve google-generativeai gerekli")
+        model = CassetteModel(Cassette(args.record, "record"), inner)
+    metrics = AIMetrics()
+    service = AIService(model=model, use_cache=False, metrics=metrics,
+                        gateway=AIGateway(rate_per_minute=args.rpm, base_delay=0.2, max_delay=2.0))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        results = list(pool.map(lambda u: user_flow(u, service, args.weeks), range(args.users)))
+    wall = time.perf_counter() - start
+
+    flows = defaultdict(list)
+    for timings in results:
+        for name, seconds in timings.items():
+            flows[name].append(seconds)
+
+    print("=" * 60)
+    source = f"tekrar: {args.replay}" if args.replay else f"gecikme {args.latency}"
+    print(f"🧪 Çevrimdışı yük testi ({args.users} kullanıcı, {source}, {args.weeks} hafta)")
+    print("=" * 60)
+    print(f"{'Akış':<20}{'p50 (s)':>10}{'p95 (s)':>10}{'en uzun':>10}")
+    for name, values in flows.items():
+        print(f"{name:<20}{percentile(values, 0.5):>10.2f}{percentile(values, 0.95):>10.2f}{max(values):>10.2f}")
+    print(f"\nToplam süre: {wall:.2f} s")
+
+    totals = defaultdict(int)
+    for data in metrics.snapshot()["methods"].values():
+        for name, value in data["counters"].items():
+            totals[name] += value
+    if isinstance(model, CassetteModel):
+        print(f"Cassette: {model.cassette.stats()}")
+    if not args.replay:
+        print(f"Model çağrıları: {fake.calls}  enjekte edilen hatalar: {dict(fake.stats()['faults'])}")
+    print("AIService: " + ", ".join(
+        f"{name}={totals[name]}" for name in ("calls", "errors", "partial_responses", "parse_failures", "fallbacks")
+    ))
+    gateway = service.gateway.metrics()
+    print(f"Geçit: yeniden deneme={gateway['retries']}, devre açıldı={gateway['circuit_opened']}")
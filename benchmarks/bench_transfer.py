@@ -0,0 +1,85 @@
+"""
+Kullanıcı dışa/içe aktarma benchmark'ı
+======================================
+N kullanıcılık bir depoyu JSONL'e aktarır ve boş bir depoya geri yükler;
+süreyi ve Python bellek tepe noktasını (tracemalloc) raporlar. Tepe nokta
+kullanıcı sayısıyla büyümemelidir.
+
+Çalıştırmak için: python benchmarks/bench_transfer.py [--backend sqlite] [--users 1000000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.migrations import CURRENT_SCHEMA_VERSION
+from models.progress import new_progress_stats
+from models.user import UserManager
+from models.user_transfer import export_users, import_users
+
+
+def populate(um: UserManager, n_users: int, batch_size: int = 5000):
+    """n_users kullanıcıyı gruplar halinde depoya yazar."""
+    batch = {}
+    for i in range(n_users):
+        user_id = f"user_{i + 1}"
+        batch[user_id] = {
+            "user_id": user_id, "username": f"user{i}", "email": f"user{i}@example.com",
+            "password_hash": "x", "created_at": "2026-01-01T00:00:00",
+            "quiz_scores": [{"lesson_id": "quiz_day_1", "score": i % 100, "date": "2026-01-02"}],
+            "completed_lessons": ["day_1"], "curriculums": [],
+            "progress_stats": new_progress_stats(), "schema_version": CURRENT_SCHEMA_VERSION
+        }
+        if len(batch) >= batch_size:
+            um.store.put_many(batch)
+            batch = {}
+    if batch:
+        um.store.put_many(batch)
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dışa/içe aktarma benchmark'ı")
+    parser.add_argument("--backend", default="sqlite", choices=["sharded", "sqlite"])
+    parser.add_argument("--users", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = UserManager(os.path.join(tmp, "src", "users.json"), backend=args.backend)
+        populate(source, args.users)
+        export_path = os.path.join(tmp, "users.jsonl")
+
+        def do_export():
+            with open(export_path, "w", encoding="utf-8") as f:
+                return export_users(source, f)
+
+        target = UserManager(os.path.join(tmp, "dst", "users.json"), backend=args.backend)
+
+        def do_import():
+            with open(export_path, "r", encoding="utf-8") as f:
+                return import_users(target, f)
+
+        exported, export_s, export_mb = measure(do_export)
+        imported, import_s, import_mb = measure(do_import)
+
+        print("=" * 60)
+        print(f"📤 Dışa/içe aktarma benchmark ({args.backend}, {args.users} kullanıcı)")
+        print("=" * 60)
+        print(f"Dışa aktarma: {exported:>9} kullanıcı  {export_s:>7.1f} s  tepe bellek {export_mb:>6.1f} MB")
+        print(f"İçe aktarma:  {imported:>9} kullanıcı  {import_s:>7.1f} s  tepe bellek {import_mb:>6.1f} MB")
+        print(f"JSONL boyutu: {os.path.getsize(export_path) / 1e6:.1f} MB")
+        source.store.close()
+        target.store.close()
@@ -18,6 +18,46 @@ class Config:
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
     GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
     
+    # Gemini yanıt önbelleği (bkz. src/tools/ai_cache.py)
+    AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    AI_CACHE_PATH = os.getenv("AI_CACHE_PATH", "data/cache/ai_responses.db")
+    AI_CACHE_TTL = float(os.getenv("AI_CACHE_TTL", str(7 * 24 * 3600)))
+    AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "5000"))
+    # Yanlış cevap açıklamaları için süreç içi LRU (0 = kapalı)
+    AI_EXPLANATION_MEMO_SIZE = int(os.getenv("AI_EXPLANATION_MEMO_SIZE", "2048"))
+    # AIService/AsyncAIService paralel Gemini çağrısı sınırı
+    AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+    # Gemini çağrı geçidi (bkz. src/tools/ai_gateway.py)
+    AI_RATE_LIMIT_RPM = float(os.getenv("AI_RATE_LIMIT_RPM", "60"))  # <= 0: sınırsız
+    AI_RATE_BURST = int(os.getenv("AI_RATE_BURST", "10"))
+    AI_RATE_MAX_WAIT = float(os.getenv("AI_RATE_MAX_WAIT", "30"))
+    AI_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "3"))
+    AI_RETRY_BASE_DELAY = float(os.getenv("AI_RETRY_BASE_DELAY", "1.0"))
+    AI_RETRY_MAX_DELAY = float(os.getenv("AI_RETRY_MAX_DELAY", "30"))
+    AI_BREAKER_FAILURES = int(os.getenv("AI_BREAKER_FAILURES", "5"))
+    AI_BREAKER_RESET = float(os.getenv("AI_BREAKER_RESET", "30"))
+    # AIService metrikleri (bkz. src/tools/ai_metrics.py); exporter: "memory", "prometheus"
+    AI_METRICS_EXPORTERS = os.getenv("AI_METRICS_EXPORTERS", "")
+    AI_METRICS_PROM_PATH = os.getenv("AI_METRICS_PROM_PATH", "data/metrics/ai_service.prom")
+    AI_METRICS_EXPORT_INTERVAL = float(os.getenv("AI_METRICS_EXPORT_INTERVAL", "15"))
+    # Çevrimdışı test/benchmark: gerçek API yerine sahte model (bkz. src/tools/fake_gemini.py)
+    AI_FAKE_MODEL = os.getenv("AI_FAKE_MODEL", "").lower() in ("1", "true", "yes")
+    AI_FAKE_SEED = int(os.getenv("AI_FAKE_SEED", "0"))
+    AI_FAKE_LATENCY = os.getenv("AI_FAKE_LATENCY", "0")  # "0.5", "uniform:0.2:1.5", "lognormal:0.8:0.5"
+    AI_FAKE_FAULTS = os.getenv("AI_FAKE_FAULTS", "")  # "rate_limit=0.05,truncate=0.1,fence=0.2"
+    # Kayıt/tekrar: "record" istekleri dosyaya yazar, "replay" ağa çıkmadan dosyadan yanıtlar
+    AI_CASSETTE_MODE = os.getenv("AI_CASSETTE_MODE", "")
+    AI_CASSETTE_PATH = os.getenv("AI_CASSETTE_PATH", "data/cassettes/session.jsonl")
+    AI_CASSETTE_PRESERVE_TIMING = os.getenv("AI_CASSETTE_PRESERVE_TIMING", "false").lower() in ("1", "true", "yes")
+    AI_CASSETTE_TIME_SCALE = float(os.getenv("AI_CASSETTE_TIME_SCALE", "1.0"))
+    # RoadmapAgent: eşzamanlı hafta üretimi ve başarısız haftalar için ek deneme
+    CURRICULUM_WORKERS = int(os.getenv("CURRICULUM_WORKERS", "4"))
+    CURRICULUM_WEEK_RETRIES = int(os.getenv("CURRICULUM_WEEK_RETRIES", "1"))
+    # Yanlış cevap açıklamaları tek çağrıda mı (true) yoksa paralel tek tek mi (false)
+    AI_BATCH_EXPLANATIONS = os.getenv("AI_BATCH_EXPLANATIONS", "true").lower() in ("1", "true", "yes")
+    # Tek toplu açıklama çağrısındaki en fazla soru; fazlası paralel gruplara bölünür
+    AI_EXPLANATION_BATCH_SIZE = int(os.getenv("AI_EXPLANATION_BATCH_SIZE", "10"))
+    
     # Google Search API
     GOOGLE_SEARCH_API_KEY = os.getenv("GOOGLE_SEARCH_API_KEY", "")
     GOOGLE_SEARCH_ENGINE_ID = os.getenv("GOOGLE_SEARCH_ENGINE_ID", "")
@@ -26,6 +66,22 @@ class Config:
     DEFAULT_LANGUAGE = os.getenv("DEFAULT_LANGUAGE", "tr")
     MAX_SEARCH_RESULTS = int(os.getenv("MAX_SEARCH_RESULTS", "5"))
     
+    # Kullanıcı depolama motoru: "json" (data/users.json), "sharded" (data/users/<user_id>.json)
+    # veya "sqlite" (data/users.db). json'da her yazma ve dosya değiştikten sonraki ilk okuma
+    # tüm dosyayı ayrıştırır; binlerce kullanıcıda sqlite önerilir (bkz. benchmarks/bench_login.py)
+    USER_STORE_BACKEND = os.getenv("USER_STORE_BACKEND", "json")
+    # Depo dosyalarının biçimi: "json-pretty" (varsayılan), "json" (kompakt), "orjson" veya "msgpack".
+    # Okurken biçim otomatik algılanır; değiştirmek için göç gerekmez.
+    STORAGE_CODEC = os.getenv("STORAGE_CODEC", "json-pretty")
+    # Kullanıcı değişikliklerini bellekte biriktirip toplu yaz (tek süreçli kurulumlar)
+    USER_WRITE_BACK = os.getenv("USER_WRITE_BACK", "").lower() in ("1", "true", "yes")
+    
+    # MemoryBank güncellemelerini tam yeniden yazma yerine journal dosyasına ekle
+    MEMORY_BANK_JOURNAL = os.getenv("MEMORY_BANK_JOURNAL", "").lower() in ("1", "true", "yes")
+    
+    # Geçmiş sıkıştırmada saklanan son ham quiz/ders/performans kaydı sayısı
+    PROGRESS_HISTORY_KEEP = int(os.getenv("PROGRESS_HISTORY_KEEP", "100"))
+    
     @classmethod
     def is_gemini_configured(cls) -> bool:
         """Check if Gemini API is configured."""
@@ -12,13 +12,15 @@ from dotenv import load_dotenv
 # Load env vars
 load_dotenv()
 
-from agents.orchestrator_agent import OrchestratorAgent
-from tools.google_search import GoogleSearchTool
 from memory.memory_bank import MemoryBank
 
 
 def run_demo():
     """Run a demonstration of the learning coach system."""
+    # Imported here so the user export/import commands do not need the AI SDKs
+    from agents.orchestrator_agent import OrchestratorAgent
+    from tools.google_search import GoogleSearchTool
+
     memory = MemoryBank()
     search_tool = GoogleSearchTool()
     orchestrator = OrchestratorAgent(search_tool=search_tool, memory_service=memory)
@@ -64,11 +66,27 @@ def run_demo():
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="AI-Powered Personal Learning Coach")
+    parser.add_argument("command", nargs="?", choices=["export-users", "import-users"],
+                        help="Stream the user store to/from a JSONL file")
     parser.add_argument("--demo", action="store_true", help="Run a local demonstration")
+    parser.add_argument("--file", default="-", help="JSONL file for export/import ('-' = stdout/stdin)")
+    parser.add_argument("--data-path", default="data/users.json", help="User store path")
+    parser.add_argument("--backend", default=None, choices=["json", "sharded", "sqlite"],
+                        help="User store backend (default: USER_STORE_BACKEND)")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Users per write when importing")
+    parser.add_argument("--skip-existing", action="store_true", help="Do not overwrite users that already exist")
+    parser.add_argument("--no-curricula", action="store_true", help="Export user records without curriculum blobs")
     args = parser.parse_args()
     
-    if args.demo:
+    if args.command == "export-users":
+        from models.user_transfer import run_export
+        run_export(args.data_path, args.backend, args.file, include_curricula=not args.no_curricula)
+    elif args.command == "import-users":
+        from models.user_transfer import run_import
+        run_import(args.data_path, args.backend, args.file, args.batch_size, args.skip_existing)
+    elif args.demo:
         orchestrator = run_demo()
     else:
         print("Run with --demo to run a local demonstration.")
         print("Example: python main.py --demo")
+        print("Backup users: python main.py export-users --file users.jsonl")
@@ -4,7 +4,7 @@ Research Agent - Gerçek öğrenme kaynakları bulur
 Konuya göre gerçek, kaliteli eğitim kaynaklarını döndürür.
 """
 
-from typing import List, Dict
+from typing import Iterator, List, Dict
 
 
 try:
@@ -275,6 +275,14 @@ class ContentCuratorAgent:
         # AI çalışmazsa minimal fallback
         return self._get_minimal_fallback_content(topic, level, goal)
 
+    def stream_lesson_content(self, topic: str, level: str = "beginner", goal: str = "") -> "LessonStream":
+        """
+        Ders içeriğini parça parça üretir (ör. st.write_stream için).
+        AI kullanılamıyorsa ya da yeterli metin gelmezse fallback içerik döner;
+        akış bitince LessonStream.complete tam bir AI içeriği gelip gelmediğini söyler.
+        """
+        return LessonStream(self, topic, level, goal)
+
     def _get_minimal_fallback_content(self, topic: str, level: str, goal: str) -> str:
         """
         Minimal fallback içerik - sadece AI çalışmazsa.
@@ -316,3 +324,40 @@ def get_content_curator_agent() -> ContentCuratorAgent:
     if _content_curator_agent is None:
         _content_curator_agent = ContentCuratorAgent()
     return _content_curator_agent
+
+
+class LessonStream:
+    """
+    stream_lesson_content'in döndürdüğü akış. complete yalnızca AI akışı hatasız
+    bitip generate_lesson_content'teki uzunluk eşiğini geçtiyse True olur;
+    fallback ya da yarım kalan içerik saklanmamalıdır.
+    """
+    
+    def __init__(self, curator: ContentCuratorAgent, topic: str, level: str, goal: str):
+        self.curator = curator
+        self.topic = topic
+        self.level = level
+        self.goal = goal
+        self.complete = False
+    
+    def __iter__(self) -> Iterator[str]:
+        parts: List[str] = []
+        if self.curator._is_ai_available():
+            try:
+                for chunk in self.curator.ai_service.explain_topic_stream(
+                    self.topic, self.level, self.goal, fallback=False
+                ):
+                    parts.append(chunk)
+                    yield chunk
+                if len("".join(parts)) > 50:
+                    self.complete = True
+                    return
+                print(f"⚠️ AI boş içerik döndürdü: {self.topic}")
+            except Exception as e:
+                print(f"❌ AI içerik hatası: {e}")
+                if parts:
+                    return  # yarım akış: ekranda kalır ama saklanmaz
+        else:
+            print(f"⚠️ AI servisi kullanılamıyor")
+        
+        yield self.curator._get_minimal_fallback_content(self.topic, self.level, self.goal)
@@ -1,5 +1,6 @@
 from typing import Dict, List, Optional
 from tools.quiz_scoring import QuizScorer, QuizQuestion, QuizResult
+from memory.rollups import summarize
 
 
 class ProgressAgent:
@@ -121,22 +122,28 @@ class ProgressAgent:
         if not self.memory:
             return {"message": "Bellek servisi yapılandırılmamış"}
         
-        # Performans geçmişini al (eğer memory'de varsa)
+        # Performans geçmişini al (eğer memory'de varsa); sıkıştırılmış eski
+        # kayıtlar özetlerden, son kayıtlar ham listeden gelir
         try:
             data = self.memory._read()
             performance_history = data.get("performance", [])
+            archived = summarize(data.get("performance_rollups", []))
             
-            if not performance_history:
+            if not performance_history and not archived["count"]:
                 return {"message": "Henüz performans verisi yok"}
             
             total_scores = [p.get("daily_score", 0) for p in performance_history]
-            avg_score = sum(total_scores) / len(total_scores) if total_scores else 0
+            total_days = archived["count"] + len(total_scores)
+            avg_score = (archived["sum"] + sum(total_scores)) / total_days
+            best_candidates = total_scores + ([archived["max"]] if archived["count"] else [])
+            first_score = archived["first"] if archived["count"] else total_scores[0]
+            last_score = total_scores[-1] if total_scores else archived["last"]
             
             return {
-                "total_days": len(performance_history),
+                "total_days": total_days,
                 "average_score": round(avg_score, 2),
-                "best_score": max(total_scores) if total_scores else 0,
-                "trend": "improving" if len(total_scores) > 1 and total_scores[-1] > total_scores[0] else "stable"
+                "best_score": max(best_candidates),
+                "trend": "improving" if total_days > 1 and last_score > first_score else "stable"
             }
         except Exception:
             return {"message": "İlerleme verisi alınamadı"}
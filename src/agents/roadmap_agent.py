@@ -3,8 +3,14 @@ Roadmap Agent - Müfredat ve Planlama
 ====================================
 Kullanıcının hedefine göre dinamik veya statik müfredat oluşturur.
 Hem genel yol haritasını hem de detaylı ders planlarını yönetir.
+
+AI müfredatı iki aşamada üretilir: önce kısa bir haftalık taslak, sonra her
+haftanın günlük dersleri sınırlı bir iş parçacığı havuzunda eşzamanlı.
+Başarısız haftalar yeniden denenir; yine olmazsa yalnızca o haftalar statik
+şablondan doldurulur.
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional
 import os
 import json
@@ -19,7 +25,14 @@ except ImportError:
 class RoadmapAgent:
     """Müfredat ve öğrenme yolu oluşturan agent."""
     
-    def __init__(self):
+    def __init__(self, max_workers: Optional[int] = None, week_retries: Optional[int] = None):
+        """
+        Args:
+            max_workers: eşzamanlı hafta üretimi sınırı (varsayılan: CURRICULUM_WORKERS veya 4)
+            week_retries: başarısız haftalar için ek deneme sayısı (varsayılan: CURRICULUM_WEEK_RETRIES veya 1)
+        """
+        self.max_workers = max_workers or int(os.getenv("CURRICULUM_WORKERS", "4"))
+        self.week_retries = week_retries if week_retries is not None else int(os.getenv("CURRICULUM_WEEK_RETRIES", "1"))
         self.ai_service = None
         if AI_AVAILABLE:
             try:
@@ -42,10 +55,13 @@ class RoadmapAgent:
     def generate_curriculum(self, goal: str, level: str, duration_weeks: int = 4) -> Dict:
         """Müfredat oluşturur."""
         
-        # 1. AI ile dene
+        # 1. AI ile dene: önce haftalık taslak + paralel haftalar, olmazsa tek çağrı
         if self._is_ai_available():
             try:
                 print(f"🤖 AI ile müfredat oluşturuluyor: {goal}")
+                curriculum = self._generate_curriculum_by_week(goal, level, duration_weeks)
+                if curriculum:
+                    return curriculum
                 curriculum = self.ai_service.generate_curriculum(goal, level, duration_weeks)
                 if curriculum and len(curriculum.get("daily_lessons", [])) > 0:
                     return curriculum
@@ -56,6 +72,73 @@ class RoadmapAgent:
         print("⚠️ Fallback müfredat kullanılıyor")
         return self._generate_fallback_curriculum(goal, level, duration_weeks)
 
+    def _generate_curriculum_by_week(self, goal: str, level: str, duration_weeks: int) -> Optional[Dict]:
+        """Taslak + haftalık paralel üretim; taslak alınamazsa None."""
+        outline = self.ai_service.generate_curriculum_outline(goal, level, duration_weeks)
+        if not outline:
+            return None
+        
+        weeks = {}
+        for idx, week in enumerate(outline.get("weeks", [])[:duration_weeks]):
+            week = dict(week) if isinstance(week, dict) else {"focus": str(week)}
+            week["week"] = idx + 1
+            weeks[idx + 1] = week
+        for week_no in range(len(weeks) + 1, duration_weeks + 1):
+            weeks[week_no] = {"week": week_no, "focus": f"{goal} - {week_no}. hafta", "topics": []}
+        outline = {**outline, "duration_weeks": duration_weeks, "weeks": list(weeks.values())}
+        
+        results: Dict[int, List[Dict]] = {}
+        pending = list(weeks)
+        for attempt in range(1 + self.week_retries):
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+                futures = {
+                    week_no: pool.submit(self.ai_service.generate_week_lessons, goal, level, weeks[week_no], outline)
+                    for week_no in pending
+                }
+                for week_no, future in futures.items():
+                    try:
+                        lessons = future.result()
+                    except Exception as e:
+                        print(f"❌ {week_no}. hafta hatası: {e}")
+                        lessons = []
+                    if lessons:
+                        results[week_no] = lessons
+            pending = [week_no for week_no in pending if week_no not in results]
+            if not pending:
+                break
+            print(f"🔁 Yeniden denenecek haftalar: {pending}")
+        
+        if len(pending) == duration_weeks:
+            return None
+        
+        fallback_days = self._generate_fallback_curriculum(goal, level, duration_weeks)["daily_lessons"]
+        daily_lessons = []
+        for week_no in sorted(weeks):
+            if week_no in results:
+                lessons = [dict(lesson) for lesson in results[week_no][:7]]
+                if len(lessons) < 7:
+                    print(f"⚠️ {week_no}. haftanın eksik {7 - len(lessons)} günü fallback derslerle tamamlanıyor")
+                    lessons += [
+                        dict(lesson, source="fallback")
+                        for lesson in fallback_days[(week_no - 1) * 7 + len(lessons):week_no * 7]
+                    ]
+            else:
+                print(f"⚠️ {week_no}. hafta için fallback dersler kullanılıyor")
+                lessons = [dict(lesson, source="fallback") for lesson in fallback_days[(week_no - 1) * 7:week_no * 7]]
+            for offset, lesson in enumerate(lessons):
+                lesson["day"] = (week_no - 1) * 7 + offset + 1
+                lesson["week"] = week_no
+                daily_lessons.append(lesson)
+        
+        return {
+            "goal": outline.get("goal", goal),
+            "level": outline.get("level", level),
+            "duration_weeks": duration_weeks,
+            "summary": outline.get("summary", f"{goal} için {duration_weeks} haftalık program."),
+            "weeks": outline["weeks"],
+            "daily_lessons": daily_lessons
+        }
+
     def _generate_fallback_curriculum(self, goal: str, level: str, duration_weeks: int) -> Dict:
         """Hedefe en uygun statik müfredatı döndürür."""
         goal_lower = goal.lower()
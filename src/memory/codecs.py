@@ -0,0 +1,135 @@
+"""
+Serialization codecs for the persistence layer.
+
+- "json-pretty": stdlib JSON with indent=2 (the historical on-disk format, default)
+- "json": compact stdlib JSON, no whitespace
+- "orjson": compact JSON through orjson (falls back to "json" if not installed)
+- "msgpack": binary MessagePack (requires the msgpack package)
+
+The codec is chosen with the STORAGE_CODEC environment variable. Reads never
+depend on it: every file is decoded by sniffing its first byte, so switching
+codecs needs no migration - files are rewritten in the new format as they are
+next saved.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from .file_utils import atomic_write_bytes
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+
+class Codec:
+    """Turns a JSON-compatible document into bytes and back."""
+
+    name = ""
+    binary = False
+
+    def dumps(self, payload: Any) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+class JsonCodec(Codec):
+    """Stdlib JSON; compact unless an indent is given."""
+
+    def __init__(self, indent: Optional[int] = None):
+        self.indent = indent
+        self.name = "json-pretty" if indent else "json"
+
+    def dumps(self, payload: Any) -> bytes:
+        if self.indent:
+            text = json.dumps(payload, ensure_ascii=False, indent=self.indent)
+        else:
+            text = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        return text.encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(Codec):
+    name = "orjson"
+
+    def dumps(self, payload: Any) -> bytes:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackCodec(Codec):
+    name = "msgpack"
+    binary = True
+
+    def dumps(self, payload: Any) -> bytes:
+        return msgpack.packb(payload, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+def _build(name: str) -> Codec:
+    if name == "json-pretty":
+        return JsonCodec(indent=2)
+    if name == "json":
+        return JsonCodec()
+    if name == "orjson":
+        if ORJSON_AVAILABLE:
+            return OrjsonCodec()
+        print("⚠️ orjson is not installed, falling back to stdlib JSON")
+        return JsonCodec()
+    if name == "msgpack":
+        if not MSGPACK_AVAILABLE:
+            raise ImportError("msgpack codec requires the msgpack package: pip install msgpack")
+        return MsgpackCodec()
+    raise ValueError(f"Unknown storage codec: {name}")
+
+
+_codecs: Dict[str, Codec] = {}
+
+
+def get_codec(name: Optional[str] = None) -> Codec:
+    """Return the named codec, or the one configured by STORAGE_CODEC."""
+    name = (name or os.getenv("STORAGE_CODEC", "json-pretty")).lower()
+    if name not in _codecs:
+        _codecs[name] = _build(name)
+    return _codecs[name]
+
+
+def decode(data: Union[bytes, str]) -> Any:
+    """Decode data written by any codec, detecting the format from the first byte."""
+    if isinstance(data, str):
+        return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+    head = data.lstrip()[:1]
+    if head in (b"{", b"[", b'"') or not head:
+        return orjson.loads(data) if ORJSON_AVAILABLE else json.loads(data)
+    if not MSGPACK_AVAILABLE:
+        raise ImportError("this file is MessagePack-encoded; install the msgpack package to read it")
+    return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+
+def read_document(path: Path) -> Any:
+    """Read and decode a file in any supported format."""
+    with open(path, "rb") as f:
+        return decode(f.read())
+
+
+def write_document(path: Path, payload: Any, codec: Optional[Codec] = None):
+    """Atomically write `payload` with the given (or configured) codec."""
+    atomic_write_bytes(path, (codec or get_codec()).dumps(payload))
@@ -0,0 +1,120 @@
+"""
+File helpers for the persistence layer.
+
+- atomic_write_json / atomic_write_text / atomic_write_bytes: crash-safe
+  writes (temp file next to the target + fsync + atomic rename); a new file
+  gets the usual umask-based mode, an existing file keeps its mode
+- file_lock: advisory inter-process lock on a sidecar .lock file
+
+Readers never need a lock: they always see either the old or the new file.
+"""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Iterator, Optional
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:  # Windows
+    FCNTL_AVAILABLE = False
+    import msvcrt
+
+
+def _current_umask() -> int:
+    """
+    The process umask, read without the os.umask(0) round-trip: setting it
+    briefly to 0 would let files created by other threads meanwhile come out
+    world-writable. Falls back to the common 022 where /proc is unavailable.
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii", errors="replace") as f:
+            for line in f:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    return 0o022
+
+
+# mkstemp creates 0600 files; new files should get the usual umask-based mode
+_UMASK = _current_umask()
+
+
+@contextmanager
+def _atomic_open(path: Path, binary: bool = False) -> Iterator[IO]:
+    """
+    Open a temp file next to `path`; on success it is fsynced and atomically
+    renamed over the target, so readers see either the old file or the new
+    one, never a partial write.
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        try:
+            mode = os.stat(path).st_mode & 0o777
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+        os.chmod(tmp_name, mode)
+        with (os.fdopen(fd, "wb") if binary else os.fdopen(fd, "w", encoding="utf-8")) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        if os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+        raise
+
+
+def atomic_write_json(path: Path, payload: Any, indent: Optional[int] = 2):
+    """Crash-safe JSON write (temp file + fsync + atomic rename)."""
+    with _atomic_open(path) as f:
+        json.dump(payload, f, ensure_ascii=False, indent=indent)
+
+
+def atomic_write_text(path: Path, text: str):
+    """Crash-safe text write (temp file + fsync + atomic rename)."""
+    with _atomic_open(path) as f:
+        f.write(text)
+
+
+def atomic_write_bytes(path: Path, data: bytes):
+    """Crash-safe binary write (temp file + fsync + atomic rename)."""
+    with _atomic_open(path, binary=True) as f:
+        f.write(data)
+
+
+@contextmanager
+def file_lock(lock_path: Path, shared: bool = False) -> Iterator[None]:
+    """
+    Hold an advisory lock on `lock_path` (created if missing) for the block.
+
+    Exclusive locks serialize writers across processes and threads; shared
+    locks let readers overlap with each other but not with a writer. The lock
+    is not re-entrant: do not take it again while holding it. On Windows every
+    lock is exclusive.
+    """
+    lock_path = Path(lock_path)
+    with open(lock_path, "a+b") as f:
+        if FCNTL_AVAILABLE:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if FCNTL_AVAILABLE:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
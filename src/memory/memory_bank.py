@@ -1,30 +1,167 @@
 import json
+import os
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
+
+from .codecs import get_codec, read_document, write_document
+from .file_utils import file_lock
+from .rollups import roll_up
+
+# Raw performance entries kept by compact_performance; older ones are rolled up
+PERFORMANCE_KEEP_RAW = int(os.getenv("PROGRESS_HISTORY_KEEP", "100"))
 
 
 class MemoryBank:
-    def __init__(self, path: str = "data/memory/user_profile_store.json"):
-        """Initialize the Memory Bank with a path to the user profile store."""
+    def __init__(
+        self,
+        path: str = "data/memory/user_profile_store.json",
+        journal: Optional[bool] = None,
+        compact_every: int = 500,
+        codec: Optional[str] = None
+    ):
+        """
+        Initialize the Memory Bank with a path to the user profile store.
+
+        In journal mode every update is appended as one JSON line to a segment
+        file next to the snapshot, and the segment is folded back into the
+        snapshot every `compact_every` events. Journal mode is enabled with
+        `journal=True` or the MEMORY_BANK_JOURNAL environment variable.
+        The snapshot format follows `codec` (or STORAGE_CODEC); journal lines
+        are always JSON.
+
+        Several processes may share one store: updates hold an exclusive lock
+        on `<store>.lock`, and journal-mode reads hold a shared one so they
+        never see a snapshot and journal from different compactions.
+        """
         self.path = Path(path)
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        if not self.path.exists():
-            self._write({"user_profile": {}, "recommendations": [], "daily_plans": [], "performance": []})
+        self.journal_path = self.path.with_suffix(".journal.jsonl")
+        self.lock_path = self.path.with_suffix(".lock")
+        if journal is None:
+            journal = os.getenv("MEMORY_BANK_JOURNAL", "").lower() in ("1", "true", "yes")
+        self.journal = journal
+        self.compact_every = compact_every
+        self.codec = get_codec(codec)
+
+        with file_lock(self.lock_path):
+            if not self.path.exists():
+                self._write_snapshot({"user_profile": {}, "recommendations": [], "daily_plans": [], "performance": []}, 0)
+            self._seq, self._pending = self._scan_journal()
+            self._journal_state = self._current_journal_state()
+
+    def _load_snapshot(self) -> Dict[str, Any]:
+        return read_document(self.path)
+
+    def _write_snapshot(self, payload: Dict[str, Any], seq: int):
+        """Atomically replace the snapshot, recording the last journal event it contains."""
+        snapshot = dict(payload)
+        snapshot["_journal_seq"] = seq
+        write_document(self.path, snapshot, self.codec)
+
+    def _journal_events(self, repair: bool = False) -> List[Dict[str, Any]]:
+        """Read the journal segment, ignoring (and optionally truncating) a torn trailing line."""
+        if not self.journal_path.exists():
+            return []
+        events = []
+        good_offset = 0
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    break
+                good_offset += len(line)
+        if repair and good_offset < self.journal_path.stat().st_size:
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good_offset)
+        return events
+
+    def _scan_journal(self) -> tuple:
+        """Return (last sequence number, number of events not yet compacted)."""
+        snapshot_seq = self._load_snapshot().get("_journal_seq", 0)
+        events = [e for e in self._journal_events(repair=True) if e["seq"] > snapshot_seq]
+        last_seq = events[-1]["seq"] if events else snapshot_seq
+        return last_seq, len(events)
+
+    def _current_journal_state(self) -> tuple:
+        """(snapshot mtime, journal size): changes whenever anyone appends or compacts."""
+        try:
+            journal_size = self.journal_path.stat().st_size
+        except FileNotFoundError:
+            journal_size = None
+        return self.path.stat().st_mtime_ns, journal_size
+
+    def _sync_journal(self):
+        """Pick up events appended or compacted by other processes (caller holds the lock)."""
+        if self._current_journal_state() != self._journal_state:
+            self._seq, self._pending = self._scan_journal()
+            self._journal_state = self._current_journal_state()
+
+    @staticmethod
+    def _apply(data: Dict[str, Any], event: Dict[str, Any]):
+        if event["op"] == "set":
+            data[event["key"]] = event["value"]
+        else:
+            data.setdefault(event["key"], []).append(event["value"])
 
     def _read(self) -> Dict[str, Any]:
-        """Read the memory bank from the file."""
-        with open(self.path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        """Read the memory bank: snapshot plus any journal events after it."""
+        if not self.journal:
+            # Snapshots are replaced atomically, so a plain read needs no lock
+            return self._read_unlocked()
+        with file_lock(self.lock_path, shared=True):
+            return self._read_unlocked()
+
+    def _read_unlocked(self) -> Dict[str, Any]:
+        data = self._load_snapshot()
+        snapshot_seq = data.pop("_journal_seq", 0)
+        for event in self._journal_events():
+            if event["seq"] > snapshot_seq:
+                self._apply(data, event)
+        return data
 
     def _write(self, payload: Dict[str, Any]):
-        """Write the memory bank to the file."""
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(payload, f, ensure_ascii=False, indent=2)
+        """Write the memory bank to the file, folding in (and clearing) the journal. Caller holds the lock."""
+        self._write_snapshot(payload, self._seq)
+        if self.journal_path.exists():
+            self.journal_path.unlink()
+        self._pending = 0
+        self._journal_state = self._current_journal_state()
+
+    def _record(self, op: str, key: str, value: Any):
+        """Apply one update, either as a journal line or as a full rewrite."""
+        with file_lock(self.lock_path):
+            if not self.journal:
+                data = self._read_unlocked()
+                self._apply(data, {"op": op, "key": key, "value": value})
+                self._write(data)
+                return
+
+            self._sync_journal()
+            self._seq += 1
+            line = json.dumps({"seq": self._seq, "op": op, "key": key, "value": value}, ensure_ascii=False)
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self._journal_state = self._current_journal_state()
+            self._pending += 1
+
+            if self._pending >= self.compact_every:
+                self._compact_unlocked()
+
+    def _compact_unlocked(self):
+        self._sync_journal()
+        self._write(self._read_unlocked())
+
+    def compact(self):
+        """Fold the journal segment into the snapshot."""
+        with file_lock(self.lock_path):
+            self._compact_unlocked()
 
     def save_user_profile(self, profile: Dict[str, Any]):
-        data = self._read()
-        data["user_profile"] = profile
-        self._write(data)
+        self._record("set", "user_profile", profile)
 
     def get_user_profile(self) -> Dict[str, Any]:
         """Get the user profile from the memory bank."""
@@ -32,18 +169,38 @@ class MemoryBank:
 
     def save_recommendations(self, key: str, recs: List[Dict[str, Any]]):
         """Save the recommendations to the memory bank."""
-        data = self._read()
-        data.setdefault("recommendations", []).append({"key": key, "recs": recs})
-        self._write(data)
+        self._record("append", "recommendations", {"key": key, "recs": recs})
 
     def append_daily_plan(self, plan: Dict[str, Any]):
         """Append the daily plan to the memory bank."""
-        data = self._read()
-        data.setdefault("daily_plans", []).append(plan)
-        self._write(data)
+        self._record("append", "daily_plans", plan)
 
     def append_performance(self, metrics: Dict[str, Any]):
         """Append the performance metrics to the memory bank."""
-        data = self._read()
-        data.setdefault("performance", []).append(metrics)
-        self._write(data)
\ No newline at end of file
+        if "recorded_at" not in metrics:
+            metrics = {**metrics, "recorded_at": datetime.now().isoformat()}
+        self._record("append", "performance", metrics)
+
+    def compact_performance(self, keep: int = PERFORMANCE_KEEP_RAW) -> int:
+        """
+        Keep the newest `keep` performance entries and roll older ones into
+        daily/weekly `performance_rollups` buckets of `daily_score`.
+
+        Returns:
+            Number of entries rolled up
+        """
+        with file_lock(self.lock_path):
+            self._sync_journal()
+            data = self._read_unlocked()
+            performance = data.get("performance", [])
+            if len(performance) <= keep:
+                return 0
+            data["performance"], data["performance_rollups"] = roll_up(
+                performance,
+                data.get("performance_rollups", []),
+                keep,
+                value_of=lambda p: p.get("daily_score", 0),
+                date_of=lambda p: p.get("recorded_at", "")
+            )
+            self._write(data)
+            return len(performance) - len(data["performance"])
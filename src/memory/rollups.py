@@ -0,0 +1,113 @@
+"""
+Rollups for append-only histories.
+
+Old entries of a history list are folded into per-period buckets so that the
+list itself only keeps the most recent raw entries. Entries from the last
+DAILY_WINDOW_DAYS days go into daily buckets ("2026-01-15"); older ones into
+ISO-week buckets ("2026-W03"). Daily buckets that age out of the window are
+merged into their week on the next compaction.
+
+A bucket keeps enough to answer count / mean / min / max / best-per-key
+questions and to merge with other buckets exactly:
+
+    {"period", "start", "count", "sum", "mean", "min", "max", "first", "last", "best_by_key"}
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DAILY_WINDOW_DAYS = 28
+UNKNOWN_PERIOD = "unknown"
+
+
+def _parse_day(timestamp: Any) -> Optional[date]:
+    try:
+        return datetime.fromisoformat(str(timestamp)).date()
+    except ValueError:
+        return None
+
+
+def period_for(timestamp: Any, today: date) -> Tuple[str, str]:
+    """Return (period label, period start date) for an entry timestamp."""
+    day = _parse_day(timestamp)
+    if day is None:
+        return UNKNOWN_PERIOD, ""
+    if today - day < timedelta(days=DAILY_WINDOW_DAYS):
+        return day.isoformat(), day.isoformat()
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}", date.fromisocalendar(year, week, 1).isoformat()
+
+
+def new_bucket(period: str, start: str) -> Dict[str, Any]:
+    return {
+        "period": period, "start": start, "count": 0, "sum": 0, "mean": 0,
+        "min": None, "max": None, "first": None, "last": None, "best_by_key": {}
+    }
+
+
+def merge_buckets(target: Dict[str, Any], other: Dict[str, Any]):
+    """Fold `other` (chronologically later) into `target`."""
+    if not other["count"]:
+        return
+    if target["first"] is None:
+        target["first"] = other["first"]
+    target["last"] = other["last"]
+    target["count"] += other["count"]
+    target["sum"] += other["sum"]
+    target["mean"] = round(target["sum"] / target["count"], 2)
+    target["min"] = other["min"] if target["min"] is None else min(target["min"], other["min"])
+    target["max"] = other["max"] if target["max"] is None else max(target["max"], other["max"])
+    for key, best in other["best_by_key"].items():
+        if key not in target["best_by_key"] or best > target["best_by_key"][key]:
+            target["best_by_key"][key] = best
+
+
+def _single(period: str, start: str, value: float, key: Optional[str]) -> Dict[str, Any]:
+    bucket = new_bucket(period, start)
+    bucket.update(count=1, sum=value, mean=value, min=value, max=value, first=value, last=value)
+    if key is not None:
+        bucket["best_by_key"][key] = value
+    return bucket
+
+
+def roll_up(
+    entries: List[Any],
+    buckets: List[Dict[str, Any]],
+    keep: int,
+    value_of: Callable[[Any], float],
+    date_of: Callable[[Any], Any],
+    key_of: Callable[[Any], Optional[str]] = lambda entry: None,
+    today: Optional[date] = None
+) -> Tuple[List[Any], List[Dict[str, Any]]]:
+    """
+    Keep the newest `keep` entries raw and fold the rest into `buckets`.
+
+    Returns:
+        (remaining raw entries, updated buckets sorted by period start)
+    """
+    today = today or date.today()
+    by_period: Dict[str, Dict[str, Any]] = {}
+
+    # Re-bucket existing buckets first so aged daily buckets merge into weeks
+    for bucket in buckets:
+        period, start = period_for(bucket["start"], today) if bucket["start"] else (UNKNOWN_PERIOD, "")
+        merge_buckets(by_period.setdefault(period, new_bucket(period, start)), bucket)
+
+    cut = max(len(entries) - keep, 0)
+    for entry in entries[:cut]:
+        period, start = period_for(date_of(entry), today)
+        merge_buckets(
+            by_period.setdefault(period, new_bucket(period, start)),
+            _single(period, start, value_of(entry), key_of(entry))
+        )
+
+    ordered = sorted(by_period.values(), key=lambda bucket: bucket["start"])
+    return entries[cut:], ordered
+
+
+def summarize(buckets: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge all buckets into one overall bucket."""
+    total = new_bucket("all", "")
+    for bucket in sorted(buckets, key=lambda bucket: bucket["start"]):
+        merge_buckets(total, bucket)
+    return total
@@ -1,4 +1,5 @@
-from .user import User, UserManager
+from .user import User, UserManager, get_user_manager
+from .user_store import ConcurrentUpdateError, UserStore, JsonUserStore, ShardedJsonUserStore, SqliteUserStore, create_user_store
 from .programs import (
     get_all_programs,
     get_program,
@@ -10,6 +11,13 @@ from .programs import (
 __all__ = [
     "User",
     "UserManager",
+    "get_user_manager",
+    "UserStore",
+    "ConcurrentUpdateError",
+    "JsonUserStore",
+    "ShardedJsonUserStore",
+    "SqliteUserStore",
+    "create_user_store",
     "get_all_programs",
     "get_program",
     "get_day_content",
@@ -0,0 +1,94 @@
+"""
+Kullanıcı Kaydı Şema Göçleri
+============================
+Kayıtlar "schema_version" alanı taşır. UserManager açılışta, depo bu sürümün
+gerisindeyse tüm kayıtları toplu halde bir kez yükseltir; sonrasında User
+oluşturmak düz bir alan kopyasıdır.
+
+Yeni bir göç eklemek için MIGRATIONS listesine (sürüm, fonksiyon) ekleyin.
+"""
+
+import re
+from typing import Callable, Dict, List, Tuple
+
+from .progress import build_progress_stats
+
+
+def _to_multi_curriculum(record: Dict, store_curriculum: Callable[[Dict], str]):
+    """Eski tek müfredatı çoklu müfredat listesine taşır (kararlı id ile)."""
+    legacy = record.get("curriculum")
+    legacy_ref = record.get("curriculum_ref")
+    if not (legacy or legacy_ref) or record.get("curriculums"):
+        return
+
+    # Id, her okumada değişmemesi için kullanıcının oluşturulma zamanından türetilir
+    stamp = re.sub(r"\D", "", record.get("created_at", ""))[:14] or "legacy"
+    curriculum_id = f"curr_{stamp}"
+    entry = {
+        "id": curriculum_id,
+        "goal_input": record.get("goal_input"),
+        "user_level": record.get("user_level"),
+        "current_day": record.get("current_day", 1),
+        "completed_days": record.get("completed_days") or [],
+        "day_quiz_completed": {},
+        "created_at": record.get("created_at"),
+        "status": "active"
+    }
+    if legacy_ref:
+        entry["curriculum_ref"] = legacy_ref
+    else:
+        entry["curriculum"] = legacy
+    record["curriculums"] = [entry]
+    record["active_curriculum_id"] = curriculum_id
+
+
+def _fill_list_defaults(record: Dict, store_curriculum: Callable[[Dict], str]):
+    """None olarak saklanmış liste alanlarını boş listeye çevirir."""
+    for name in ("completed_lessons", "quiz_scores", "completed_days", "curriculums"):
+        if record.get(name) is None:
+            record[name] = []
+
+
+def _add_progress_stats(record: Dict, store_curriculum: Callable[[Dict], str]):
+    """get_user_stats özetlerini geçmişten doldurur."""
+    if record.get("progress_stats") is None:
+        record["progress_stats"] = build_progress_stats(
+            record.get("completed_lessons"), record.get("quiz_scores"), record.get("history_rollups")
+        )
+
+
+def _externalize_curricula(record: Dict, store_curriculum: Callable[[Dict], str]):
+    """Satır içi müfredat gövdelerini içerik adresli blob'lara taşır."""
+    for entry in record.get("curriculums") or []:
+        if entry.get("curriculum") is not None:
+            entry["curriculum_ref"] = store_curriculum(entry.pop("curriculum"))
+    if record.get("curriculum") is not None:
+        record["curriculum_ref"] = store_curriculum(record["curriculum"])
+        record["curriculum"] = None
+
+
+MIGRATIONS: List[Tuple[int, Callable[[Dict, Callable[[Dict], str]], None]]] = [
+    (1, _to_multi_curriculum),
+    (2, _fill_list_defaults),
+    (3, _add_progress_stats),
+    (4, _externalize_curricula),
+]
+
+CURRENT_SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate_record(record: Dict, store_curriculum: Callable[[Dict], str]) -> bool:
+    """
+    Kaydı yerinde güncel şemaya yükseltir.
+
+    Returns:
+        Kayıt değiştiyse True
+    """
+    version = record.get("schema_version", 0)
+    if version >= CURRENT_SCHEMA_VERSION:
+        return False
+    for target, migration in MIGRATIONS:
+        if version < target:
+            migration(record, store_curriculum)
+    record["schema_version"] = CURRENT_SCHEMA_VERSION
+    return True
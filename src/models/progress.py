@@ -0,0 +1,123 @@
+"""
+İlerleme özetleri
+=================
+get_user_stats'in geçmiş listeleri taramadan okuyabilmesi için kullanıcı
+başına tutulan artımlı quiz/ders özetleri ve geçmiş sıkıştırma (rollup).
+
+Sıkıştırma, quiz_scores ve completed_lessons listelerinde son N ham kaydı
+bırakır; eski quiz puanları günlük/haftalık özetlere (sayı, ortalama,
+ders bazında en iyi) taşınır, eski dersler yalnızca sayı olarak tutulur.
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+from memory.rollups import roll_up, summarize
+
+
+# get_user_stats için tutulan son quiz puanı penceresi
+RECENT_SCORES_WINDOW = 10
+
+# Sıkıştırmada saklanan ham kayıt sayısı (quiz ve ders için ayrı ayrı)
+HISTORY_KEEP_RAW = int(os.getenv("PROGRESS_HISTORY_KEEP", "100"))
+
+
+def new_progress_stats() -> Dict:
+    """Boş ilerleme özetleri (quiz sayısı/toplamı/min/max, son N puan, ders bazında en iyi)."""
+    return {
+        "lesson_count": 0,
+        "quiz_count": 0,
+        "quiz_sum": 0,
+        "quiz_min": None,
+        "quiz_max": None,
+        "recent_scores": [],
+        "best_by_lesson": {}
+    }
+
+
+def add_quiz_score(stats: Dict, lesson_id: str, score: int):
+    """Bir quiz puanını özetlere O(1) ekler."""
+    stats["quiz_count"] += 1
+    stats["quiz_sum"] += score
+    stats["quiz_min"] = score if stats["quiz_min"] is None else min(stats["quiz_min"], score)
+    stats["quiz_max"] = score if stats["quiz_max"] is None else max(stats["quiz_max"], score)
+    stats["recent_scores"] = (stats["recent_scores"] + [score])[-RECENT_SCORES_WINDOW:]
+    best = stats["best_by_lesson"].get(lesson_id)
+    if best is None or score > best:
+        stats["best_by_lesson"][lesson_id] = score
+
+
+def new_history_rollups() -> Dict:
+    """Boş geçmiş özetleri: quiz puanı kovaları ve arşivlenen ders sayısı."""
+    return {"quiz_scores": [], "completed_lessons": 0}
+
+
+def build_progress_stats(
+    completed_lessons: List[str],
+    quiz_scores: List[Dict],
+    rollups: Optional[Dict] = None
+) -> Dict:
+    """Özetleri geçmişten (varsa sıkıştırılmış kısım dahil) sıfırdan hesaplar."""
+    stats = new_progress_stats()
+    stats["lesson_count"] = len(completed_lessons or [])
+    if rollups:
+        stats["lesson_count"] += rollups.get("completed_lessons", 0)
+        archived = summarize(rollups.get("quiz_scores", []))
+        if archived["count"]:
+            stats.update(
+                quiz_count=archived["count"], quiz_sum=archived["sum"],
+                quiz_min=archived["min"], quiz_max=archived["max"],
+                best_by_lesson=dict(archived["best_by_key"])
+            )
+    for q in quiz_scores or []:
+        add_quiz_score(stats, q.get("lesson_id", ""), q["score"])
+    return stats
+
+
+def roll_up_history(
+    completed_lessons: List[str],
+    quiz_scores: List[Dict],
+    rollups: Optional[Dict],
+    keep: int = HISTORY_KEEP_RAW
+) -> Tuple[List[str], List[Dict], Dict]:
+    """
+    Son `keep` ham kaydı bırakır, eskilerini özetlere taşır.
+
+    Not: ders tekrarı kontrolü ham listeye bakar; arşivlenmiş bir ders
+    yeniden tamamlanırsa tekrar sayılır.
+
+    Returns:
+        (kalan dersler, kalan quiz puanları, güncel özetler)
+    """
+    # get_user_stats'in son puan penceresi ham listeden yeniden kurulabilmeli
+    keep = max(keep, RECENT_SCORES_WINDOW)
+    rollups = dict(rollups or new_history_rollups())
+    completed_lessons = list(completed_lessons or [])
+    archived_lessons = max(len(completed_lessons) - keep, 0)
+    rollups["completed_lessons"] = rollups.get("completed_lessons", 0) + archived_lessons
+
+    recent_scores, rollups["quiz_scores"] = roll_up(
+        list(quiz_scores or []),
+        rollups.get("quiz_scores", []),
+        keep,
+        value_of=lambda q: q["score"],
+        date_of=lambda q: q.get("date", ""),
+        key_of=lambda q: q.get("lesson_id", "")
+    )
+    return completed_lessons[archived_lessons:], recent_scores, rollups
+
+
+def quiz_history(quiz_scores: List[Dict], rollups: Optional[Dict] = None) -> List[Dict]:
+    """
+    Dönem bazında quiz geçmişi: sıkıştırılmış kovalar + ham kayıtlardan
+    günlük/haftalık kovalar, kronolojik sırada.
+    """
+    _, buckets = roll_up(
+        list(quiz_scores or []),
+        (rollups or {}).get("quiz_scores", []),
+        0,
+        value_of=lambda q: q["score"],
+        date_of=lambda q: q.get("date", ""),
+        key_of=lambda q: q.get("lesson_id", "")
+    )
+    return buckets
@@ -2,12 +2,82 @@
 Kullanıcı modeli ve yönetimi
 """
 
-import json
+import os
+import atexit
+import random
+import time
 import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, asdict
+from contextlib import contextmanager
+import copy
+from typing import Callable, Dict, Iterator, List, Optional, Any, Set
+from dataclasses import dataclass, field, fields
+
+from .user_store import ConcurrentUpdateError, UserStore, UserIndex, create_user_store, encode_blob
+from .progress import (
+    HISTORY_KEEP_RAW, new_progress_stats, add_quiz_score, build_progress_stats,
+    roll_up_history, quiz_history
+)
+from .migrations import CURRENT_SCHEMA_VERSION, migrate_record
+
+logger = logging.getLogger(__name__)
+
+# Write-back çakışmasında üç yollu birleştirme kuralları (bkz. UserManager._merge_records);
+# diğer alanlarda bu yöneticinin değiştirdiği değer kazanır
+_MERGE_APPEND_FIELDS = ("quiz_scores", "completed_lessons")
+_MERGE_COUNTER_FIELDS = ("total_study_hours",)
+# Başka bir yazıcıyla çakışan kayıt en fazla bu kadar kez yeniden okunup yazılmaya çalışılır
+_CONFLICT_ATTEMPTS = 3
+# Süreç içinde metni önbellekte tutulan en fazla müfredat blob'u
+_BLOB_CACHE_SIZE = 256
+
+
+class Deferred:
+    """Henüz yüklenmemiş alan değeri: depodaki ham hali ve ilk erişimde çağrılacak yükleyici."""
+    __slots__ = ("raw", "loader")
+    
+    def __init__(self, raw: Any, loader: Callable[[Any], Any]):
+        self.raw = raw
+        self.loader = loader
+
+
+class LazyField:
+    """
+    User'ın ağır alanları için tembel yükleme tanımlayıcısı.
+    
+    Alan değeri Deferred ise ilk erişimde yüklenir ve yerine yazılır;
+    erişilmeyen alanlar hiç çözümlenmez ve kayıtta ham halleriyle geri yazılır.
+    """
+    
+    def __init__(self, default_factory: Optional[Callable[[], Any]] = None):
+        self.default_factory = default_factory
+    
+    def __set_name__(self, owner, name: str):
+        self.name = name
+    
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return None  # dataclass varsayılanı
+        value = obj.__dict__.get(self.name)
+        if isinstance(value, Deferred):
+            value = value.loader(value.raw)
+        if value is None and self.default_factory is not None:
+            value = self.default_factory()
+        obj.__dict__[self.name] = value
+        return value
+    
+    def __set__(self, obj, value):
+        obj.__dict__[self.name] = value
+
+
+def is_loaded(user: "User", field_name: str) -> bool:
+    """Tembel alan yüklendi mi (yüklemeyi tetiklemeden)?"""
+    return not isinstance(user.__dict__.get(field_name), Deferred)
 
 
 @dataclass
@@ -22,65 +92,446 @@ class User:
     current_week: int = 1
     current_day: int = 1
     total_study_hours: float = 0.0
-    completed_lessons: List[str] = None
-    quiz_scores: List[Dict] = None
+    completed_lessons: List[str] = LazyField(list)
+    quiz_scores: List[Dict] = LazyField(list)
     daily_time_preference: float = 1.0
     learning_style: str = "karma"
     # Müfredat ve seviye bilgileri (DEPRECATED - geriye dönük uyumluluk için)
-    curriculum: Optional[Dict] = None
+    curriculum: Optional[Dict] = LazyField()
     user_level: Optional[Dict] = None
     goal_input: Optional[Dict] = None
-    completed_days: List[int] = None
+    completed_days: List[int] = field(default_factory=list)
     # Çoklu müfredat sistemi
-    curriculums: List[Dict] = None  # Tüm müfredatlar
+    curriculums: List[Dict] = LazyField(list)  # Tüm müfredatlar
     active_curriculum_id: Optional[str] = None  # Aktif müfredat
-    
-    def __post_init__(self):
-        if self.completed_lessons is None:
-            self.completed_lessons = []
-        if self.quiz_scores is None:
-            self.quiz_scores = []
-        if self.completed_days is None:
-            self.completed_days = []
-        if self.curriculums is None:
-            self.curriculums = []
-        
-        # Eski tek müfredat varsa çoklu sisteme taşı
-        if self.curriculum and not self.curriculums:
-            curriculum_id = f"curr_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-            self.curriculums = [{
-                "id": curriculum_id,
-                "curriculum": self.curriculum,
-                "goal_input": self.goal_input,
-                "user_level": self.user_level,
-                "current_day": self.current_day,
-                "completed_days": self.completed_days or [],
-                "day_quiz_completed": {},
-                "created_at": datetime.now().isoformat(),
-                "status": "active"
-            }]
-            self.active_curriculum_id = curriculum_id
+    # Quiz/ders özetleri (get_user_stats geçmişi taramadan okur)
+    progress_stats: Optional[Dict] = None
+    # Sıkıştırılmış eski quiz/ders geçmişi (bkz. progress.compact_history)
+    history_rollups: Optional[Dict] = None
+    # İyimser eşzamanlılık kontrolü için kayıt sürümü (depo tarafından artırılır)
+    version: int = 0
+    # Kaydın şema sürümü (bkz. migrations.py); göçler açılışta bir kez uygulanır
+    schema_version: int = 0
 
 
 class UserManager:
     """Kullanıcı yönetimi sınıfı."""
     
-    def __init__(self, data_path: str = "data/users.json"):
+    def __init__(
+        self,
+        data_path: str = "data/users.json",
+        backend: Optional[str] = None,
+        write_back: Optional[bool] = None,
+        flush_interval: float = 5.0,
+        cache_size: int = 1000,
+        history_keep: Optional[int] = None
+    ):
+        """
+        Args:
+            data_path: users.json yolu (SQLite için aynı klasörde users.db)
+            backend: "json", "sharded" veya "sqlite"; verilmezse USER_STORE_BACKEND ortam değişkeni
+            write_back: True ise değişiklikler bellekte tutulur ve toplu yazılır
+                (verilmezse USER_WRITE_BACK ortam değişkeni). Tek süreçli kurulumlar içindir.
+            flush_interval: write-back modunda kirli kullanıcıların en geç kaç saniyede yazılacağı
+            cache_size: önbellekte tutulacak en fazla kullanıcı (kirli olanlar atılmaz)
+            history_keep: sıkıştırmada saklanan ham quiz/ders kaydı sayısı
+                (verilmezse PROGRESS_HISTORY_KEEP ortam değişkeni). Liste bunun iki
+                katını aşınca record_progress geçmişi kendiliğinden sıkıştırır.
+        """
         self.data_path = Path(data_path)
-        self.data_path.parent.mkdir(parents=True, exist_ok=True)
+        self.store: UserStore = create_user_store(
+            backend or os.getenv("USER_STORE_BACKEND", "json"),
+            self.data_path
+        )
+        self.index = UserIndex(self.store)
+        
+        # Müfredat blob'ları değişmez; metinleri süreç içinde önbelleğe alınır.
+        # Bulunamayanlar önbelleğe alınmaz: blob başka bir süreçte sonradan yazılabilir
+        self._blob_cache: "OrderedDict[str, str]" = OrderedDict()
+        self._blob_lock = threading.Lock()
+        self._known_blobs: Set[str] = set()
+        
+        # Write-back önbelleği
+        if write_back is None:
+            write_back = os.getenv("USER_WRITE_BACK", "").lower() in ("1", "true", "yes")
+        self.write_back = write_back
+        self.flush_interval = flush_interval
+        self.cache_size = cache_size
+        self.history_keep = HISTORY_KEEP_RAW if history_keep is None else history_keep
+        self._cache: "OrderedDict[str, User]" = OrderedDict()
+        self._dirty: Set[str] = set()
+        # Önbellekteki her kullanıcının depodan okunan/depoya yazılan son kaydı (çakışma birleştirmesi için)
+        self._base: Dict[str, Dict] = {}
+        self.flush_conflicts = {"merged": 0, "retry_later": 0}
+        self._cache_lock = threading.RLock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._tx_local = threading.local()
+        if self.write_back:
+            atexit.register(self.flush)
+        
+        self.migrate()
+    
+    def _store_curriculum(self, curriculum: Dict) -> str:
+        """Müfredatı içerik adresli olarak bir kez saklar, referansını döndürür."""
+        key, text = encode_blob(curriculum)
+        if key not in self._known_blobs:
+            self.store.put_blob(key, text)
+            self._known_blobs.add(key)
+        return key
+    
+    def _blob_text(self, key: str) -> Optional[str]:
+        with self._blob_lock:
+            if key in self._blob_cache:
+                self._blob_cache.move_to_end(key)
+                return self._blob_cache[key]
+        text = self.store.get_blob(key)
+        if text is not None:
+            with self._blob_lock:
+                self._blob_cache[key] = text
+                if len(self._blob_cache) > _BLOB_CACHE_SIZE:
+                    self._blob_cache.popitem(last=False)
+        return text
+    
+    def _resolve_curriculum(self, key: str) -> Optional[Dict]:
+        text = self._blob_text(key)
+        return json.loads(text) if text is not None else None
+    
+    def _resolve_curriculum_entries(self, entries: List[Dict]) -> List[Dict]:
+        resolved = []
+        for entry in entries:
+            entry = dict(entry)
+            if "curriculum_ref" in entry:
+                entry["curriculum"] = self._resolve_curriculum(entry.pop("curriculum_ref"))
+            resolved.append(entry)
+        return resolved
+    
+    def _to_record(self, user: User) -> Dict:
+        """
+        User → depo kaydı; müfredat gövdeleri yerine blob referansları yazılır.
+        Hiç yüklenmemiş tembel alanlar ham halleriyle, yeniden kodlanmadan yazılır.
+        """
+        record = {}
+        for f in fields(user):
+            value = user.__dict__.get(f.name)
+            if isinstance(value, Deferred):
+                record[f.name] = value.raw
+            else:
+                record[f.name] = copy.deepcopy(getattr(user, f.name))
+        
+        record["curriculums"] = [dict(entry) for entry in record["curriculums"] or []]
+        for entry in record["curriculums"]:
+            if entry.get("curriculum") is not None:
+                entry["curriculum_ref"] = self._store_curriculum(entry.pop("curriculum"))
+        
+        curriculum = record["curriculum"]
+        if isinstance(curriculum, str):
+            record["curriculum_ref"] = curriculum
+        elif curriculum is not None:
+            record["curriculum_ref"] = self._store_curriculum(curriculum)
+        record["curriculum"] = None
+        return record
+    
+    def migrate(self, batch_size: int = 500) -> int:
+        """
+        Depo güncel şemanın gerisindeyse tüm kayıtları toplu halde bir kez yükseltir.
         
-        if not self.data_path.exists():
-            self._save_data({"users": {}})
+        Returns:
+            Yükseltilen kayıt sayısı
+        """
+        if self.store.get_meta("schema_version", 0) >= CURRENT_SCHEMA_VERSION:
+            return 0
+        
+        migrated = self._rewrite_all(lambda record: migrate_record(record, self._store_curriculum), batch_size)
+        
+        self.store.set_meta("schema_version", CURRENT_SCHEMA_VERSION)
+        self.index.invalidate()
+        if migrated:
+            print(f"📦 {migrated} kullanıcı kaydı şema sürümü {CURRENT_SCHEMA_VERSION}'e yükseltildi")
+        return migrated
     
-    def _load_data(self) -> Dict:
-        """Kullanıcı verilerini yükler."""
-        with open(self.data_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+    def _from_record(self, record: Dict) -> User:
+        """Depo kaydı → User; ağır alanlar ilk erişime kadar çözümlenmez."""
+        record = dict(record)
+        if record.get("schema_version", 0) < CURRENT_SCHEMA_VERSION:
+            # Göç sonrası başka bir süreçten gelen eski kayıt: bellekte yükselt
+            migrate_record(record, self._store_curriculum)
+        ref = record.pop("curriculum_ref", None)
+        if ref:
+            record["curriculum"] = Deferred(ref, self._resolve_curriculum)
+        if record.get("curriculums"):
+            record["curriculums"] = Deferred(record["curriculums"], self._resolve_curriculum_entries)
+        for name in ("quiz_scores", "completed_lessons"):
+            if record.get(name):
+                record[name] = Deferred(record[name], list)
+        return User(**record)
     
-    def _save_data(self, data: Dict):
-        """Kullanıcı verilerini kaydeder."""
-        with open(self.data_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+    def _write(self, record: Dict, expected_version: Optional[int] = None) -> int:
+        """Kaydı depoya yazar, indeksleri günceller ve yeni sürümü döndürür."""
+        before = self.index.current_version()
+        version = self.store.put(record["user_id"], record, expected_version)
+        self.index.records_written([record], before)
+        return version
+    
+    def _load(self, user_id: str) -> Optional[User]:
+        """Kullanıcıyı açık transaction'dan, önbellekten veya depodan getirir."""
+        open_tx = self._open_transactions()
+        if user_id in open_tx:
+            return open_tx[user_id]
+        
+        if self.write_back:
+            with self._cache_lock:
+                if user_id in self._cache:
+                    self._cache.move_to_end(user_id)
+                    return self._cache[user_id]
+        
+        user_data = self.store.get(user_id)
+        if not user_data:
+            return None
+        
+        user = self._from_record(user_data)
+        if self.write_back:
+            with self._cache_lock:
+                if user_id not in self._cache:
+                    self._cache[user_id] = user
+                    self._base[user_id] = copy.deepcopy(user_data)
+                    self._evict()
+                user = self._cache[user_id]
+        return user
+    
+    def _evict(self):
+        """En eski temiz kayıtları önbellekten çıkarır."""
+        if len(self._cache) <= self.cache_size:
+            return
+        for user_id in list(self._cache):
+            if len(self._cache) <= self.cache_size:
+                break
+            if user_id not in self._dirty:
+                del self._cache[user_id]
+                self._base.pop(user_id, None)
+    
+    def _drop_clean(self):
+        """Kirli olmayan kullanıcıları önbellekten atar (depo toplu değiştiğinde)."""
+        with self._cache_lock:
+            for user_id in [u for u in self._cache if u not in self._dirty]:
+                del self._cache[user_id]
+                self._base.pop(user_id, None)
+    
+    def import_records(self, records: Dict[str, Dict]) -> int:
+        """
+        Dışarıdan gelen depo kayıtlarını (ör. JSONL yedeği) tek yazmada depoya
+        aktarır. Eski şemadaki kayıtlar önce yükseltilir; aynı id'li mevcut
+        kullanıcıların üzerine yazılır.
+        
+        Returns:
+            Yazılan kayıt sayısı
+        """
+        for record in records.values():
+            record.pop("version", None)
+            migrate_record(record, self._store_curriculum)
+        before = self.index.current_version()
+        self.store.put_many(records)
+        self.index.records_written(records.values(), before)
+        if self.write_back:
+            with self._cache_lock:
+                for user_id in records:
+                    self._cache.pop(user_id, None)
+                    self._base.pop(user_id, None)
+                    self._dirty.discard(user_id)
+        return len(records)
+    
+    def _find_by_email(self, email: str) -> Optional[User]:
+        """Email indeksinden kullanıcıyı bulur; indeks eskiyse bir kez yeniden kurar."""
+        for _ in range(2):
+            user_id = self.index.user_id_for_email(email)
+            if user_id is None:
+                return None
+            user = self._load(user_id)
+            if user and user.email == email:
+                return user
+            self.index.invalidate()
+        return None
+    
+    def _schedule_flush(self):
+        """Kirli kayıtlar için gecikmeli yazmayı planlar."""
+        if self._flush_timer is None or not self._flush_timer.is_alive():
+            self._flush_timer = threading.Timer(self.flush_interval, self._background_flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
+    def _background_flush(self):
+        # Zamanlayıcı thread'inde hata yükselmez; kullanıcılar kirli kalır ve yeniden planlanır
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Write-back flush başarısız; kirli kullanıcılar yeniden denenecek")
+    
+    def flush(self):
+        """Write-back önbelleğindeki kirli kullanıcıları tek seferde depoya yazar."""
+        with self._cache_lock:
+            if not self._dirty:
+                return
+            records = {user_id: self._to_record(self._cache[user_id]) for user_id in self._dirty}
+            self._dirty.clear()
+        
+        # Yazılamayan kullanıcılar (ör. G/Ç hatası, kilitli veritabanı) kirli kalır;
+        # bir sonraki flush onları yeniden dener
+        expected = {user_id: record["version"] for user_id, record in records.items()}
+        before = self.index.current_version()
+        new_versions: Dict[str, int] = {}
+        resolved: Set[str] = set()
+        try:
+            try:
+                new_versions = self.store.put_many(records, expected)
+            except ConcurrentUpdateError:
+                # Başka bir yazıcıyla çakışma: çakışmayanları tek tek yaz, çakışanları birleştir.
+                # Araya giren yazma indekse işlenmediğinden indeks sürümü ilerletilmez
+                before = None
+                for user_id, record in records.items():
+                    try:
+                        new_versions[user_id] = self.store.put(user_id, record, expected[user_id])
+                    except ConcurrentUpdateError:
+                        self._resolve_conflict(user_id, record)
+                        resolved.add(user_id)
+        finally:
+            with self._cache_lock:
+                unwritten = [
+                    user_id for user_id in records
+                    if user_id not in new_versions and user_id not in resolved and user_id in self._cache
+                ]
+                self._dirty.update(unwritten)
+                for user_id, version in new_versions.items():
+                    records[user_id]["version"] = version
+                    if user_id in self._cache:
+                        self._cache[user_id].version = version
+                        self._base[user_id] = records[user_id]
+            self.index.records_written([records[user_id] for user_id in new_versions], before)
+            if unwritten:
+                self._schedule_flush()
+    
+    @staticmethod
+    def _merge_records(base: Optional[Dict], mine: Dict, theirs: Dict) -> Dict:
+        """
+        Üç yollu birleştirme: theirs'e bu yöneticinin base'den bu yana yaptığı
+        değişiklikleri uygular. Yalnızca sona eklenen geçmiş listeleri ve
+        sayaçlar iki taraftan birleştirilir; diğer alanlarda mine kazanır.
+        """
+        base = base or {}
+        merged = dict(theirs)
+        for key, value in mine.items():
+            old = base.get(key)
+            if key == "version" or value == old:
+                continue
+            other = theirs.get(key)
+            if other == old:
+                merged[key] = value
+            elif (key in _MERGE_APPEND_FIELDS and isinstance(old, list) and isinstance(value, list)
+                  and isinstance(other, list) and value[:len(old)] == old and other[:len(old)] == old):
+                merged[key] = other + [item for item in value[len(old):] if item not in other]
+            elif key in _MERGE_COUNTER_FIELDS and isinstance(old, (int, float)) and isinstance(other, (int, float)):
+                merged[key] = other + (value - old)
+            else:
+                merged[key] = value
+        if mine.get("progress_stats") != base.get("progress_stats") and theirs.get("progress_stats") != base.get("progress_stats"):
+            # İki taraf da özet güncellediyse birleşmiş geçmişten yeniden hesaplanır
+            merged["progress_stats"] = build_progress_stats(
+                merged.get("completed_lessons") or [], merged.get("quiz_scores") or [], merged.get("history_rollups")
+            )
+        return merged
+    
+    def _resolve_conflict(self, user_id: str, record: Dict):
+        """
+        Başka bir yazıcının değiştirdiği kullanıcının tamponlanmış değişikliklerini
+        güncel kayıtla birleştirip yazar. Yazılamazsa kullanıcı kirli kalır ve bir
+        sonraki flush'ta yeniden denenir; değişiklik hiçbir durumda sessizce atılmaz.
+        """
+        with self._cache_lock:
+            # Flush sırasında yeniden kirlendiyse en güncel hali birleştirilir
+            if user_id in self._dirty and user_id in self._cache:
+                record = self._to_record(self._cache[user_id])
+                self._dirty.discard(user_id)
+            base = self._base.get(user_id)
+            
+            for _ in range(_CONFLICT_ATTEMPTS):
+                theirs = self.store.get(user_id)
+                merged = self._merge_records(base, record, theirs) if theirs else dict(record)
+                before = self.index.current_version()
+                try:
+                    merged["version"] = self.store.put(user_id, merged, theirs.get("version", 0) if theirs else None)
+                except ConcurrentUpdateError:
+                    continue
+                self.flush_conflicts["merged"] += 1
+                logger.warning("Write-back çakışması: %s başka bir yazıcının değişiklikleriyle birleştirildi", user_id)
+                self._cache[user_id] = self._from_record(merged)
+                self._base[user_id] = copy.deepcopy(merged)
+                self.index.records_written([merged], before)
+                return
+            
+            self.flush_conflicts["retry_later"] += 1
+            self._dirty.add(user_id)
+            logger.error("Write-back çakışması: %s yazılamadı, bir sonraki flush'ta yeniden denenecek", user_id)
+        self._schedule_flush()
+    
+    def _open_transactions(self) -> Dict[str, User]:
+        """Bu thread'de açık olan transaction'lar (user_id → User)."""
+        if not hasattr(self._tx_local, "users"):
+            self._tx_local.users = {}
+        return self._tx_local.users
+    
+    @contextmanager
+    def transaction(self, user_id: str) -> Iterator[Optional[User]]:
+        """
+        Kullanıcıyı bir kez yükler, blok içindeki tüm değişiklikleri çıkışta tek
+        yazmayla kaydeder. Kullanıcı yoksa None verir.
+        
+        Blok içinde çağrılan record_progress, update_progress gibi metotlar aynı
+        User nesnesini kullanır ve ayrıca yazmaz. Kayıt okunduktan sonra başka bir
+        yazıcı tarafından değiştirildiyse ConcurrentUpdateError fırlatılır.
+        Blokta hata olursa hiçbir şey kaydedilmez: write-back modunda blok
+        önbellekteki nesnenin bir kopyasıyla çalışır, kopya yalnızca hatasız
+        çıkışta önbelleğe konur.
+        
+        Örnek:
+            with um.transaction(user_id):
+                um.record_progress(user_id, "day_3", 1.0)
+                um.update_progress(user_id, 4, [1, 2, 3])
+        """
+        open_tx = self._open_transactions()
+        if user_id in open_tx:
+            yield open_tx[user_id]
+            return
+        
+        original = self._load(user_id)
+        if original is None:
+            yield None
+            return
+        
+        user = self._copy_user(original) if self.write_back else original
+        open_tx[user_id] = user
+        try:
+            yield user
+        finally:
+            del open_tx[user_id]
+        
+        if self.write_back:
+            with self._cache_lock:
+                current = self._cache.get(user_id)
+                if current is not None and current is not original:
+                    raise ConcurrentUpdateError(f"{user_id} transaction sırasında başka bir yazmayla değişti")
+                self.update_user(user)
+        else:
+            user.version = self._write(self._to_record(user), expected_version=user.version)
+    
+    @staticmethod
+    def _copy_user(user: User) -> User:
+        """Kullanıcının bağımsız kopyası; yüklenmemiş alanlar yüklenmeden kopyalanır."""
+        values = {}
+        for f in fields(user):
+            value = user.__dict__.get(f.name)
+            if isinstance(value, Deferred):
+                values[f.name] = Deferred(copy.deepcopy(value.raw), value.loader)
+            else:
+                values[f.name] = copy.deepcopy(value)
+        return User(**values)
     
     def _hash_password(self, password: str) -> str:
         """Şifreyi hashler."""
@@ -93,59 +544,74 @@ class UserManager:
         Returns:
             (başarılı_mı, mesaj)
         """
-        data = self._load_data()
-        
-        # Email kontrolü
-        for user_data in data["users"].values():
-            if user_data["email"] == email:
-                return False, "Bu email zaten kayıtlı!"
-            if user_data["username"] == username:
-                return False, "Bu kullanıcı adı zaten alınmış!"
-        
-        # Yeni kullanıcı oluştur
-        user_id = f"user_{len(data['users']) + 1}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        # Email ve kullanıcı adı kontrolü (O(1) indeks araması)
+        if self.index.user_id_for_email(email) is not None:
+            return False, "Bu email zaten kayıtlı!"
+        if self.index.user_id_for_username(username) is not None:
+            return False, "Bu kullanıcı adı zaten alınmış!"
         
         user = User(
-            user_id=user_id,
+            user_id="",
             username=username,
             email=email,
             password_hash=self._hash_password(password),
-            created_at=datetime.now().isoformat()
+            created_at=datetime.now().isoformat(),
+            progress_stats=new_progress_stats(),
+            schema_version=CURRENT_SCHEMA_VERSION
         )
         
-        data["users"][user_id] = asdict(user)
-        self._save_data(data)
+        # Yeni hesaplar write-back modunda da hemen kalıcı yazılır. Aynı anda kayıt
+        # olan başka bir süreç aynı id'yi almışsa (beklenen sürüm 0) sıradaki id denenir.
+        count = self.store.count()
+        for attempt in range(10):
+            user.user_id = f"user_{count + 1 + attempt}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+            try:
+                self._write(self._to_record(user), expected_version=0)
+                break
+            except ConcurrentUpdateError:
+                continue
+        else:
+            return False, "Kayıt sırasında çakışma oldu, lütfen tekrar deneyin."
         
-        return True, user_id
+        return True, user.user_id
     
     def login(self, email: str, password: str) -> tuple[bool, Optional[User]]:
         """
         Kullanıcı girişi.
         
+        Email indeksten user_id'ye çözülür ve yalnızca o kayıt okunur. json
+        deposunda dosya başka bir yazıcıyla değiştiyse bu okuma tüm dosyayı
+        yeniden ayrıştırır (bkz. JsonUserStore).
+        
         Returns:
             (başarılı_mı, kullanıcı)
         """
-        data = self._load_data()
-        password_hash = self._hash_password(password)
-        
-        for user_id, user_data in data["users"].items():
-            if user_data["email"] == email and user_data["password_hash"] == password_hash:
-                return True, User(**user_data)
+        user = self._find_by_email(email)
+        if user and user.password_hash == self._hash_password(password):
+            return True, user
         
         return False, None
     
     def get_user(self, user_id: str) -> Optional[User]:
         """Kullanıcı bilgilerini getirir."""
-        data = self._load_data()
-        if user_id in data["users"]:
-            return User(**data["users"][user_id])
-        return None
+        return self._load(user_id)
     
     def update_user(self, user: User):
         """Kullanıcı bilgilerini günceller."""
-        data = self._load_data()
-        data["users"][user.user_id] = asdict(user)
-        self._save_data(data)
+        # Açık transaction içindeyse yazma transaction çıkışında yapılır
+        if self._open_transactions().get(user.user_id) is user:
+            return
+        
+        if not self.write_back:
+            user.version = self._write(self._to_record(user))
+            return
+        
+        with self._cache_lock:
+            self._cache[user.user_id] = user
+            self._cache.move_to_end(user.user_id)
+            self._dirty.add(user.user_id)
+            self._evict()
+        self._schedule_flush()
     
     def select_program(self, user_id: str, program_id: str):
         """Kullanıcıya program atar."""
@@ -156,12 +622,36 @@ class UserManager:
             user.current_day = 1
             self.update_user(user)
     
+    def update_with_retry(self, user_id: str, apply: Callable[[User], None], attempts: int = 20):
+        """
+        apply(user)'ı bir transaction içinde çalıştırır. Kayıt bu arada başka bir
+        süreç tarafından değiştirildiyse kısa, rastgele bir beklemeden sonra güncel
+        kayıtla yeniden dener; böylece sayaç gibi birikimli alanlarda güncelleme kaybolmaz.
+        apply her denemede baştan çalıştığından yan etkisiz olmalıdır; içinde
+        çağrılan record_progress gibi metotlar aynı transaction'a katılır.
+        Denemeler tükenirse ConcurrentUpdateError fırlatılır.
+
+        Örnek:
+            um.update_with_retry(user_id, lambda user: um.record_progress(user_id, "day_3", 1.0))
+        """
+        for attempt in range(attempts):
+            try:
+                with self.transaction(user_id) as user:
+                    if user:
+                        apply(user)
+                return
+            except ConcurrentUpdateError:
+                if attempt == attempts - 1:
+                    raise
+                time.sleep(random.uniform(0, 0.005 * (attempt + 1)))
+    
     def record_progress(self, user_id: str, lesson_id: str, study_hours: float, quiz_score: Optional[int] = None):
         """İlerleme kaydeder."""
-        user = self.get_user(user_id)
-        if user:
+        def apply(user: User):
+            stats = self._ensure_progress_stats(user)
             if lesson_id not in user.completed_lessons:
                 user.completed_lessons.append(lesson_id)
+                stats["lesson_count"] += 1
             user.total_study_hours += study_hours
             
             if quiz_score is not None:
@@ -170,87 +660,216 @@ class UserManager:
                     "score": quiz_score,
                     "date": datetime.now().isoformat()
                 })
+                add_quiz_score(stats, lesson_id, quiz_score)
             
-            self.update_user(user)
+            # Amortize sıkıştırma: ham listeler 2*keep'i aşınca keep'e indirilir
+            limit = 2 * self.history_keep
+            if len(user.quiz_scores) > limit or len(user.completed_lessons) > limit:
+                self._compact_user(user)
+        
+        self.update_with_retry(user_id, apply)
     
     def advance_day(self, user_id: str):
         """Sonraki güne geçer."""
-        user = self.get_user(user_id)
-        if user:
+        def apply(user: User):
             user.current_day += 1
             if user.current_day > 7:
                 user.current_day = 1
                 user.current_week += 1
-            self.update_user(user)
+        
+        self.update_with_retry(user_id, apply)
+    
+    def _ensure_progress_stats(self, user: User) -> Dict:
+        """Özetleri olmayan eski kullanıcı için geçmişten bir kez hesaplar."""
+        if user.progress_stats is None:
+            user.progress_stats = build_progress_stats(
+                user.completed_lessons, user.quiz_scores, user.history_rollups
+            )
+        return user.progress_stats
+    
+    def _compact_user(self, user: User):
+        self._ensure_progress_stats(user)
+        user.completed_lessons, user.quiz_scores, user.history_rollups = roll_up_history(
+            user.completed_lessons, user.quiz_scores, user.history_rollups, self.history_keep
+        )
+    
+    def compact_history(self, batch_size: int = 500) -> int:
+        """
+        Tüm kullanıcıların quiz/ders geçmişini sıkıştırır: son history_keep ham
+        kayıt kalır, eskileri günlük/haftalık özetlere taşınır.
+        
+        Returns:
+            Sıkıştırılan kullanıcı sayısı
+        """
+        self.flush()
+        compacted = self._rewrite_all(self._compact_record, batch_size)
+        
+        # Aradaki kirli kullanıcılar atılmaz: sürüm değiştiği için flush'ta birleştirilirler
+        self._drop_clean()
+        return compacted
+    
+    def _compact_record(self, record: Dict) -> bool:
+        """Kaydın geçmişini yerinde sıkıştırır; gerek yoksa False."""
+        lessons, scores = record.get("completed_lessons") or [], record.get("quiz_scores") or []
+        if len(lessons) <= self.history_keep and len(scores) <= self.history_keep:
+            return False
+        if record.get("progress_stats") is None:
+            record["progress_stats"] = build_progress_stats(lessons, scores, record.get("history_rollups"))
+        record["completed_lessons"], record["quiz_scores"], record["history_rollups"] = roll_up_history(
+            lessons, scores, record.get("history_rollups"), self.history_keep
+        )
+        return True
+    
+    def _rewrite_all(self, rewrite: Callable[[Dict], bool], batch_size: int) -> int:
+        """
+        Toplu bakım yazması: rewrite kaydı yerinde değiştirir (değişmediyse False).
+        Kayıtlar okundukları sürüme göre toplu yazılır; araya başka bir yazıcı
+        girdiyse kayıt yeniden okunup rewrite tekrar uygulanır.
+        
+        Returns:
+            Yazılan kayıt sayısı
+        """
+        written = 0
+        batch: Dict[str, Dict] = {}
+        for record in self.store.iter_records():
+            if not rewrite(record):
+                continue
+            batch[record["user_id"]] = record
+            if len(batch) >= batch_size:
+                written += self._put_rewritten(batch, rewrite)
+                batch = {}
+        if batch:
+            written += self._put_rewritten(batch, rewrite)
+        return written
+    
+    def _put_rewritten(self, batch: Dict[str, Dict], rewrite: Callable[[Dict], bool]) -> int:
+        expected = {user_id: record.get("version", 0) for user_id, record in batch.items()}
+        try:
+            self.store.put_many(batch, expected)
+            return len(batch)
+        except ConcurrentUpdateError:
+            pass
+        
+        written = 0
+        for user_id, record in batch.items():
+            for _ in range(_CONFLICT_ATTEMPTS):
+                try:
+                    self.store.put(user_id, record, record.get("version", 0))
+                    written += 1
+                    break
+                except ConcurrentUpdateError:
+                    record = self.store.get(user_id)
+                    if record is None or not rewrite(record):
+                        break
+            else:
+                print(f"⚠️ {user_id} sürekli değiştiği için bu çalıştırmada yazılamadı")
+        return written
+    
+    def get_quiz_history(self, user_id: str) -> List[Dict]:
+        """Dönem bazında quiz geçmişi (sıkıştırılmış özetler + son ham kayıtlar)."""
+        user = self.get_user(user_id)
+        if not user:
+            return []
+        return quiz_history(user.quiz_scores, user.history_rollups)
+    
+    def backfill_progress_stats(self, batch_size: int = 500) -> int:
+        """
+        Özetleri olmayan tüm kullanıcılar için geçmişten hesaplayıp kaydeder.
+        
+        Returns:
+            Güncellenen kullanıcı sayısı
+        """
+        self.flush()
+        updated = self._rewrite_all(self._backfill_record, batch_size)
+        self._drop_clean()
+        return updated
+    
+    @staticmethod
+    def _backfill_record(record: Dict) -> bool:
+        if record.get("progress_stats") is not None:
+            return False
+        record["progress_stats"] = build_progress_stats(
+            record.get("completed_lessons"), record.get("quiz_scores"), record.get("history_rollups")
+        )
+        return True
     
     def get_user_stats(self, user_id: str) -> Dict:
-        """Kullanıcı istatistiklerini döndürür."""
+        """Kullanıcı istatistiklerini döndürür (geçmiş listeleri taranmaz)."""
         user = self.get_user(user_id)
         if not user:
             return {}
         
-        avg_quiz = 0
-        if user.quiz_scores:
-            avg_quiz = sum(q["score"] for q in user.quiz_scores) / len(user.quiz_scores)
+        stats = user.progress_stats
+        if stats is None:
+            # Eski kayıt: özetleri bir kez oluştur ve kaydet
+            with self.transaction(user_id) as user:
+                stats = self._ensure_progress_stats(user)
+        
+        quiz_count = stats["quiz_count"]
+        avg_quiz = stats["quiz_sum"] / quiz_count if quiz_count else 0
+        recent = stats["recent_scores"]
         
         return {
-            "total_lessons": len(user.completed_lessons),
+            "total_lessons": stats["lesson_count"],
             "total_hours": round(user.total_study_hours, 1),
             "average_quiz_score": round(avg_quiz, 1),
             "current_week": user.current_week,
             "current_day": user.current_day,
-            "quiz_count": len(user.quiz_scores)
+            "quiz_count": quiz_count,
+            "min_quiz_score": stats["quiz_min"],
+            "max_quiz_score": stats["quiz_max"],
+            "recent_average_quiz_score": round(sum(recent) / len(recent), 1) if recent else 0,
+            "best_scores_by_lesson": dict(stats["best_by_lesson"])
         }
     
     def save_curriculum(self, user_id: str, curriculum: Dict, goal_input: Dict, user_level: Dict, current_day: int = 1, completed_days: List[int] = None, curriculum_id: str = None):
         """Kullanıcının müfredatını ve ilerlemesini kaydeder - çoklu müfredat destekli."""
-        user = self.get_user(user_id)
-        if user:
-            # Yeni müfredat ID'si oluştur
-            if not curriculum_id:
-                curriculum_id = f"curr_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-            
-            # Yeni müfredat objesi
-            new_curriculum = {
-                "id": curriculum_id,
-                "curriculum": curriculum,
-                "goal_input": goal_input,
-                "user_level": user_level,
-                "current_day": current_day,
-                "completed_days": completed_days or [],
-                "day_quiz_completed": {},
-                "created_at": datetime.now().isoformat(),
-                "status": "active"
-            }
+        with self.transaction(user_id) as user:
+            if user:
+                # Yeni müfredat ID'si oluştur
+                if not curriculum_id:
+                    curriculum_id = f"curr_{datetime.now().strftime('%Y%m%d%H%M%S')}"
             
-            # Mevcut müfredatları kontrol et
-            if not user.curriculums:
-                user.curriculums = []
+                # Yeni müfredat objesi
+                new_curriculum = {
+                    "id": curriculum_id,
+                    "curriculum": curriculum,
+                    "goal_input": goal_input,
+                    "user_level": user_level,
+                    "current_day": current_day,
+                    "completed_days": completed_days or [],
+                    "day_quiz_completed": {},
+                    "created_at": datetime.now().isoformat(),
+                    "status": "active"
+                }
             
-            # Aynı ID varsa güncelle, yoksa ekle
-            found = False
-            for i, curr in enumerate(user.curriculums):
-                if curr.get("id") == curriculum_id:
-                    user.curriculums[i] = new_curriculum
-                    found = True
-                    break
+                # Mevcut müfredatları kontrol et
+                if not user.curriculums:
+                    user.curriculums = []
             
-            if not found:
-                user.curriculums.append(new_curriculum)
+                # Aynı ID varsa güncelle, yoksa ekle
+                found = False
+                for i, curr in enumerate(user.curriculums):
+                    if curr.get("id") == curriculum_id:
+                        user.curriculums[i] = new_curriculum
+                        found = True
+                        break
             
-            # Aktif müfredat olarak ayarla
-            user.active_curriculum_id = curriculum_id
+                if not found:
+                    user.curriculums.append(new_curriculum)
             
-            # Geriye dönük uyumluluk için eski alanları da güncelle
-            user.curriculum = curriculum
-            user.goal_input = goal_input
-            user.user_level = user_level
-            user.current_day = current_day
-            user.completed_days = completed_days or []
-            user.selected_program = goal_input.get("goal", "")[:50]
+                # Aktif müfredat olarak ayarla
+                user.active_curriculum_id = curriculum_id
             
-            self.update_user(user)
-            return curriculum_id
+                # Geriye dönük uyumluluk için eski alanları da güncelle
+                user.curriculum = curriculum
+                user.goal_input = goal_input
+                user.user_level = user_level
+                user.current_day = current_day
+                user.completed_days = completed_days or []
+                user.selected_program = goal_input.get("goal", "")[:50]
+                
+                return curriculum_id
     
     def load_curriculum(self, user_id: str, curriculum_id: str = None) -> Optional[Dict]:
         """Kullanıcının müfredatını yükler - çoklu müfredat destekli."""
@@ -260,16 +879,13 @@ class UserManager:
         
         # Belirli bir müfredat istendi mi?
         if curriculum_id:
-            for curr in user.curriculums or []:
-                if curr.get("id") == curriculum_id:
-                    return curr
-            return None
+            return self._curriculum_entry(user, curriculum_id)
         
         # Aktif müfredatı yükle
         if user.active_curriculum_id:
-            for curr in user.curriculums or []:
-                if curr.get("id") == user.active_curriculum_id:
-                    return curr
+            curr = self._curriculum_entry(user, user.active_curriculum_id)
+            if curr:
+                return curr
         
         # Geriye dönük uyumluluk - eski tek müfredat
         if user.curriculum:
@@ -284,12 +900,41 @@ class UserManager:
         
         return None
     
-    def get_all_curriculums(self, user_id: str) -> List[Dict]:
-        """Kullanıcının tüm müfredatlarını getirir."""
+    def _curriculum_entry(self, user: User, curriculum_id: str) -> Optional[Dict]:
+        """Tek müfredatı bulur; yüklenmemişse yalnızca o müfredatın blob'u çözülür."""
+        raw = user.__dict__.get("curriculums")
+        if isinstance(raw, Deferred):
+            for entry in raw.raw:
+                if entry.get("id") == curriculum_id:
+                    return self._resolve_curriculum_entries([entry])[0]
+            return None
+        
+        for curr in user.curriculums or []:
+            if curr.get("id") == curriculum_id:
+                return curr
+        return None
+    
+    def get_all_curriculums(self, user_id: str, include_content: bool = True) -> List[Dict]:
+        """
+        Kullanıcının tüm müfredatlarını getirir.
+        
+        Args:
+            include_content: False ise müfredat gövdeleri çözülmeden yalnızca
+                özet alanlar (id, goal_input, status...) döndürülür
+        """
         user = self.get_user(user_id)
-        if user and user.curriculums:
-            return user.curriculums
-        return []
+        if not user:
+            return []
+        
+        if include_content:
+            return user.curriculums or []
+        
+        raw = user.__dict__.get("curriculums")
+        entries = raw.raw if isinstance(raw, Deferred) else user.curriculums or []
+        return [
+            {k: v for k, v in entry.items() if k not in ("curriculum", "curriculum_ref")}
+            for entry in entries
+        ]
     
     def set_active_curriculum(self, user_id: str, curriculum_id: str):
         """Aktif müfredatı değiştirir."""
@@ -326,20 +971,30 @@ class UserManager:
     
     def update_progress(self, user_id: str, current_day: int, completed_days: List[int], day_quiz_completed: Dict = None):
         """Kullanıcının güncel ilerlemesini günceller - aktif müfredat için."""
-        user = self.get_user(user_id)
-        if user:
-            # Aktif müfredatı bul ve güncelle
-            if user.active_curriculum_id and user.curriculums:
-                for curr in user.curriculums:
-                    if curr.get("id") == user.active_curriculum_id:
-                        curr["current_day"] = current_day
-                        curr["completed_days"] = completed_days
-                        if day_quiz_completed is not None:
-                            curr["day_quiz_completed"] = day_quiz_completed
-                        break
+        with self.transaction(user_id) as user:
+            if user:
+                # Aktif müfredatı bul ve güncelle
+                if user.active_curriculum_id and user.curriculums:
+                    for curr in user.curriculums:
+                        if curr.get("id") == user.active_curriculum_id:
+                            curr["current_day"] = current_day
+                            curr["completed_days"] = completed_days
+                            if day_quiz_completed is not None:
+                                curr["day_quiz_completed"] = day_quiz_completed
+                            break
             
-            # Eski alanları da güncelle
-            user.current_day = current_day
-            user.completed_days = completed_days
-            self.update_user(user)
+                # Eski alanları da güncelle
+                user.current_day = current_day
+                user.completed_days = completed_days
+
+
+# Singleton instance
+_user_manager: Optional[UserManager] = None
+
 
+def get_user_manager() -> UserManager:
+    """Süreç genelinde paylaşılan UserManager (indeksler yeniden kullanılır)."""
+    global _user_manager
+    if _user_manager is None:
+        _user_manager = UserManager()
+    return _user_manager
@@ -0,0 +1,743 @@
+"""
+Kullanıcı Depolama Katmanı
+==========================
+UserManager için değiştirilebilir depolama altyapısı.
+
+- JsonUserStore: tek dosya (data/users.json), geriye dönük uyumlu varsayılan
+- ShardedJsonUserStore: kullanıcı başına bir dosya (data/users/<user_id>.json) + indeks dosyası
+- SqliteUserStore: kullanıcı başına bir satır, user_id/email/username indeksleri, WAL modu
+
+Müfredatlar içerik adresli blob olarak (sha256 anahtarıyla) bir kez saklanır;
+kullanıcı kayıtları yalnızca referans tutar.
+
+Birden fazla süreç (Streamlit worker'ları, main.py, interactive_demo.py) aynı
+depoyu kullanabilir: JSON depolarında yazıcılar danışma kilidiyle (.lock
+dosyası) sıraya girer ve dosyalar atomik rename ile değiştirilir, bu yüzden
+okuyucular kilit almadan her zaman eksiksiz bir dosya görür.
+
+JSON depolarının dosya biçimi STORAGE_CODEC ile seçilir (bkz. memory/codecs.py);
+okurken biçim dosyanın ilk baytından anlaşılır.
+"""
+
+import copy
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from memory.codecs import Codec, decode, get_codec, read_document, write_document
+from memory.file_utils import atomic_write_text, file_lock
+
+
+def encode_blob(payload: Any) -> tuple:
+    """
+    İçeriği kanonik JSON'a çevirir ve içerik adresini hesaplar.
+
+    Returns:
+        (anahtar, json_metni) - aynı içerik her zaman aynı anahtarı verir
+    """
+    text = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return "sha256:" + hashlib.sha256(text.encode("utf-8")).hexdigest(), text
+
+
+def _stat_key(path: Path) -> tuple:
+    """Dosya değişti mi anahtarı. Atomik rename her yazmada yeni inode verir;
+    böylece kaba mtime çözünürlüğünde aynı boyutla yapılan yazmalar da ayırt edilir."""
+    stat = path.stat()
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class ConcurrentUpdateError(Exception):
+    """Kayıt, okunduktan sonra başka bir yazıcı tarafından değiştirildi."""
+
+
+class UserStore:
+    """Depolama arayüzü. Kayıtlar düz dict (asdict(User)) olarak tutulur."""
+
+    # True ise depo email/username aramalarını kendi indeksiyle yapar (bkz. lookup_user_id);
+    # UserIndex bellekte kopya tutmaz
+    indexed_lookups = False
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        """Tek kullanıcının kaydını döndürür."""
+        raise NotImplementedError
+
+    def put(self, user_id: str, record: Dict, expected_version: Optional[int] = None) -> int:
+        """Tek kullanıcının kaydını yazar (ekler veya günceller). Yeni sürümü döndürür."""
+        expected = None if expected_version is None else {user_id: expected_version}
+        return self.put_many({user_id: record}, expected)[user_id]
+
+    def put_many(
+        self,
+        records: Dict[str, Dict],
+        expected_versions: Optional[Dict[str, int]] = None
+    ) -> Dict[str, int]:
+        """
+        Birden fazla kaydı tek seferde (hepsi ya da hiçbiri) yazar.
+
+        Her kaydın "version" alanı depodaki sürümün bir fazlasına ayarlanır.
+        expected_versions verilen kullanıcılar için depodaki sürüm farklıysa
+        hiçbir şey yazılmaz ve ConcurrentUpdateError fırlatılır.
+
+        Returns:
+            {user_id: yeni_sürüm}
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _check_versions(current: Dict[str, int], expected_versions: Optional[Dict[str, int]]):
+        for user_id, expected in (expected_versions or {}).items():
+            if current.get(user_id, 0) != expected:
+                raise ConcurrentUpdateError(
+                    f"{user_id} güncellenemedi: beklenen sürüm {expected}, depodaki {current.get(user_id, 0)}"
+                )
+
+    def find_by_email(self, email: str) -> Optional[Dict]:
+        """Email adresine göre kayıt bulur."""
+        raise NotImplementedError
+
+    def find_by_username(self, username: str) -> Optional[Dict]:
+        """Kullanıcı adına göre kayıt bulur."""
+        raise NotImplementedError
+
+    def count(self) -> int:
+        """Kayıtlı kullanıcı sayısı."""
+        raise NotImplementedError
+
+    def iter_index_keys(self) -> Iterator[tuple]:
+        """(user_id, email, username) üçlüleri; UserIndex bunlarla güncellenir."""
+        for record in self.iter_records():
+            yield record["user_id"], record.get("email"), record.get("username")
+
+    def iter_records(self) -> Iterator[Dict]:
+        """Tüm kayıtları sırayla döndürür."""
+        raise NotImplementedError
+
+    def get_blob(self, key: str) -> Optional[str]:
+        """İçerik adresli blob'un JSON metnini döndürür."""
+        raise NotImplementedError
+
+    def put_blob(self, key: str, text: str):
+        """Blob'u yazar; aynı anahtar zaten varsa hiçbir şey yapmaz."""
+        raise NotImplementedError
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        """Depo düzeyindeki bir ayarı (ör. şema sürümü) okur."""
+        raise NotImplementedError
+
+    def set_meta(self, key: str, value: Any):
+        """Depo düzeyindeki bir ayarı yazar."""
+        raise NotImplementedError
+
+    def data_version(self) -> Any:
+        """
+        Depo içeriği başka bir yazıcı tarafından değiştiğinde değişen işaret.
+        Bellek içi indekslerin ne zaman yeniden kurulacağını belirler.
+        """
+        return None
+
+    def close(self):
+        """Açık kaynakları serbest bırakır."""
+
+
+class _CurriculumFilesMixin:
+    """Müfredat blob'larını blob_dir altında <sha256>.json dosyaları olarak tutar."""
+
+    blob_dir: Path
+
+    def _blob_path(self, key: str) -> Path:
+        return self.blob_dir / (key.split(":", 1)[-1] + ".json")
+
+    def get_blob(self, key: str) -> Optional[str]:
+        path = self._blob_path(key)
+        if not path.exists():
+            return None
+        return path.read_text(encoding="utf-8")
+
+    def put_blob(self, key: str, text: str):
+        path = self._blob_path(key)
+        if path.exists():
+            return
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(path, text)
+
+
+class JsonUserStore(_CurriculumFilesMixin, UserStore):
+    """
+    Tüm kullanıcıları tek bir JSON dosyasında tutan eski depolama.
+
+    Okumalar ayrıştırılmış belgeyi dosya değişene kadar (data_version) bellekte
+    tutar; böylece login gibi tek kayıtlık okumalar her seferinde tüm dosyayı
+    ayrıştırmaz. Yazmalar ise her zaman dosyanın tamamını okuyup yeniden yazar;
+    bu maliyet kullanıcı sayısıyla büyür (büyük kurulumlar için sqlite).
+    """
+
+    def __init__(self, data_path: Path, codec: Optional[Codec] = None):
+        self.data_path = Path(data_path)
+        self.data_path.parent.mkdir(parents=True, exist_ok=True)
+        self.codec = codec or get_codec()
+        self.blob_dir = self.data_path.parent / "curricula"
+        self.lock_path = self.data_path.with_name(self.data_path.name + ".lock")
+        self._document: Optional[tuple] = None  # (data_version, ayrıştırılmış belge)
+
+        if not self.data_path.exists():
+            with file_lock(self.lock_path):
+                if not self.data_path.exists():
+                    self._save({"users": {}})
+
+    def _load(self) -> Dict:
+        """Salt okunur belge; sürüm damgası okumadan önce alınır, araya giren yazma yeniden ayrıştırılır."""
+        version = self.data_version()
+        cached = self._document
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        data = read_document(self.data_path)
+        self._document = (version, data)
+        return data
+
+    def _load_for_write(self) -> Dict:
+        return read_document(self.data_path)
+
+    def _save(self, data: Dict):
+        # Geçici dosya + atomik rename: yarım yazılmış users.json oluşmaz
+        write_document(self.data_path, data, self.codec)
+        self._document = None
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        return copy.deepcopy(self._load()["users"].get(user_id))
+
+    def put_many(
+        self,
+        records: Dict[str, Dict],
+        expected_versions: Optional[Dict[str, int]] = None
+    ) -> Dict[str, int]:
+        # Oku-kontrol et-yaz adımı kilit altında: başka süreçlerin yazmaları kaybolmaz
+        with file_lock(self.lock_path):
+            data = self._load_for_write()
+            users = data["users"]
+            current = {user_id: users[user_id].get("version", 0) for user_id in records if user_id in users}
+            self._check_versions(current, expected_versions)
+
+            new_versions = {}
+            for user_id, record in records.items():
+                record["version"] = new_versions[user_id] = current.get(user_id, 0) + 1
+                users[user_id] = record
+            self._save(data)
+        return new_versions
+
+    def _find(self, field: str, value: str) -> Optional[Dict]:
+        for record in self._load()["users"].values():
+            if record.get(field) == value:
+                return copy.deepcopy(record)
+        return None
+
+    def find_by_email(self, email: str) -> Optional[Dict]:
+        return self._find("email", email)
+
+    def find_by_username(self, username: str) -> Optional[Dict]:
+        return self._find("username", username)
+
+    def count(self) -> int:
+        return len(self._load()["users"])
+
+    def iter_index_keys(self) -> Iterator[tuple]:
+        # Önbellekteki belgeden kopyalamadan okunur
+        for user_id, record in self._load()["users"].items():
+            yield user_id, record.get("email"), record.get("username")
+
+    def iter_records(self) -> Iterator[Dict]:
+        for record in self._load()["users"].values():
+            yield copy.deepcopy(record)
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        return copy.deepcopy(self._load().get("meta", {}).get(key, default))
+
+    def set_meta(self, key: str, value: Any):
+        with file_lock(self.lock_path):
+            data = self._load_for_write()
+            data.setdefault("meta", {})[key] = value
+            self._save(data)
+
+    def data_version(self) -> Any:
+        return _stat_key(self.data_path)
+
+
+class ShardedJsonUserStore(_CurriculumFilesMixin, UserStore):
+    """
+    Her kullanıcıyı kendi JSON dosyasında tutan, bağımlılıksız depolama.
+
+    Bir yazma yalnızca o kullanıcının dosyasını yeniden yazar; farklı
+    kullanıcılara yazan oturumlar birbirini beklemez. email/username
+    aramaları için _index.json tutulur ve yalnızca bu alanlar değiştiğinde
+    (ör. kayıt olurken) yeniden yazılır. Depo düzeyindeki ayarlar da
+    indeks dosyasında saklanır.
+
+    İlk açılışta klasör boşsa ve eski users.json varsa, kayıtlar tek tek
+    dosyalara bölünür. JSON dosyasına dokunulmaz, yedek olarak kalır.
+    """
+
+    INDEX_NAME = "_index.json"
+
+    def __init__(self, shard_dir: Path, legacy_json_path: Optional[Path] = None, codec: Optional[Codec] = None):
+        self.shard_dir = Path(shard_dir)
+        self.shard_dir.mkdir(parents=True, exist_ok=True)
+        self.codec = codec or get_codec()
+        self.index_path = self.shard_dir / self.INDEX_NAME
+        self.blob_dir = self.shard_dir.parent / "curricula"
+
+        # Sürüm kontrolü + yazma kullanıcı bazında kilitlenir (.locks/<user_id>.lock);
+        # indeks dosyası ayrı bir kilitle korunur
+        self.lock_dir = self.shard_dir / ".locks"
+        self.lock_dir.mkdir(exist_ok=True)
+        self.index_lock_path = self.lock_dir / "_index.lock"
+        self._index_lock = threading.RLock()
+        self._index_cache: Optional[Dict] = None
+        self._index_stat: Any = None
+
+        if not self.index_path.exists():
+            with file_lock(self.index_lock_path):
+                if not self.index_path.exists():
+                    self._migrate_legacy_json(Path(legacy_json_path) if legacy_json_path else None)
+
+    @staticmethod
+    def _safe_name(user_id: str) -> str:
+        # user_id dosya adı olarak kullanılır; yol ayırıcıları kabul edilmez
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", user_id)
+
+    def _user_path(self, user_id: str) -> Path:
+        return self.shard_dir / f"{self._safe_name(user_id)}.json"
+
+    def _user_lock_path(self, user_id: str) -> Path:
+        return self.lock_dir / f"{self._safe_name(user_id)}.lock"
+
+    def _migrate_legacy_json(self, legacy_json_path: Optional[Path]):
+        """Eski users.json içeriğini kullanıcı dosyalarına böler (tek seferlik)."""
+        index = {"users": {}, "meta": {}}
+        if legacy_json_path and legacy_json_path.exists():
+            legacy = read_document(legacy_json_path)
+            for user_id, record in legacy.get("users", {}).items():
+                write_document(self._user_path(user_id), record, self.codec)
+                index["users"][user_id] = [record.get("email"), record.get("username")]
+            if index["users"]:
+                print(f"📦 {len(index['users'])} kullanıcı {legacy_json_path} dosyasından {self.shard_dir} klasörüne taşındı")
+        self._save_index(index)
+
+    def _load_index(self, fresh: bool = False) -> Dict:
+        """İndeks dosyasını okur; dosya değişmediyse bellekteki kopyayı kullanır."""
+        with self._index_lock:
+            key = _stat_key(self.index_path)
+            if fresh or self._index_cache is None or key != self._index_stat:
+                self._index_cache = read_document(self.index_path)
+                self._index_stat = key
+            return self._index_cache
+
+    def _save_index(self, index: Dict):
+        with self._index_lock:
+            write_document(self.index_path, index, self.codec)
+            self._index_cache, self._index_stat = index, _stat_key(self.index_path)
+
+    def _read_user(self, user_id: str) -> Optional[Dict]:
+        try:
+            return read_document(self._user_path(user_id))
+        except FileNotFoundError:
+            return None
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        return self._read_user(user_id)
+
+    def put_many(
+        self,
+        records: Dict[str, Dict],
+        expected_versions: Optional[Dict[str, int]] = None
+    ) -> Dict[str, int]:
+        # Kilitler sabit sırada alınır; aynı kullanıcı kümesine yazanlar kilitlenmez
+        with ExitStack() as stack:
+            for user_id in sorted(records):
+                stack.enter_context(file_lock(self._user_lock_path(user_id)))
+            current = {}
+            for user_id in records:
+                stored = self._read_user(user_id)
+                if stored is not None:
+                    current[user_id] = stored.get("version", 0)
+            self._check_versions(current, expected_versions)
+
+            new_versions = {}
+            for user_id, record in records.items():
+                record["version"] = new_versions[user_id] = current.get(user_id, 0) + 1
+                write_document(self._user_path(user_id), record, self.codec)
+            self._update_index(records)
+        return new_versions
+
+    def _update_index(self, records: Dict[str, Dict]):
+        """email/username değişen kayıtları indeks dosyasına işler."""
+        with self._index_lock:
+            users = self._load_index()["users"]
+            if all(users.get(user_id) == [r.get("email"), r.get("username")] for user_id, r in records.items()):
+                return
+        with self._index_lock, file_lock(self.index_lock_path):
+            index = self._load_index(fresh=True)
+            changed = False
+            for user_id, record in records.items():
+                keys = [record.get("email"), record.get("username")]
+                if index["users"].get(user_id) != keys:
+                    index["users"][user_id] = keys
+                    changed = True
+            if changed:
+                self._save_index(index)
+
+    def _find(self, position: int, value: str) -> Optional[Dict]:
+        with self._index_lock:
+            user_id = next(
+                (uid for uid, keys in self._load_index()["users"].items() if keys[position] == value),
+                None
+            )
+        return self._read_user(user_id) if user_id else None
+
+    def find_by_email(self, email: str) -> Optional[Dict]:
+        return self._find(0, email)
+
+    def find_by_username(self, username: str) -> Optional[Dict]:
+        return self._find(1, username)
+
+    def count(self) -> int:
+        with self._index_lock:
+            return len(self._load_index()["users"])
+
+    def iter_index_keys(self) -> Iterator[tuple]:
+        # Kullanıcı dosyaları okunmaz; indeks dosyası yeterli
+        with self._index_lock:
+            entries = list(self._load_index()["users"].items())
+        for user_id, (email, username) in entries:
+            yield user_id, email, username
+
+    def iter_records(self) -> Iterator[Dict]:
+        with self._index_lock:
+            user_ids = list(self._load_index()["users"])
+        for user_id in user_ids:
+            record = self._read_user(user_id)
+            if record is not None:
+                yield record
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        return self._load_index().get("meta", {}).get(key, default)
+
+    def set_meta(self, key: str, value: Any):
+        with self._index_lock, file_lock(self.index_lock_path):
+            index = self._load_index(fresh=True)
+            index.setdefault("meta", {})[key] = value
+            self._save_index(index)
+
+    def data_version(self) -> Any:
+        # Yalnızca indeks (email/username) değiştiğinde değişir; UserIndex'in ihtiyacı bu kadar
+        return _stat_key(self.index_path)
+
+
+class SqliteUserStore(UserStore):
+    """
+    Kullanıcı başına bir satır tutan SQLite deposu.
+
+    İlk açılışta veritabanı boşsa ve eski users.json varsa, kayıtlar
+    tek bir transaction içinde otomatik olarak taşınır. JSON dosyasına
+    dokunulmaz, yedek olarak kalır.
+    """
+
+    SCHEMA_VERSION = 3
+    indexed_lookups = True
+
+    def __init__(self, db_path: Path, legacy_json_path: Optional[Path] = None, codec: Optional[Codec] = None):
+        self.db_path = Path(db_path)
+        # Satırlar json_extract ile sorgulandığı için her zaman kompakt JSON metnidir;
+        # yalnızca orjson seçildiyse kodlama orjson ile yapılır
+        self.row_codec = get_codec("orjson" if (codec or get_codec()).name == "orjson" else "json")
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.legacy_json_path = Path(legacy_json_path) if legacy_json_path else None
+
+        # Streamlit oturumları farklı thread'lerden gelir; erişim kilitle sıralanır
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._init_schema()
+
+    def _init_schema(self):
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= self.SCHEMA_VERSION:
+                return
+
+            if version < 1:
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS users (
+                        user_id  TEXT PRIMARY KEY,
+                        email    TEXT NOT NULL,
+                        username TEXT NOT NULL,
+                        data     TEXT NOT NULL
+                    )
+                """)
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)")
+                self._conn.execute("CREATE INDEX IF NOT EXISTS idx_users_username ON users(username)")
+                self._migrate_legacy_json()
+            if version < 2:
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS curricula (
+                        key  TEXT PRIMARY KEY,
+                        data TEXT NOT NULL
+                    )
+                """)
+            if version < 3:
+                self._conn.execute("""
+                    CREATE TABLE IF NOT EXISTS meta (
+                        key   TEXT PRIMARY KEY,
+                        value TEXT NOT NULL
+                    )
+                """)
+            self._conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    def _migrate_legacy_json(self):
+        """Eski users.json içeriğini tabloya aktarır (tek seferlik)."""
+        if not self.legacy_json_path or not self.legacy_json_path.exists():
+            return
+
+        legacy = read_document(self.legacy_json_path)
+
+        rows = [
+            (user_id, record.get("email", ""), record.get("username", ""), self._encode(record))
+            for user_id, record in legacy.get("users", {}).items()
+        ]
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO users (user_id, email, username, data) VALUES (?, ?, ?, ?)",
+            rows
+        )
+        if rows:
+            print(f"📦 {len(rows)} kullanıcı {self.legacy_json_path} dosyasından SQLite'a taşındı")
+
+    def _encode(self, record: Dict) -> str:
+        return self.row_codec.dumps(record).decode("utf-8")
+
+    @staticmethod
+    def _decode(payload: str) -> Dict:
+        return decode(payload)
+
+    def _fetch_one(self, query: str, params: tuple) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(query, params).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def get(self, user_id: str) -> Optional[Dict]:
+        return self._fetch_one("SELECT data FROM users WHERE user_id = ?", (user_id,))
+
+    def put_many(
+        self,
+        records: Dict[str, Dict],
+        expected_versions: Optional[Dict[str, int]] = None
+    ) -> Dict[str, int]:
+        with self._lock, self._conn:
+            # Yazma kilidini baştan al: sürüm kontrolü ile yazma arasında başka commit olamaz
+            self._conn.execute("BEGIN IMMEDIATE")
+            current = {}
+            for user_id in records:
+                row = self._conn.execute(
+                    "SELECT COALESCE(json_extract(data, '$.version'), 0) FROM users WHERE user_id = ?",
+                    (user_id,)
+                ).fetchone()
+                if row:
+                    current[user_id] = row[0]
+            self._check_versions(current, expected_versions)
+
+            new_versions = {}
+            rows = []
+            for user_id, record in records.items():
+                record["version"] = new_versions[user_id] = current.get(user_id, 0) + 1
+                rows.append((user_id, record.get("email", ""), record.get("username", ""), self._encode(record)))
+            self._conn.executemany(
+                """
+                INSERT INTO users (user_id, email, username, data) VALUES (?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    email = excluded.email,
+                    username = excluded.username,
+                    data = excluded.data
+                """,
+                rows
+            )
+        return new_versions
+
+    def find_by_email(self, email: str) -> Optional[Dict]:
+        return self._fetch_one("SELECT data FROM users WHERE email = ? LIMIT 1", (email,))
+
+    def find_by_username(self, username: str) -> Optional[Dict]:
+        return self._fetch_one("SELECT data FROM users WHERE username = ? LIMIT 1", (username,))
+
+    def lookup_user_id(self, column: str, value: str) -> Optional[str]:
+        """email/username sütun indeksinden yalnızca user_id'yi okur (kayıt çözülmez)."""
+        if column not in ("email", "username"):
+            raise ValueError(f"Bilinmeyen arama sütunu: {column}")
+        with self._lock:
+            row = self._conn.execute(f"SELECT user_id FROM users WHERE {column} = ? LIMIT 1", (value,)).fetchone()
+        return row[0] if row else None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def iter_records(self, batch_size: int = 500) -> Iterator[Dict]:
+        # rowid üzerinden sayfalı okuma; bellek kullanımı batch_size ile sınırlı
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid, data FROM users WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for _, payload in rows:
+                yield self._decode(payload)
+            last_rowid = rows[-1][0]
+
+    def get_meta(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key: str, value: Any):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, json.dumps(value))
+            )
+
+    def get_blob(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM curricula WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put_blob(self, key: str, text: str):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO curricula (key, data) VALUES (?, ?)", (key, text))
+
+    def data_version(self) -> Any:
+        # Yalnızca başka bağlantıların commit'lerinde artar
+        with self._lock:
+            return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class UserIndex:
+    """
+    email → user_id ve username → user_id bellek içi hash indeksleri.
+
+    İlk kullanımda depodan kurulur; UserManager her yazmada günceller.
+    Depo başka bir süreç tarafından değiştirilirse (data_version farklıysa)
+    bir sonraki aramada yalnızca anahtarları değişen kullanıcılar güncellenir.
+    Aramaları kendi indeksiyle yapan depolarda (sqlite) bellekte kopya tutulmaz,
+    her arama doğrudan depoya sorulur.
+    """
+
+    def __init__(self, store: UserStore):
+        self.store = store
+        self._lock = threading.Lock()
+        self._by_email: Dict[str, str] = {}
+        self._by_username: Dict[str, str] = {}
+        self._keys: Dict[str, tuple] = {}  # user_id → (email, username)
+        self._version: Any = None
+        self._built = False
+
+    def _ensure_fresh(self):
+        version = self.store.data_version()
+        if self._built and version == self._version:
+            return
+        if not self._built:
+            self._by_email.clear()
+            self._by_username.clear()
+            self._keys.clear()
+        seen = set()
+        for user_id, email, username in self.store.iter_index_keys():
+            seen.add(user_id)
+            if self._keys.get(user_id) != (email, username):
+                self._add(user_id, email, username)
+        for user_id in set(self._keys) - seen:
+            self._remove(user_id)
+        self._version = version
+        self._built = True
+
+    def _remove(self, user_id: str):
+        old_email, old_username = self._keys.pop(user_id, (None, None))
+        if old_email is not None and self._by_email.get(old_email) == user_id:
+            del self._by_email[old_email]
+        if old_username is not None and self._by_username.get(old_username) == user_id:
+            del self._by_username[old_username]
+
+    def _add(self, user_id: str, email: Optional[str], username: Optional[str]):
+        self._remove(user_id)
+        self._by_email.setdefault(email, user_id)
+        self._by_username.setdefault(username, user_id)
+        self._keys[user_id] = (email, username)
+
+    def user_id_for_email(self, email: str) -> Optional[str]:
+        if self.store.indexed_lookups:
+            return self.store.lookup_user_id("email", email)
+        with self._lock:
+            self._ensure_fresh()
+            return self._by_email.get(email)
+
+    def user_id_for_username(self, username: str) -> Optional[str]:
+        if self.store.indexed_lookups:
+            return self.store.lookup_user_id("username", username)
+        with self._lock:
+            self._ensure_fresh()
+            return self._by_username.get(username)
+
+    def current_version(self) -> Any:
+        """Yazmadan önce alınır ve records_written'a verilir."""
+        return None if self.store.indexed_lookups else self.store.data_version()
+
+    def records_written(self, records: Iterable[Dict], version_before: Any):
+        """
+        Kendi yazmalarımızı indekse işler. İndeksin sürümü yalnızca yazmadan önce
+        güncelse (version_before) ilerletilir; arada başka bir yazıcı girdiyse
+        sürüm eski kalır ve bir sonraki arama onun değişikliklerini de okur.
+        """
+        if self.store.indexed_lookups:
+            return
+        with self._lock:
+            if not self._built:
+                return
+            for record in records:
+                self._add(record["user_id"], record.get("email"), record.get("username"))
+            if self._version == version_before:
+                self._version = self.store.data_version()
+
+    def invalidate(self):
+        """Bir sonraki aramada indeksi baştan kurdurur."""
+        with self._lock:
+            self._built = False
+
+
+def create_user_store(backend: str, data_path: Path, codec: Optional[Codec] = None) -> UserStore:
+    """
+    Depolama motorunu seçer.
+
+    Args:
+        backend: "json", "sharded" veya "sqlite"
+        data_path: users.json yolu; SQLite için aynı klasörde users.db,
+            sharded için aynı klasörde users/ kullanılır
+        codec: dosya biçimi; verilmezse STORAGE_CODEC (bkz. memory/codecs.py)
+    """
+    data_path = Path(data_path)
+    backend = (backend or "json").lower()
+
+    if backend == "json":
+        return JsonUserStore(data_path, codec=codec)
+    if backend == "sharded":
+        return ShardedJsonUserStore(data_path.with_suffix(""), legacy_json_path=data_path, codec=codec)
+    if backend == "sqlite":
+        return SqliteUserStore(data_path.with_suffix(".db"), legacy_json_path=data_path, codec=codec)
+
+    raise ValueError(f"Bilinmeyen depolama motoru: {backend}")
@@ -0,0 +1,148 @@
+"""
+Kullanıcı Dışa/İçe Aktarma
+==========================
+Kullanıcı deposunu satır başına bir JSON nesnesi (JSONL) olarak akış halinde
+dışa ve içe aktarır. Bellek kullanımı kullanıcı sayısından bağımsızdır:
+dışa aktarma kayıtları depodan tek tek okur, içe aktarma batch_size'lık
+gruplar halinde UserManager yazma yolundan geçirir.
+
+Satır türleri:
+    {"_blob": "sha256:...", "text": "..."}   müfredat gövdesi (ilk referanstan önce bir kez)
+    {"user_id": ..., ...}                   kullanıcı kaydı (depodaki haliyle)
+
+Not: tek dosyalı "json" deposu her okumada dosyanın tamamını yükler; büyük
+depolar için "sharded" veya "sqlite" kullanın.
+"""
+
+import json
+import sys
+from typing import Callable, Dict, Iterable, Optional, TextIO
+
+from .user import UserManager
+from .user_store import encode_blob
+
+
+def _refs(record: Dict) -> Iterable[str]:
+    if record.get("curriculum_ref"):
+        yield record["curriculum_ref"]
+    for entry in record.get("curriculums") or []:
+        if entry.get("curriculum_ref"):
+            yield entry["curriculum_ref"]
+
+
+def export_users(
+    um: UserManager,
+    out: TextIO,
+    include_curricula: bool = True,
+    progress: Optional[Callable[[int], None]] = None
+) -> int:
+    """
+    Tüm kullanıcıları out akışına JSONL olarak yazar.
+
+    Args:
+        um: kaynak UserManager
+        out: yazılacak metin akışı
+        include_curricula: müfredat blob'larını da yaz (yedek için gerekli)
+        progress: her 10.000 kullanıcıda yazılan sayı ile çağrılır
+
+    Returns:
+        Yazılan kullanıcı sayısı
+    """
+    um.flush()
+    written_blobs = set()
+    count = 0
+    for record in um.store.iter_records():
+        if include_curricula:
+            for key in _refs(record):
+                if key in written_blobs:
+                    continue
+                text = um.store.get_blob(key)
+                if text is not None:
+                    out.write(json.dumps({"_blob": key, "text": text}, ensure_ascii=False) + "\n")
+                written_blobs.add(key)
+        out.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        count += 1
+        if progress and count % 10_000 == 0:
+            progress(count)
+    return count
+
+
+def import_users(
+    um: UserManager,
+    lines: Iterable[str],
+    batch_size: int = 1000,
+    skip_existing: bool = False,
+    progress: Optional[Callable[[int], None]] = None
+) -> int:
+    """
+    JSONL satırlarından kullanıcıları gruplar halinde içe aktarır.
+
+    Args:
+        um: hedef UserManager
+        lines: export_users çıktısının satırları (ör. açık bir dosya)
+        batch_size: tek yazmada aktarılacak kullanıcı sayısı
+        skip_existing: depoda zaten olan kullanıcıları atla (varsayılan: üzerine yaz)
+        progress: her 10.000 kullanıcıda aktarılan sayı ile çağrılır
+
+    Returns:
+        İçe aktarılan kullanıcı sayısı
+    """
+    imported = 0
+    batch: Dict[str, Dict] = {}
+    for line_no, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"{line_no}. satır geçerli JSON değil: {e}") from e
+
+        if "_blob" in item:
+            key, text = encode_blob(json.loads(item["text"]))
+            if key != item["_blob"]:
+                raise ValueError(f"{line_no}. satır: müfredat içeriği anahtarıyla eşleşmiyor ({item['_blob']})")
+            um.store.put_blob(key, text)
+            continue
+
+        if skip_existing and um.store.get(item["user_id"]) is not None:
+            continue
+        batch[item["user_id"]] = item
+        if len(batch) >= batch_size:
+            before = imported
+            imported += um.import_records(batch)
+            batch = {}
+            if progress and imported // 10_000 > before // 10_000:
+                progress(imported)
+    if batch:
+        imported += um.import_records(batch)
+    return imported
+
+
+def _report(action: str) -> Callable[[int], None]:
+    return lambda n: print(f"   ... {n} kullanıcı {action}", file=sys.stderr)
+
+
+def run_export(data_path: str, backend: Optional[str], file: str, include_curricula: bool = True) -> int:
+    """main.py export-users komutu."""
+    um = UserManager(data_path, backend=backend)
+    if file == "-":
+        count = export_users(um, sys.stdout, include_curricula, _report("yazıldı"))
+    else:
+        with open(file, "w", encoding="utf-8") as f:
+            count = export_users(um, f, include_curricula, _report("yazıldı"))
+    print(f"✅ {count} kullanıcı dışa aktarıldı", file=sys.stderr)
+    return count
+
+
+def run_import(data_path: str, backend: Optional[str], file: str, batch_size: int = 1000,
+               skip_existing: bool = False) -> int:
+    """main.py import-users komutu."""
+    um = UserManager(data_path, backend=backend)
+    if file == "-":
+        count = import_users(um, sys.stdin, batch_size, skip_existing, _report("aktarıldı"))
+    else:
+        with open(file, "r", encoding="utf-8") as f:
+            count = import_users(um, f, batch_size, skip_existing, _report("aktarıldı"))
+    print(f"✅ {count} kullanıcı içe aktarıldı", file=sys.stderr)
+    return count
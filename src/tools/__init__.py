@@ -1,6 +1,12 @@
 from .google_search import GoogleSearchTool, google_search
 from .quiz_scoring import QuizScorer, QuizQuestion, QuizResult, score_quiz
-from .ai_service import AIService, get_ai_service
+from .ai_service import AIService, AsyncAIService, get_ai_service, get_async_ai_service, run_async
+from .ai_gateway import AIGateway, CircuitOpenError, get_ai_gateway
+from .ai_metrics import AIMetrics, InMemoryExporter, PrometheusTextfileExporter, get_ai_metrics
+from .fake_gemini import FakeAPIError, FakeGeminiModel
+from .cassette import Cassette, CassetteMiss, CassetteModel, CassetteSearchService, get_cassette
+from .json_salvage import PartialJSONError, extract_json, salvage_json
+from .ai_cache import ExplanationMemo, ResponseCache, get_explanation_memo, get_response_cache
 
 __all__ = [
     "GoogleSearchTool",
@@ -10,5 +16,29 @@ __all__ = [
     "QuizResult",
     "score_quiz",
     "AIService",
-    "get_ai_service"
+    "get_ai_service",
+    "AsyncAIService",
+    "get_async_ai_service",
+    "run_async",
+    "ResponseCache",
+    "get_response_cache",
+    "ExplanationMemo",
+    "get_explanation_memo",
+    "PartialJSONError",
+    "extract_json",
+    "salvage_json",
+    "AIGateway",
+    "CircuitOpenError",
+    "get_ai_gateway",
+    "AIMetrics",
+    "InMemoryExporter",
+    "PrometheusTextfileExporter",
+    "get_ai_metrics",
+    "FakeGeminiModel",
+    "FakeAPIError",
+    "Cassette",
+    "CassetteMiss",
+    "CassetteModel",
+    "CassetteSearchService",
+    "get_cassette"
 ]
@@ -0,0 +1,254 @@
+"""
+AI Yanıt Önbelleği
+==================
+Gemini yanıtlarını (model adı, normalize edilmiş prompt, üretim parametreleri)
+anahtarıyla SQLite'ta saklar. Aynı temayı aynı seviyede çalışan iki kullanıcı
+için ikinci çağrı API'ye gitmez.
+
+- TTL: süresi dolan kayıtlar okunmaz ve periyodik olarak silinir
+- LRU: kayıt sayısı max_entries'i aşınca en uzun süredir okunmayanlar silinir
+- Sayaçlar: toplam ve metot bazında isabet/ıska/silme sayıları (stats())
+
+Ayarlar: AI_CACHE_ENABLED, AI_CACHE_PATH, AI_CACHE_TTL (saniye), AI_CACHE_MAX_ENTRIES
+
+ExplanationMemo, yanlış cevap açıklamalarını (soru, cevap, doğru cevap, seviye)
+anahtarıyla süreç belleğinde tutar. Streamlit her etkileşimde betiği yeniden
+çalıştırdığı için sonuç ekranı aynı açıklamaları tekrar ister; bellek içi
+önbellek bu tekrarları ve farklı kullanıcıların aynı hatalarını SQLite'a
+bile gitmeden karşılar. Ayar: AI_EXPLANATION_MEMO_SIZE (0 = kapalı)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Girinti ve boş satır farklarını yok sayar (f-string prompt'lar girintili yazılır)."""
+    lines = [line.strip() for line in prompt.strip().splitlines()]
+    normalized = []
+    for line in lines:
+        if line or (normalized and normalized[-1]):
+            normalized.append(line)
+    return "\n".join(normalized).strip()
+
+
+def make_cache_key(model_name: str, prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """(model, normalize prompt, parametreler) için kararlı anahtar."""
+    payload = json.dumps(
+        {"model": model_name, "prompt": normalize_prompt(prompt), "params": params or {}},
+        ensure_ascii=False, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite tabanlı, TTL ve LRU sınırlı yanıt önbelleği."""
+
+    # Süresi dolan/fazla kayıtların temizlenme sıklığı (yazma sayısı)
+    PURGE_EVERY = 50
+
+    def __init__(
+        self,
+        path: str = "data/cache/ai_responses.db",
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_entries: int = 5000
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key         TEXT PRIMARY KEY,
+                    namespace   TEXT NOT NULL,
+                    value       TEXT NOT NULL,
+                    created_at  REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)")
+
+        self._writes = 0
+        self.counters: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str, namespace: str = "") -> Optional[str]:
+        """Geçerli kayıt varsa metnini döndürür ve erişim zamanını günceller."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row and now - row[1] <= self.ttl_seconds:
+                with self._conn:
+                    self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+                self.counters[namespace]["hits"] += 1
+                return row[0]
+            if row:
+                with self._conn:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.expirations += 1
+            self.counters[namespace]["misses"] += 1
+            return None
+
+    def set(self, key: str, value: str, namespace: str = ""):
+        now = time.time()
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    """
+                    INSERT INTO responses (key, namespace, value, created_at, last_access) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET value = excluded.value,
+                        created_at = excluded.created_at, last_access = excluded.last_access
+                    """,
+                    (key, namespace, value, now, now)
+                )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self._purge(now)
+
+    def _purge(self, now: float):
+        """Süresi dolanları ve LRU sınırını aşanları siler (kilit tutulurken çağrılır)."""
+        with self._conn:
+            expired = self._conn.execute(
+                "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+            ).rowcount
+            evicted = self._conn.execute(
+                """
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,)
+            ).rowcount
+        self.expirations += expired
+        self.evictions += evicted
+
+    def purge(self):
+        """Temizliği hemen çalıştırır."""
+        with self._lock:
+            self._purge(time.time())
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """İsabet/ıska sayaçları (toplam ve metot bazında) ve kayıt sayısı."""
+        with self._lock:
+            by_method = {name: dict(c) for name, c in self.counters.items()}
+        hits = sum(c["hits"] for c in by_method.values())
+        misses = sum(c["misses"] for c in by_method.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            "entries": len(self),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "by_method": by_method
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ExplanationMemo:
+    """Süreç içi, thread-safe LRU bellek (oturumlar arasında paylaşılır)."""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(question: str, user_answer: str, correct_answer: str, level: str) -> tuple:
+        return tuple(" ".join(str(part).split()) for part in (question, user_answer, correct_answer, level))
+
+    def get(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: str):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "entries": len(self._entries),
+                "evictions": self.evictions
+            }
+
+
+# Singleton instance
+_response_cache: Optional[ResponseCache] = None
+_explanation_memo: Optional[ExplanationMemo] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Ortam ayarlarına göre paylaşılan önbellek; AI_CACHE_ENABLED kapalıysa None."""
+    global _response_cache
+    if os.getenv("AI_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    if _response_cache is None:
+        _response_cache = ResponseCache(
+            path=os.getenv("AI_CACHE_PATH", "data/cache/ai_responses.db"),
+            ttl_seconds=float(os.getenv("AI_CACHE_TTL", str(7 * 24 * 3600))),
+            max_entries=int(os.getenv("AI_CACHE_MAX_ENTRIES", "5000"))
+        )
+    return _response_cache
+
+
+def get_explanation_memo() -> Optional[ExplanationMemo]:
+    """Paylaşılan açıklama belleği; AI_EXPLANATION_MEMO_SIZE=0 ise None."""
+    global _explanation_memo
+    size = int(os.getenv("AI_EXPLANATION_MEMO_SIZE", "2048"))
+    if size <= 0:
+        return None
+    if _explanation_memo is None:
+        _explanation_memo = ExplanationMemo(size)
+    return _explanation_memo
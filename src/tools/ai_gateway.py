@@ -0,0 +1,367 @@
+"""
+AI Çağrı Geçidi
+===============
+Tüm Gemini çağrıları bu geçitten geçer:
+
+- Token bucket hız sınırlayıcı: dakikalık kotaya göre (AI_RATE_LIMIT_RPM),
+  AI_RATE_BURST kadar ani çağrıya izin verir; token yoksa bekler
+- Yeniden deneme: geçici hatalar (429, 500, 503, 504, zaman aşımı, bağlantı)
+  jitter'lı üstel bekleme ile AI_MAX_RETRIES kez yeniden denenir
+- Devre kesici: art arda AI_BREAKER_FAILURES geçici hatadan sonra devre açılır;
+  AI_BREAKER_RESET saniye boyunca çağrılar API'ye gitmeden CircuitOpenError
+  ile reddedilir (AIService bunu yakalayıp fallback döner). Süre dolunca tek
+  bir deneme çağrısına izin verilir; başarılıysa devre kapanır.
+- Akış çağrıları (stream): sonuç yineleme bitince bildirilir; yalnızca ilk
+  parça gelmeden oluşan hatalar yeniden denenir
+
+Geçit süreç genelinde paylaşılır (get_ai_gateway), böylece çok sayıda
+Streamlit oturumu bozulan bir API'yi birlikte zorlamaz. Durum ve sayaçlar
+metrics() ile okunur.
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    GOOGLE_API_CORE_AVAILABLE = True
+except ImportError:
+    GOOGLE_API_CORE_AVAILABLE = False
+
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+# Yalnızca durum kodu taşımayan google-api hatalarının mesajında aranır
+_RETRYABLE_MARKERS = ("429", "503", "resource has been exhausted", "quota", "unavailable",
+                      "deadline exceeded", "timed out", "overloaded")
+
+
+class CircuitOpenError(RuntimeError):
+    """Devre açık: API geçici olarak kullanılmıyor."""
+
+
+class RateLimitTimeout(RuntimeError):
+    """Hız sınırlayıcıda izin verilen süreden uzun beklenecekti."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Hata geçici mi (yeniden denemeye değer mi)?
+    
+    Karar hata türüne, açık bir retryable alanına ya da tamsayı durum koduna
+    göre verilir; mesaj metnine yalnızca google-api hatalarında bakılır
+    (ör. kendi hatalarımızdaki "quota" kelimesi yeniden deneme sebebi değildir).
+    """
+    if isinstance(error, (CircuitOpenError, RateLimitTimeout)):
+        return False
+    retryable = getattr(error, "retryable", None)
+    if isinstance(retryable, bool):
+        return retryable
+    if isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    if GOOGLE_API_CORE_AVAILABLE and isinstance(error, (
+        google_exceptions.TooManyRequests,
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.InternalServerError,
+        google_exceptions.DeadlineExceeded,
+    )):
+        return True
+    for attr in ("code", "status_code", "status"):
+        code = getattr(error, attr, None)
+        if isinstance(code, int):
+            return code in RETRYABLE_STATUS_CODES
+    if GOOGLE_API_CORE_AVAILABLE and isinstance(error, google_exceptions.GoogleAPIError):
+        message = str(error).lower()
+        return any(marker in message for marker in _RETRYABLE_MARKERS)
+    return False
+
+
+class TokenBucket:
+    """Thread-safe token bucket; rate_per_minute <= 0 ise sınırsız."""
+
+    def __init__(self, rate_per_minute: float, burst: int, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._clock = clock
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Bir token ayırır; token gelene kadar beklenmesi gereken süreyi döndürür."""
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            self._refill()
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def cancel(self):
+        """Kullanılmayan bir ayırmayı geri verir."""
+        if self.enabled:
+            with self._lock:
+                self._tokens = min(self.capacity, self._tokens + 1)
+
+    def available(self) -> float:
+        if not self.enabled:
+            return float("inf")
+        with self._lock:
+            self._refill()
+            return max(0.0, self._tokens)
+
+
+class CircuitBreaker:
+    """closed → (art arda hatalar) → open → (bekleme) → half_open → closed/open"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._trial_in_flight = False
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and self._clock() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if self.state == "half_open" or (
+                self.state == "closed" and self.consecutive_failures >= self.failure_threshold
+            ):
+                self.state = "open"
+                self.opened_at = self._clock()
+                self.times_opened += 1
+
+    def release(self):
+        """Sonucu devreyi etkilemeyen (ör. geçici olmayan hata) bir denemeyi serbest bırakır."""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+class AIGateway:
+    """Hız sınırı + yeniden deneme + devre kesici."""
+
+    def __init__(
+        self,
+        rate_per_minute: float = 60,
+        burst: int = 10,
+        max_wait: float = 30.0,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            rate_per_minute: dakikalık çağrı kotası (<= 0: sınırsız)
+            burst: beklemeden yapılabilecek ardışık çağrı sayısı
+            max_wait: bir çağrının hız sınırlayıcıda bekleyebileceği en uzun süre (s)
+            max_retries: geçici hatalarda ek deneme sayısı
+            base_delay / max_delay: üstel beklemenin başlangıcı ve üst sınırı (s)
+            failure_threshold: devreyi açan art arda geçici hata sayısı
+            reset_timeout: devrenin açık kalma süresi (s)
+        """
+        self.bucket = TokenBucket(rate_per_minute, burst, clock)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, clock)
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = {
+            "calls": 0, "successes": 0, "failures": 0, "retries": 0,
+            "short_circuited": 0, "rate_limited": 0, "rate_limit_wait_s": 0.0
+        }
+
+    def _count(self, name: str, amount: float = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def backoff(self, attempt: int) -> float:
+        """attempt. yeniden deneme için bekleme: tam jitter'lı üstel (0..min(max, base*2^n))."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _admit(self) -> float:
+        """Devre ve hız sınırı kontrolü; beklenecek süreyi döndürür."""
+        if not self.breaker.allow():
+            self._count("short_circuited")
+            raise CircuitOpenError("AI servisi geçici olarak devre dışı (art arda hata)")
+        wait = self.bucket.reserve()
+        if wait > self.max_wait:
+            self.bucket.cancel()
+            self.breaker.release()
+            self._count("rate_limited")
+            raise RateLimitTimeout(f"hız sınırı: {wait:.1f} s beklemek gerekiyordu")
+        if wait > 0:
+            self._count("rate_limited")
+            self._count("rate_limit_wait_s", wait)
+        return wait
+
+    def _on_error(self, error: Exception, attempt: int) -> Optional[float]:
+        """Hatayı kaydeder; yeniden denenecekse bekleme süresini, denenmeyecekse None döndürür."""
+        self._count("failures")
+        if not is_retryable(error):
+            self.breaker.release()
+            return None
+        self.breaker.record_failure()
+        if attempt >= self.max_retries or self.breaker.state == "open":
+            return None
+        self._count("retries")
+        return self.backoff(attempt)
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """fn(*args, **kwargs)'ı geçitten geçirerek çağırır."""
+        self._count("calls")
+        attempt = 0
+        while True:
+            wait = self._admit()
+            if wait:
+                self._sleep(wait)
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._on_error(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                self._sleep(delay)
+                continue
+            self.breaker.record_success()
+            self._count("successes")
+            return result
+
+    async def call_async(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """call'ın asenkron karşılığı: fn bir coroutine döndürmelidir."""
+        self._count("calls")
+        attempt = 0
+        while True:
+            wait = self._admit()
+            if wait:
+                await asyncio.sleep(wait)
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                delay = self._on_error(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self.breaker.record_success()
+            self._count("successes")
+            return result
+
+    def stream(self, fn: Callable[..., Any], *args, **kwargs) -> Iterator[Any]:
+        """
+        call'ın akış karşılığı: fn bir yineleyici döndürmelidir; parçalar geldikçe verilir.
+        
+        Hata ilk parçadan önce olursa çağrı call'daki gibi yeniden denenir. Sonraki
+        parçalar çağırana ulaşmış olduğundan ara hatalar yeniden denenmez, devre
+        kesiciye bildirilip iletilir. Başarı ancak akış tamamlanınca sayılır.
+        """
+        self._count("calls")
+        attempt = 0
+        while True:
+            wait = self._admit()
+            if wait:
+                self._sleep(wait)
+            started = False
+            try:
+                for chunk in fn(*args, **kwargs):
+                    started = True
+                    yield chunk
+            except GeneratorExit:
+                # Çağıran akışı erken bıraktı: sonuç devreyi etkilemez
+                self.breaker.release()
+                raise
+            except Exception as e:
+                if started:
+                    self._count("failures")
+                    if is_retryable(e):
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.release()
+                    raise
+                delay = self._on_error(e, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                self._sleep(delay)
+                continue
+            self.breaker.record_success()
+            self._count("successes")
+            return
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self.counters)
+        counters["rate_limit_wait_s"] = round(counters["rate_limit_wait_s"], 3)
+        return {
+            **counters,
+            "circuit_state": self.breaker.state,
+            "circuit_open": int(self.breaker.state == "open"),
+            "consecutive_failures": self.breaker.consecutive_failures,
+            "circuit_opened": self.breaker.times_opened,
+            "tokens_available": round(self.bucket.available(), 2)
+        }
+
+
+# Singleton instance
+_ai_gateway: Optional[AIGateway] = None
+
+
+def get_ai_gateway() -> AIGateway:
+    """Ortam ayarlarına göre paylaşılan geçit."""
+    global _ai_gateway
+    if _ai_gateway is None:
+        _ai_gateway = AIGateway(
+            rate_per_minute=float(os.getenv("AI_RATE_LIMIT_RPM", "60")),
+            burst=int(os.getenv("AI_RATE_BURST", "10")),
+            max_wait=float(os.getenv("AI_RATE_MAX_WAIT", "30")),
+            max_retries=int(os.getenv("AI_MAX_RETRIES", "3")),
+            base_delay=float(os.getenv("AI_RETRY_BASE_DELAY", "1.0")),
+            max_delay=float(os.getenv("AI_RETRY_MAX_DELAY", "30")),
+            failure_threshold=int(os.getenv("AI_BREAKER_FAILURES", "5")),
+            reset_timeout=float(os.getenv("AI_BREAKER_RESET", "30"))
+        )
+    return _ai_gateway
@@ -0,0 +1,309 @@
+"""
+AI Çağrı Metrikleri
+===================
+AIService'in her metodu için:
+
+- gecikme histogramı (saniye) ve akış çağrılarında ilk parça süresi
+- prompt/yanıt karakter sayıları; yanıtta usage_metadata varsa token sayıları
+- hata, JSON ayrıştırma hatası, yarım yanıt, önbellek isabeti sayıları
+- generate_quiz_questions'ta doğrulamada elenen soru sayısı
+- mock/fallback yanıt sayısı
+
+Metrikler süreç içinde toplanır (get_ai_metrics) ve takılabilir exporter'lara
+aktarılır: InMemoryExporter (testler/benchmark'lar için anlık görüntüler) ve
+PrometheusTextfileExporter (node_exporter textfile collector'ı için .prom).
+Aktarım kayıt sırasında en fazla AI_METRICS_EXPORT_INTERVAL saniyede bir
+yapılır; ayrı bir thread açılmaz.
+
+Ayarlar: AI_METRICS_EXPORTERS ("memory", "prometheus" ya da ikisi, virgülle),
+AI_METRICS_PROM_PATH, AI_METRICS_EXPORT_INTERVAL
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from memory.file_utils import atomic_write_text
+
+# Gemini çağrıları yüzlerce ms ile onlarca saniye arasında sürer
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+COUNTERS = (
+    "calls", "errors", "parse_failures", "partial_responses", "validation_drops",
+    "fallbacks", "cache_hits", "prompt_chars", "response_chars",
+    "prompt_tokens", "response_tokens", "calls_with_usage"
+)
+
+_COUNTER_HELP = {
+    "calls": "Modele giden çağrılar",
+    "errors": "Hata ile biten çağrılar (yeniden denemelerden sonra)",
+    "parse_failures": "Ayrıştırılamayan yanıtlar",
+    "partial_responses": "Yarıda kesilmiş (kısmen kurtarılan) JSON yanıtları",
+    "validation_drops": "Doğrulamada elenen öğeler",
+    "fallbacks": "Mock/fallback ile dönen yanıtlar",
+    "cache_hits": "Önbellekten dönen yanıtlar",
+    "prompt_chars": "Prompt karakterleri",
+    "response_chars": "Yanıt karakterleri",
+    "prompt_tokens": "Prompt tokenları (usage_metadata)",
+    "response_tokens": "Yanıt tokenları (usage_metadata)",
+    "calls_with_usage": "usage_metadata içeren çağrılar",
+}
+
+
+class Histogram:
+    """Sabit kovalı histogram (Prometheus kümülatif kova biçiminde okunur)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """Kova üst sınırına göre yaklaşık yüzdelik."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets + (float("inf"),), self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative, running = [], 0
+        for n in self.counts:
+            running += n
+            cumulative.append(running)
+        return {
+            "buckets": list(zip(self.buckets + (float("inf"),), cumulative)),
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+        }
+
+
+class MetricsExporter:
+    """Exporter arayüzü: export(snapshot) anlık görüntüyü bir yere yazar."""
+
+    def export(self, snapshot: Dict[str, Any]):
+        raise NotImplementedError
+
+
+class InMemoryExporter(MetricsExporter):
+    """Son N anlık görüntüyü bellekte tutar."""
+
+    def __init__(self, keep: int = 100):
+        self.snapshots: deque = deque(maxlen=keep)
+
+    def export(self, snapshot: Dict[str, Any]):
+        self.snapshots.append(snapshot)
+
+    @property
+    def last(self) -> Optional[Dict[str, Any]]:
+        return self.snapshots[-1] if self.snapshots else None
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class PrometheusTextfileExporter(MetricsExporter):
+    """Prometheus metin biçiminde .prom dosyası yazar (benzersiz geçici dosya + os.replace)."""
+
+    def __init__(self, path: str = "data/metrics/ai_service.prom", prefix: str = "ai"):
+        self.path = Path(path)
+        self.prefix = prefix
+
+    def render(self, snapshot: Dict[str, Any]) -> str:
+        p = self.prefix
+        lines: List[str] = []
+        methods = snapshot["methods"]
+
+        for name in COUNTERS:
+            metric = f"{p}_{name}_total"
+            lines.append(f"# HELP {metric} {_COUNTER_HELP[name]}")
+            lines.append(f"# TYPE {metric} counter")
+            for method, data in sorted(methods.items()):
+                lines.append(f'{metric}{{method="{_label(method)}"}} {data["counters"].get(name, 0)}')
+
+        for hist_name, metric, help_text in (
+            ("latency", f"{p}_call_latency_seconds", "Model çağrısı süresi"),
+            ("ttft", f"{p}_stream_first_chunk_seconds", "Akışta ilk parçaya kadar geçen süre"),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for method, data in sorted(methods.items()):
+                hist = data.get(hist_name)
+                if not hist or not hist["count"]:
+                    continue
+                label = f'method="{_label(method)}"'
+                for bound, count in hist["buckets"]:
+                    lines.append(f'{metric}_bucket{{{label},le="{_number(bound)}"}} {count}')
+                lines.append(f"{metric}_sum{{{label}}} {hist['sum']}")
+                lines.append(f"{metric}_count{{{label}}} {hist['count']}")
+
+        for group, values in sorted(snapshot.get("gauges", {}).items()):
+            for name, value in sorted(values.items()):
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue
+                metric = f"{p}_{group}_{name}"
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, snapshot: Dict[str, Any]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.path, self.render(snapshot))
+
+
+class _MethodMetrics:
+    def __init__(self):
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.latency = Histogram()
+        self.ttft = Histogram()
+
+
+class AIMetrics:
+    """Metot bazında AI çağrı metrikleri (thread-safe)."""
+
+    def __init__(
+        self,
+        exporters: Optional[List[MetricsExporter]] = None,
+        export_interval: float = 15.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.exporters = list(exporters or [])
+        self.export_interval = export_interval
+        self._clock = clock
+        self._last_export = clock()
+        self._lock = threading.Lock()
+        self._methods: Dict[str, _MethodMetrics] = defaultdict(_MethodMetrics)
+        self._gauges: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def inc(self, method: str, name: str, amount: int = 1):
+        if amount:
+            with self._lock:
+                self._methods[method].counters[name] += amount
+            self._maybe_export()
+
+    def observe_call(
+        self,
+        method: str,
+        latency_s: float,
+        prompt_chars: int = 0,
+        response_chars: int = 0,
+        usage: Any = None
+    ):
+        """Bir model çağrısını kaydeder; usage: yanıtın usage_metadata'sı (varsa)."""
+        with self._lock:
+            m = self._methods[method]
+            m.counters["calls"] += 1
+            m.counters["prompt_chars"] += prompt_chars
+            m.counters["response_chars"] += response_chars
+            m.latency.observe(latency_s)
+            if usage is not None:
+                m.counters["calls_with_usage"] += 1
+                m.counters["prompt_tokens"] += int(getattr(usage, "prompt_token_count", 0) or 0)
+                m.counters["response_tokens"] += int(getattr(usage, "candidates_token_count", 0) or 0)
+        self._maybe_export()
+
+    def observe_ttft(self, method: str, seconds: float):
+        with self._lock:
+            self._methods[method].ttft.observe(seconds)
+
+    def register_gauges(self, name: str, collect: Callable[[], Dict[str, Any]]):
+        """Anlık görüntüye eklenecek gösterge grubu (ör. geçit durumu)."""
+        self._gauges[name] = collect
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            methods = {
+                method: {
+                    "counters": {name: m.counters.get(name, 0) for name in COUNTERS},
+                    "latency": m.latency.snapshot(),
+                    "ttft": m.ttft.snapshot(),
+                }
+                for method, m in self._methods.items()
+            }
+        gauges = {}
+        for name, collect in list(self._gauges.items()):
+            try:
+                gauges[name] = collect()
+            except Exception as e:
+                print(f"⚠️ Metrik göstergesi okunamadı ({name}): {e}")
+        return {"timestamp": time.time(), "methods": methods, "gauges": gauges}
+
+    def export(self):
+        """Tüm exporter'lara hemen aktarır."""
+        with self._lock:
+            self._last_export = self._clock()
+        self._export()
+
+    def _export(self):
+        if not self.exporters:
+            return
+        snapshot = self.snapshot()
+        for exporter in self.exporters:
+            try:
+                exporter.export(snapshot)
+            except Exception as e:
+                print(f"⚠️ Metrikler aktarılamadı ({type(exporter).__name__}): {e}")
+
+    def _maybe_export(self):
+        if not self.exporters:
+            return
+        # Aralık dolduğunda aktarma sırasını yalnızca bir thread alır
+        with self._lock:
+            now = self._clock()
+            if now - self._last_export < self.export_interval:
+                return
+            self._last_export = now
+        self._export()
+
+    def reset(self):
+        with self._lock:
+            self._methods.clear()
+
+
+# Singleton instance
+_ai_metrics: Optional[AIMetrics] = None
+
+
+def get_ai_metrics() -> AIMetrics:
+    """Ortam ayarlarına göre exporter'ları kurulmuş paylaşılan metrik kaydı."""
+    global _ai_metrics
+    if _ai_metrics is None:
+        exporters: List[MetricsExporter] = []
+        names = [n.strip() for n in os.getenv("AI_METRICS_EXPORTERS", "").split(",") if n.strip()]
+        for name in names:
+            if name == "memory":
+                exporters.append(InMemoryExporter())
+            elif name == "prometheus":
+                exporters.append(PrometheusTextfileExporter(
+                    os.getenv("AI_METRICS_PROM_PATH", "data/metrics/ai_service.prom")
+                ))
+            else:
+                print(f"⚠️ Bilinmeyen metrik exporter'ı: {name}")
+        _ai_metrics = AIMetrics(
+            exporters=exporters,
+            export_interval=float(os.getenv("AI_METRICS_EXPORT_INTERVAL", "15"))
+        )
+    return _ai_metrics
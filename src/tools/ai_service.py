@@ -1,6 +1,16 @@
-from typing import Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, Generator, Iterator, List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import os
 import json
+import time
+import weakref
+
+from .ai_gateway import AIGateway, get_ai_gateway
+from .ai_metrics import AIMetrics, get_ai_metrics
+from .ai_cache import ExplanationMemo, ResponseCache, get_explanation_memo, get_response_cache, make_cache_key
+from .json_salvage import PartialJSONError, extract_json
 
 try:
     import google.generativeai as genai
@@ -9,22 +19,224 @@ except ImportError:
     GEMINI_AVAILABLE = False
 
 
+# Metot bazında önbellek varsayılanları. Kişisel geçmişe dayanan ya da her
+# seferinde farklı olması istenen (quiz) çağrılar önbelleğe alınmaz.
+CACHE_POLICY = {
+    "generate_personalized_plan": True,
+    "generate_quiz_questions": False,
+    "generate_assessment_questions": False,
+    "generate_curriculum": True,
+    "generate_curriculum_outline": True,
+    "generate_week_lessons": True,
+    "analyze_performance": False,
+    "explain_topic": True,
+    "explain_wrong_answer": True,
+    "explain_wrong_answers_batch": True,
+}
+
+
 class AIService:    
-    def __init__(self, api_key: Optional[str] = None, model_name: str = "gemini-2.5-flash"):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model_name: str = "gemini-2.5-flash",
+        cache: Optional[ResponseCache] = None,
+        use_cache: bool = True,
+        cache_policy: Optional[Dict[str, bool]] = None,
+        explanation_memo: Optional[ExplanationMemo] = None,
+        gateway: Optional[AIGateway] = None,
+        metrics: Optional[AIMetrics] = None,
+        model: Any = None,
+        max_concurrency: Optional[int] = None,
+        batch_explanations: Optional[bool] = None,
+        explanation_batch_size: Optional[int] = None
+    ):
+        """
+        Args:
+            cache: yanıt önbelleği; verilmezse paylaşılan önbellek (AI_CACHE_* ayarları)
+            use_cache: False ise hiçbir çağrı önbelleğe alınmaz
+            cache_policy: metot adı → önbelleğe alınsın mı (CACHE_POLICY'yi günceller)
+            explanation_memo: yanlış cevap açıklamaları için bellek içi LRU;
+                verilmezse paylaşılan bellek (AI_EXPLANATION_MEMO_SIZE)
+            gateway: hız sınırı / yeniden deneme / devre kesici; verilmezse
+                paylaşılan geçit (AI_RATE_*, AI_RETRY_*, AI_BREAKER_* ayarları)
+            metrics: çağrı metrikleri; verilmezse paylaşılan kayıt (AI_METRICS_* ayarları)
+            model: hazır model (ör. FakeGeminiModel); verilirse API anahtarı gerekmez
+            max_concurrency: paralel model çağrısı sınırı (varsayılan: AI_MAX_CONCURRENCY veya 4)
+            batch_explanations: yanlış cevaplar toplu mu açıklansın (varsayılan: AI_BATCH_EXPLANATIONS)
+            explanation_batch_size: tek toplu çağrıdaki en fazla soru (varsayılan: AI_EXPLANATION_BATCH_SIZE veya 10)
+        """
         self.api_key = api_key or os.getenv("GEMINI_API_KEY", "")
         self.model_name = model_name
-        self.model = None
+        self.model = model
         
-        if self._is_configured() and GEMINI_AVAILABLE:
+        if self.model is None and self._is_configured() and GEMINI_AVAILABLE:
             try:
                 genai.configure(api_key=self.api_key)
                 self.model = genai.GenerativeModel(self.model_name)
             except Exception as e:
                 print(f"⚠️ Gemini API başlatılamadı: {e}")
                 self.model = None
+        
+        self.cache_policy = {**CACHE_POLICY, **(cache_policy or {})}
+        # Model yoksa mock yanıtlar döner; önbellek dosyası hiç açılmaz
+        # İki sınıf da __len__ tanımlar: boş bir örnek "falsy" olduğundan `or` kullanılmaz
+        if cache is None and use_cache and self.model:
+            cache = get_response_cache()
+        self.cache = cache if use_cache and self.model else None
+        if explanation_memo is None and use_cache:
+            explanation_memo = get_explanation_memo()
+        self.explanation_memo = explanation_memo if use_cache else None
+        self.gateway = gateway if gateway is not None else get_ai_gateway()
+        self.metrics = metrics if metrics is not None else get_ai_metrics()
+        self.metrics.register_gauges("gateway", self.gateway.metrics)
+        # Akış (stream) çağrılarında ilk parçaya kadar geçen süre (ms), son 500 çağrı
+        self.stream_ttft_ms: deque = deque(maxlen=500)
+        self.max_concurrency = max_concurrency or int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+        if batch_explanations is None:
+            batch_explanations = os.getenv("AI_BATCH_EXPLANATIONS", "true").lower() in ("1", "true", "yes")
+        self.batch_explanations = batch_explanations
+        self.explanation_batch_size = max(
+            1, explanation_batch_size or int(os.getenv("AI_EXPLANATION_BATCH_SIZE", "10"))
+        )
     
     def _is_configured(self) -> bool:
-        return bool(self.api_key)
+        # Dışarıdan verilen (ör. sahte) model anahtar gerektirmez
+        return bool(self.api_key) or self.model is not None
+    
+    def set_cache_policy(self, method: str, enabled: bool):
+        """Bir metodun yanıtlarının önbelleğe alınıp alınmayacağını ayarlar."""
+        self.cache_policy[method] = enabled
+    
+    def metrics_snapshot(self) -> Dict:
+        """Metot bazında gecikme, boyut, token, hata ve fallback metrikleri."""
+        return self.metrics.snapshot()
+    
+    def gateway_metrics(self) -> Dict:
+        """Hız sınırlayıcı, yeniden deneme ve devre kesici durumu."""
+        return self.gateway.metrics()
+    
+    def cache_stats(self) -> Dict:
+        """Önbellek isabet/ıska sayaçları (önbellek kapalıysa boş)."""
+        stats = self.cache.stats() if self.cache else {}
+        if self.explanation_memo is not None:
+            stats["explanation_memo"] = self.explanation_memo.stats()
+        return stats
+    
+    def _generate(
+        self,
+        method: str,
+        prompt: str,
+        parse: Optional[Callable[[str], Any]] = None,
+        **params
+    ) -> Any:
+        """
+        Tüm Gemini çağrılarının tek giriş noktası: önbellek → model → parse.
+        
+        parse verilirse sonucu döner ve yalnızca başarıyla ayrıştırılan yanıtlar
+        önbelleğe yazılır; verilmezse yanıt metni döner.
+        """
+        key = self._cache_key(method, prompt, params)
+        hit, result = self._from_cache(method, key, parse)
+        if hit:
+            return result
+        
+        start = time.perf_counter()
+        try:
+            response = self.gateway.call(self.model.generate_content, prompt, **params)
+        except Exception:
+            self.metrics.inc(method, "errors")
+            raise
+        return self._finish_call(method, prompt, response, start, key, parse)
+    
+    def _from_cache(self, method: str, key: Optional[str], parse: Optional[Callable[[str], Any]]) -> tuple:
+        """(bulundu_mu, sonuç): önbellekteki yanıt da aynı ayrıştırmadan geçer."""
+        if key:
+            text = self.cache.get(key, method)
+            if text is not None:
+                self.metrics.inc(method, "cache_hits")
+                return True, self._parse(method, text, parse)
+        return False, None
+    
+    def _finish_call(
+        self,
+        method: str,
+        prompt: str,
+        response: Any,
+        start: float,
+        key: Optional[str],
+        parse: Optional[Callable[[str], Any]]
+    ) -> Any:
+        """Model yanıtını kaydeder ve ayrıştırır; yalnızca ayrıştırılabilen yanıt önbelleğe yazılır."""
+        text = self._record_response(method, prompt, response, start)
+        result = self._parse(method, text, parse)
+        if key:
+            self.cache.set(key, text, method)
+        return result
+    
+    def _record_response(self, method: str, prompt: str, response: Any, start: float) -> str:
+        """Yanıt metnini döndürür; süre, boyut ve token sayılarını kaydeder."""
+        text = response.text.strip()
+        self.metrics.observe_call(
+            method, time.perf_counter() - start,
+            prompt_chars=len(prompt), response_chars=len(text),
+            usage=getattr(response, "usage_metadata", None)
+        )
+        return text
+    
+    def _parse(self, method: str, text: str, parse: Optional[Callable[[str], Any]]) -> Any:
+        if parse is None:
+            return text
+        try:
+            return parse(text)
+        except PartialJSONError:
+            self.metrics.inc(method, "partial_responses")
+            raise
+        except Exception:
+            self.metrics.inc(method, "parse_failures")
+            raise
+    
+    def _fallback(self, method: str, value: Any) -> Any:
+        """Mock/fallback yanıtı sayar ve aynen döndürür."""
+        self.metrics.inc(method, "fallbacks")
+        return value
+    
+    def _cache_key(self, method: str, prompt: str, params: Dict) -> Optional[str]:
+        """Metot önbelleğe alınıyorsa anahtarı, alınmıyorsa None döner."""
+        if self.cache is None or not self.cache_policy.get(method, False):
+            return None
+        return make_cache_key(self.model_name, prompt, params)
+    
+    # --- Akışlar ---
+    # Her metodun mantığı (prompt, fallback, yarım yanıt kurtarma, doğrulama) bir
+    # kez, model çağrılarını (method, prompt, parse) olarak yield eden bir üreteçte
+    # yazılır. _run çağrıları _generate ile, AsyncAIService._run_async ise
+    # _generate_async ile yapar; çağrının hatası üretece geri fırlatılır.
+    # Akış alt akışların listesini yield ederse bunlar paralel yürütülür ve
+    # sonuçların listesi döner.
+    
+    def _run(self, flow: Generator) -> Any:
+        """Akışı senkron yürütür ve dönüş değerini verir."""
+        try:
+            request = next(flow)
+            while True:
+                try:
+                    if isinstance(request, list):
+                        result = self._run_parallel(request)
+                    else:
+                        result = self._generate(*request)
+                except Exception as e:
+                    request = flow.throw(e)
+                else:
+                    request = flow.send(result)
+        except StopIteration as stop:
+            return stop.value
+    
+    def _run_parallel(self, flows: List[Generator]) -> List[Any]:
+        if len(flows) <= 1:
+            return [self._run(flow) for flow in flows]
+        with ThreadPoolExecutor(max_workers=min(len(flows), self.max_concurrency)) as pool:
+            return list(pool.map(self._run, flows))
     
     def generate_personalized_plan(
         self, 
@@ -32,9 +244,510 @@ class AIService:
         resources: List[Dict],
         day: int = 1
     ) -> Dict:
+        return self._run(self._plan_flow(profile, resources, day))
+    
+    def _plan_flow(self, profile: Dict, resources: List[Dict], day: int) -> Generator:
+        if not self.model:
+            return self._fallback("generate_personalized_plan", self._mock_plan(profile, resources, day))
+        
+        prompt = self._plan_prompt(profile, resources, day)
+        
+        try:
+            return (yield "generate_personalized_plan", prompt, extract_json)
+        
+        except Exception as e:
+            print(f"⚠️ AI plan oluşturma hatası: {e}")
+            return self._fallback("generate_personalized_plan", self._mock_plan(profile, resources, day))
+    
+    def generate_quiz_questions(
+        self, 
+        topic: str, 
+        level: str = "beginner",
+        num_questions: int = 10,
+        goal: str = ""
+    ) -> List[Dict]:
+        return self._run(self._quiz_flow(topic, level, num_questions, goal))
+    
+    def _quiz_flow(self, topic: str, level: str, num_questions: int, goal: str) -> Generator:
+        if not self.model:
+            return self._fallback("generate_quiz_questions", self._mock_quiz(topic, num_questions))
+        
+        prompt = self._quiz_prompt(topic, level, num_questions, goal)
+        
+        try:
+            try:
+                questions = yield "generate_quiz_questions", prompt, extract_json
+            except PartialJSONError as e:
+                print(f"⚠️ Quiz yanıtı yarım kaldı, {len(e.value)} soru kurtarıldı")
+                questions = e.value
+            
+            # Eksik kalan sorular için yalnızca eksik sayıda soru iste
+            valid = self._filter_quiz_questions(questions, topic)
+            missing = num_questions - len(valid)
+            if valid and missing > 0:
+                prompt = self._missing_questions_prompt(topic, level, missing, goal, valid)
+                try:
+                    extra = yield "generate_quiz_questions", prompt, extract_json
+                except PartialJSONError as e:
+                    extra = e.value
+                except Exception as e:
+                    print(f"⚠️ Eksik quiz soruları alınamadı: {e}")
+                    extra = []
+                valid = self._merge_quiz_questions(valid, extra, topic, missing)
+            
+            return self._validate_quiz(valid, topic, num_questions)
+        
+        except json.JSONDecodeError as e:
+            print(f"⚠️ Quiz JSON parse hatası: {e}")
+            return self._fallback("generate_quiz_questions", self._mock_quiz(topic, num_questions))
+        except Exception as e:
+            print(f"⚠️ Quiz oluşturma hatası: {e}")
+            return self._fallback("generate_quiz_questions", self._mock_quiz(topic, num_questions))
+    
+    def _merge_quiz_questions(self, valid: List[Dict], extra: Any, topic: str, missing: int) -> List[Dict]:
+        """Tamamlama sorularını ekler (tekrar edenler atlanır) ve question_id'leri yeniden numaralar."""
+        seen = {q["question"] for q in valid}
+        extra = [q for q in self._filter_quiz_questions(extra, topic) if q["question"] not in seen]
+        merged = valid + extra[:missing]
+        for idx, q in enumerate(merged):
+            q["question_id"] = f"q{idx + 1}"
+        return merged
+    
+    def generate_assessment_questions(
+        self, 
+        topic: str, 
+        num_questions: int = 10
+    ) -> List[Dict]:
+        """Seviye belirleme soruları üretir."""
+        return self._run(self._assessment_flow(topic, num_questions))
+    
+    def _assessment_flow(self, topic: str, num_questions: int) -> Generator:
+        if not self.model:
+            return self._fallback("generate_assessment_questions", self._mock_quiz(topic, num_questions))
+            
+        prompt = self._assessment_prompt(topic, num_questions)
+        
+        try:
+            questions = yield "generate_assessment_questions", prompt, extract_json
+            
+            return self._normalize_assessment(questions, topic, num_questions)
+            
+        except Exception as e:
+            print(f"⚠️ Assessment oluşturma hatası: {e}")
+            return self._fallback("generate_assessment_questions", self._mock_quiz(topic, num_questions))
+    
+    def generate_curriculum(
+        self, 
+        goal: str, 
+        level: str = "beginner", 
+        duration_weeks: int = 4
+    ) -> Dict:
+        """Kullanıcı için tam kapsamlı müfredat oluşturur."""
+        return self._run(self._curriculum_flow(goal, level, duration_weeks))
+    
+    def _curriculum_flow(self, goal: str, level: str, duration_weeks: int) -> Generator:
+        if not self.model:
+            print("⚠️ AI modeli yok, mock veri dönülüyor")
+            return self._fallback("generate_curriculum", {})  # RoadmapAgent fallback kullanacak
+            
+        prompt = self._curriculum_prompt(goal, level, duration_weeks)
+        
+        try:
+            return (yield "generate_curriculum", prompt, extract_json)
+        
+        except PartialJSONError as e:
+            partial = e.value
+        except Exception as e:
+            print(f"⚠️ Müfredat oluşturma hatası: {e}")
+            return self._fallback("generate_curriculum", {})  # RoadmapAgent fallback kullanacak
+        return (yield from self._complete_curriculum(partial, goal, level, duration_weeks))
+    
+    def _complete_curriculum(self, partial: Any, goal: str, level: str, duration_weeks: int) -> Generator:
+        """Yarım müfredat yanıtını tamamlar: yalnızca eksik günler tekrar istenir."""
+        curriculum = partial if isinstance(partial, dict) else {"daily_lessons": partial}
+        lessons = self._valid_lessons(curriculum.get("daily_lessons"))
+        total = duration_weeks * 7
+        print(f"⚠️ Müfredat yanıtı yarım kaldı ({len(lessons)}/{total} gün kurtarıldı)")
+        
+        if lessons and len(lessons) < total:
+            prompt = self._curriculum_rest_prompt(goal, level, duration_weeks, lessons)
+            try:
+                rest = yield "generate_curriculum", prompt, extract_json
+            except PartialJSONError as e:
+                rest = e.value
+            except Exception as e:
+                print(f"⚠️ Kalan günler alınamadı: {e}")
+                rest = []
+            if isinstance(rest, dict):
+                rest = rest.get("daily_lessons")
+            lessons += self._valid_lessons(rest)
+        
+        lessons = lessons[:total]
+        for idx, lesson in enumerate(lessons):
+            lesson["day"] = idx + 1
+        return {
+            "goal": curriculum.get("goal", goal),
+            "level": curriculum.get("level", level),
+            "duration_weeks": duration_weeks,
+            "summary": curriculum.get("summary", f"{goal} için {duration_weeks} haftalık program."),
+            "daily_lessons": lessons
+        }
+    
+    @staticmethod
+    def _valid_lessons(lessons: Any) -> List[Dict]:
+        return [
+            lesson for lesson in (lessons if isinstance(lessons, list) else [])
+            if isinstance(lesson, dict) and lesson.get("theme") and isinstance(lesson.get("tasks"), list)
+        ]
+    
+    def generate_curriculum_outline(
+        self,
+        goal: str,
+        level: str = "beginner",
+        duration_weeks: int = 4
+    ) -> Dict:
+        """
+        Müfredatın haftalık ana hatlarını üretir (günlük dersler olmadan).
+        
+        Returns:
+            {"goal", "level", "duration_weeks", "summary", "weeks": [{"week", "focus", "topics"}]};
+            hata durumunda {}
+        """
+        if not self.model:
+            return {}
+        
+        prompt = self._outline_prompt(goal, level, duration_weeks)
+        try:
+            return self._generate("generate_curriculum_outline", prompt, parse=self._parse_outline)
+        except Exception as e:
+            print(f"⚠️ Müfredat taslağı oluşturma hatası: {e}")
+            return {}
+    
+    def generate_week_lessons(self, goal: str, level: str, week: Dict, outline: Dict) -> List[Dict]:
+        """
+        Taslaktaki bir haftanın 7 günlük derslerini üretir.
+        
+        Yanıt yarım gelirse yalnızca eksik günler yeniden istenir.
+        
+        Returns:
+            Hafta içi sıralı ders listesi; kalan günler de alınamazsa 7'den
+            az gün (kurtarılanlar), hiç geçerli gün yoksa []
+        """
+        if not self.model:
+            return []
+        
+        prompt = self._week_prompt(goal, level, week, outline)
+        try:
+            return self._generate("generate_week_lessons", prompt, parse=self._parse_week_lessons)
+        except PartialJSONError as e:
+            lessons = e.value
+        except Exception as e:
+            print(f"⚠️ {week.get('week')}. hafta dersleri oluşturulamadı: {e}")
+            return []
+        if not lessons:
+            print(f"⚠️ {week.get('week')}. hafta dersleri oluşturulamadı: yanıtta geçerli gün yok")
+            return []
+        
+        # Yalnızca eksik günleri iste
+        start_day = len(lessons) + 1
+        print(f"⚠️ {week.get('week')}. hafta yarım geldi ({len(lessons)}/7 gün), kalan günler isteniyor")
+        prompt = self._week_prompt(goal, level, week, outline, start_day=start_day, previous=lessons)
+        try:
+            rest = self._generate(
+                "generate_week_lessons", prompt,
+                parse=lambda text: self._parse_week_lessons(text, expected=8 - start_day)
+            )
+        except PartialJSONError as e:
+            print(f"⚠️ {week.get('week')}. haftanın kalan günleri de yarım geldi: {e}")
+            rest = e.value
+        except Exception as e:
+            # Kurtarılan günler atılmaz; eksikleri çağıran tamamlar
+            print(f"⚠️ {week.get('week')}. haftanın kalan günleri alınamadı: {e}")
+            rest = []
+        return lessons + rest
+    
+    @staticmethod
+    def _parse_outline(text: str) -> Dict:
+        outline = extract_json(text)
+        if not isinstance(outline, dict) or not isinstance(outline.get("weeks"), list) or not outline["weeks"]:
+            raise ValueError("taslakta hafta listesi yok")
+        return outline
+    
+    @classmethod
+    def _parse_week_lessons(cls, text: str, expected: int = 7) -> List[Dict]:
+        """Günleri ayrıştırır; expected'dan az geçerli gün varsa PartialJSONError (kurtarılanlarla)."""
+        try:
+            lessons = extract_json(text)
+        except PartialJSONError as e:
+            lessons = e.value
+        if isinstance(lessons, dict):
+            lessons = lessons.get("daily_lessons", [])
+        valid = cls._valid_lessons(lessons)
+        if len(valid) < expected:
+            raise PartialJSONError(valid, f"haftada {expected} yerine {len(valid)} geçerli gün var")
+        return valid[:expected]
+    
+    def analyze_performance(self, performance_history: List[Dict]) -> Dict:
+        return self._run(self._analysis_flow(performance_history))
+    
+    def _analysis_flow(self, performance_history: List[Dict]) -> Generator:
+        if not self.model or not performance_history:
+            return self._fallback("analyze_performance", self._mock_analysis(performance_history))
+        
+        prompt = self._analysis_prompt(performance_history)
+        
+        try:
+            return (yield "analyze_performance", prompt, extract_json)
+        
+        except Exception as e:
+            print(f"⚠️ Performans analizi hatası: {e}")
+            return self._fallback("analyze_performance", self._mock_analysis(performance_history))
+    
+    def explain_topic(self, topic: str, level: str = "beginner", goal: str = "") -> str:
+        return self._run(self._topic_flow(topic, level, goal))
+    
+    def _topic_flow(self, topic: str, level: str, goal: str) -> Generator:
+        if not self.model:
+            return self._fallback("explain_topic", f"📚 {topic} konusu hakkında bilgi: Bu konu {level} seviyesinde öğrenilecektir.")
+        
+        prompt = self._topic_prompt(topic, level, goal)
+        
+        try:
+            return (yield "explain_topic", prompt, None)
+        except Exception as e:
+            return self._fallback("explain_topic", f"📚 {topic} konusu hakkında bilgi alınamadı: {e}")
+    
+    def explain_topic_stream(
+        self, topic: str, level: str = "beginner", goal: str = "", fallback: bool = True
+    ) -> Iterator[str]:
+        """
+        explain_topic'in akış hali: Gemini'den gelen metin parçalarını geldikçe verir.
+        
+        Tam metin akış bitince explain_topic ile aynı anahtarla önbelleğe yazılır;
+        önbellekte varsa tek parça olarak döner. İlk parçanın gelme süresi
+        stream_ttft_ms'e ve metriklere (explain_topic_stream) eklenir.
+        fallback=False ise hata fallback metni yerine çağırana iletilir; böylece
+        yarım kalan akış tamamlanandan ayırt edilebilir.
+        """
+        method = "explain_topic_stream"
+        if not self.model:
+            if not fallback:
+                raise RuntimeError("AI modeli yapılandırılmamış")
+            yield self._fallback(method, f"📚 {topic} konusu hakkında bilgi: Bu konu {level} seviyesinde öğrenilecektir.")
+            return
+        
+        prompt = self._topic_prompt(topic, level, goal)
+        key = self._cache_key("explain_topic", prompt, {})
+        if key:
+            cached = self.cache.get(key, "explain_topic")
+            if cached is not None:
+                self.metrics.inc(method, "cache_hits")
+                yield cached
+                return
+        
+        parts: List[str] = []
+        usage = None
+        start = time.perf_counter()
+        try:
+            for chunk in self.gateway.stream(self.model.generate_content, prompt, stream=True):
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                text = chunk.text
+                if not text:
+                    continue
+                if not parts:
+                    ttft = time.perf_counter() - start
+                    self.stream_ttft_ms.append(ttft * 1000)
+                    self.metrics.observe_ttft(method, ttft)
+                parts.append(text)
+                yield text
+        except Exception as e:
+            self.metrics.inc(method, "errors")
+            if not fallback:
+                raise
+            if not parts:
+                yield self._fallback(method, f"📚 {topic} konusu hakkında bilgi alınamadı: {e}")
+            else:
+                print(f"⚠️ İçerik akışı yarıda kesildi: {e}")
+            return  # yarım metin önbelleğe yazılmaz
+        
+        full_text = "".join(parts).strip()
+        self.metrics.observe_call(
+            method, time.perf_counter() - start,
+            prompt_chars=len(prompt), response_chars=len(full_text), usage=usage
+        )
+        if key and full_text:
+            self.cache.set(key, full_text, "explain_topic")
+    
+    def stream_stats(self) -> Dict:
+        """Akış çağrılarının ilk parça süresi özeti (ms)."""
+        samples = sorted(self.stream_ttft_ms)
+        if not samples:
+            return {"streams": 0}
+        return {
+            "streams": len(samples),
+            "ttft_p50_ms": round(samples[len(samples) // 2], 1),
+            "ttft_p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))], 1),
+            "ttft_max_ms": round(samples[-1], 1)
+        }
+    
+    def explain_wrong_answer(
+        self, 
+        question: str, 
+        user_answer: str, 
+        correct_answer: str, 
+        topic: str = "",
+        level: str = "beginner"
+    ) -> str:
+        """
+        Yanlış cevap için açıklama üretir.
+        
+        Açıklamalar (soru, cevap, doğru cevap, seviye) anahtarıyla bellekte
+        tutulur: sayfa yeniden çalıştığında ya da başka bir kullanıcı aynı
+        hatayı yaptığında API'ye gidilmez.
+        """
+        return self._run(self._wrong_answer_flow(question, user_answer, correct_answer, topic, level))
+    
+    def _wrong_answer_flow(
+        self, question: str, user_answer: str, correct_answer: str, topic: str, level: str
+    ) -> Generator:
         if not self.model:
-            return self._mock_plan(profile, resources, day)
+            return self._fallback("explain_wrong_answer", f"Doğru cevap: {correct_answer}. Konuyu tekrar gözden geçirin.")
+        
+        memo_key = ExplanationMemo.make_key(question, user_answer, correct_answer, level)
+        cached = self._memo_get(memo_key)
+        if cached is not None:
+            return cached
+        
+        prompt = self._wrong_answer_prompt(question, user_answer, correct_answer, topic, level)
+        
+        try:
+            explanation = yield "explain_wrong_answer", prompt, None
+        except Exception:
+            return self._fallback("explain_wrong_answer", f"Doğru cevap: {correct_answer}. Bu konuyu tekrar gözden geçirmenizi öneririz.")
+        self._memo_set(memo_key, explanation)
+        return explanation
+    
+    def explain_wrong_answers_batch(
+        self,
+        items: List[Dict],
+        topic: str = "",
+        level: str = "beginner",
+        batch: Optional[bool] = None
+    ) -> Dict[str, str]:
+        """
+        Birden fazla yanlış cevabı toplu çağrılarla açıklar.
+        
+        Args:
+            items: {"id", "question", "user_answer", "correct_answer", "topic"?} sözlükleri;
+                id yoksa sıra numarası (1'den) kullanılır
+            batch: False ise her soru ayrı çağrıyla, paralel açıklanır
+                (varsayılan: batch_explanations)
+        
+        Returns:
+            id → açıklama. Sorular explanation_batch_size'lık gruplar halinde
+            açıklanır; toplu yanıtta eksik kalan ya da ayrıştırılamayan sorular
+            tek tek açıklanır.
+        """
+        return self._run(self._wrong_answers_flow(items, topic, level, batch))
+    
+    def _wrong_answers_flow(self, items: List[Dict], topic: str, level: str, batch: Optional[bool]) -> Generator:
+        keyed = self._key_wrong_answers(items)
+        if not keyed:
+            return {}
+        if batch is None:
+            batch = self.batch_explanations
         
+        explanations = self._memoized_explanations(keyed, level)
+        pending = [key for key in keyed if key not in explanations]
+        if self.model and batch and len(pending) > 1:
+            size = self.explanation_batch_size
+            groups = [{key: keyed[key] for key in pending[i:i + size]} for i in range(0, len(pending), size)]
+            for fresh in (yield [self._wrong_answers_group_flow(group, topic, level) for group in groups]):
+                explanations.update(fresh)
+        
+        missing = [key for key in keyed if not explanations.get(key)]
+        if missing:
+            results = yield [
+                self._wrong_answer_flow(
+                    keyed[key].get("question", ""), keyed[key].get("user_answer", ""),
+                    keyed[key].get("correct_answer", ""), keyed[key].get("topic") or topic, level
+                )
+                for key in missing
+            ]
+            explanations.update(zip(missing, results))
+        return {key: explanations[key] for key in keyed}
+    
+    def _wrong_answers_group_flow(self, group: Dict[str, Dict], topic: str, level: str) -> Generator:
+        """Bir grup soruyu tek çağrıda açıklar; ayrıştırılamayanlar sonuçta yer almaz."""
+        prompt = self._wrong_answers_batch_prompt(group, topic, level)
+        try:
+            fresh = yield (
+                "explain_wrong_answers_batch", prompt,
+                lambda text: self._parse_batch_explanations(text, group)
+            )
+        except PartialJSONError as e:
+            fresh = e.value
+        except Exception as e:
+            fresh = {}
+            print(f"⚠️ Toplu açıklama ayrıştırılamadı, sorular tek tek açıklanıyor: {e}")
+        self._memoize_explanations(group, fresh, level)
+        return fresh
+    
+    def _memo_get(self, memo_key: tuple) -> Optional[str]:
+        return self.explanation_memo.get(memo_key) if self.explanation_memo is not None else None
+    
+    def _memo_set(self, memo_key: tuple, explanation: str):
+        if self.explanation_memo is not None:
+            self.explanation_memo.set(memo_key, explanation)
+    
+    @staticmethod
+    def _item_memo_key(item: Dict, level: str) -> tuple:
+        return ExplanationMemo.make_key(
+            item.get("question", ""), item.get("user_answer", ""), item.get("correct_answer", ""), level
+        )
+    
+    def _memoized_explanations(self, keyed: Dict[str, Dict], level: str) -> Dict[str, str]:
+        """Bellekte açıklaması olan soruları döndürür (model yoksa boş)."""
+        if not self.model or self.explanation_memo is None:
+            return {}
+        found = {}
+        for key, item in keyed.items():
+            cached = self.explanation_memo.get(self._item_memo_key(item, level))
+            if cached is not None:
+                found[key] = cached
+        return found
+    
+    def _memoize_explanations(self, keyed: Dict[str, Dict], explanations: Dict[str, str], level: str):
+        for key, explanation in explanations.items():
+            self._memo_set(self._item_memo_key(keyed[key], level), explanation)
+    
+    @staticmethod
+    def _key_wrong_answers(items: List[Dict]) -> Dict[str, Dict]:
+        return {str(item.get("id", idx + 1)): item for idx, item in enumerate(items)}
+    
+    @staticmethod
+    def _parse_batch_explanations(text: str, keyed: Dict[str, Dict]) -> Dict[str, str]:
+        """{"id": "açıklama"} ya da [{"id", "explanation"}] yanıtını id → açıklama'ya çevirir."""
+        try:
+            data, complete = extract_json(text), True
+        except PartialJSONError as e:
+            data, complete = e.value, False
+        if isinstance(data, list):
+            data = {str(entry.get("id")): entry.get("explanation") for entry in data if isinstance(entry, dict)}
+        if not isinstance(data, dict):
+            raise ValueError("toplu açıklama yanıtı nesne değil")
+        result = {str(key): value.strip() for key, value in data.items()
+                  if str(key) in keyed and isinstance(value, str) and value.strip()}
+        if not result:
+            raise ValueError("toplu açıklama yanıtında geçerli açıklama yok")
+        if not complete:
+            raise PartialJSONError(result)
+        return result
+    
+    # --- Prompt oluşturucular (senkron ve asenkron yollar ortak kullanır) ---
+    
+    def _plan_prompt(self, profile: Dict, resources: List[Dict], day: int) -> str:
+        """Günlük plan prompt'u."""
         prompt = f"""
         Bir öğrenci için kişiselleştirilmiş günlük çalışma planı oluştur.
         
@@ -65,33 +778,10 @@ class AIService:
         
         Sadece JSON döndür, başka açıklama ekleme.
         """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            text = response.text.strip()
-            
-            # JSON'u ayıkla
-            if "```json" in text:
-                text = text.split("```json")[1].split("```")[0]
-            elif "```" in text:
-                text = text.split("```")[1].split("```")[0]
-            
-            return json.loads(text)
-        
-        except Exception as e:
-            print(f"⚠️ AI plan oluşturma hatası: {e}")
-            return self._mock_plan(profile, resources, day)
+        return prompt
     
-    def generate_quiz_questions(
-        self, 
-        topic: str, 
-        level: str = "beginner",
-        num_questions: int = 10,
-        goal: str = ""
-    ) -> List[Dict]:
-        if not self.model:
-            return self._mock_quiz(topic, num_questions)
-        
+    def _quiz_prompt(self, topic: str, level: str, num_questions: int, goal: str) -> str:
+        """Günlük quiz prompt'u."""
         level_desc = {
             "beginner": "başlangıç seviyesi - temel kavramlar",
             "intermediate": "orta seviye - uygulama ve pratik bilgi",
@@ -139,60 +829,10 @@ JSON formatında döndür:
 
 SADECE JSON döndür.
 """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            text = response.text.strip()
-            
-            # JSON'u ayıkla
-            if "```json" in text:
-                text = text.split("```json")[1].split("```")[0]
-            elif "```" in text:
-                text = text.split("```")[1].split("```")[0]
-            
-            text = text.strip()
-            questions = json.loads(text)
-            
-            # Validasyon
-            if not isinstance(questions, list) or len(questions) == 0:
-                print(f"⚠️ AI geçersiz format döndürdü, mock quiz kullanılıyor")
-                return self._mock_quiz(topic, num_questions)
-            
-            # Her sorunun gerekli alanları olduğunu kontrol et
-            valid_questions = []
-            for q in questions:
-                if all(key in q for key in ["question_id", "question", "options", "correct_answer"]):
-                    # options listesinde correct_answer var mı kontrol et
-                    if q["correct_answer"] in q["options"]:
-                        # topic alanı yoksa ekle
-                        if "topic" not in q:
-                            q["topic"] = topic
-                        valid_questions.append(q)
-                    else:
-                        print(f"⚠️ Soru atlandı: Doğru cevap seçeneklerde yok - {q.get('question', '')[:50]}")
-            
-            if len(valid_questions) >= num_questions // 2:
-                return valid_questions[:num_questions]
-            else:
-                print(f"⚠️ Yeterli geçerli soru üretilemedi ({len(valid_questions)}/{num_questions}), mock quiz kullanılıyor")
-                return self._mock_quiz(topic, num_questions)
-        
-        except json.JSONDecodeError as e:
-            print(f"⚠️ Quiz JSON parse hatası: {e}")
-            return self._mock_quiz(topic, num_questions)
-        except Exception as e:
-            print(f"⚠️ Quiz oluşturma hatası: {e}")
-            return self._mock_quiz(topic, num_questions)
-
-    def generate_assessment_questions(
-        self, 
-        topic: str, 
-        num_questions: int = 10
-    ) -> List[Dict]:
-        """Seviye belirleme soruları üretir."""
-        if not self.model:
-            return self._mock_quiz(topic, num_questions)
-            
+        return prompt
+    
+    def _assessment_prompt(self, topic: str, num_questions: int) -> str:
+        """Seviye belirleme prompt'u."""
         prompt = f"""
         "{topic}" konusu için kullanıcının bilgi seviyesini belirlemek üzere {num_questions} adet test sorusu oluştur.
 
@@ -217,39 +857,10 @@ SADECE JSON döndür.
         
         SADECE JSON output ver. Markdown bloğu kullanma.
         """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            text = response.text.strip()
-            
-            # JSON temizleme
-            text = text.replace("```json", "").replace("```", "").strip()
-            
-            questions = json.loads(text)
-            
-            if isinstance(questions, list) and len(questions) > 0:
-                for idx, q in enumerate(questions):
-                    if "id" not in q: q["id"] = str(idx+1)
-                    if "difficulty" not in q: q["difficulty"] = "medium"
-                return questions[:num_questions]
-            
-            return self._mock_quiz(topic, num_questions)
-            
-        except Exception as e:
-            print(f"⚠️ Assessment oluşturma hatası: {e}")
-            return self._mock_quiz(topic, num_questions)
+        return prompt
     
-    def generate_curriculum(
-        self, 
-        goal: str, 
-        level: str = "beginner", 
-        duration_weeks: int = 4
-    ) -> Dict:
-        """Kullanıcı için tam kapsamlı müfredat oluşturur."""
-        if not self.model:
-            print("⚠️ AI modeli yok, mock veri dönülüyor")
-            return {} # RoadmapAgent fallback kullanacak
-            
+    def _curriculum_prompt(self, goal: str, level: str, duration_weeks: int) -> str:
+        """Müfredat prompt'u."""
         prompt = f"""
         "{goal}" hedefi için {level} seviyesinde {duration_weeks} haftalık detaylı bir öğrenme müfredatı oluştur.
         
@@ -287,27 +898,152 @@ SADECE JSON döndür.
         
         SADECE JSON döndür. Markdown bloğu kullanma.
         """
+        return prompt
+    
+    def _outline_prompt(self, goal: str, level: str, duration_weeks: int) -> str:
+        """Haftalık müfredat taslağı prompt'u."""
+        prompt = f"""
+        "{goal}" hedefi için {level} seviyesinde {duration_weeks} haftalık bir öğrenme müfredatının HAFTALIK ana hatlarını oluştur.
+        
+        GEREKSINIMLER:
+        1. Tam olarak {duration_weeks} hafta olsun; "week" alanı 1'den {duration_weeks}'e kadar gitmeli.
+        2. Her hafta için bir odak konusu ve o hafta işlenecek 7 alt konu yaz (her gün için bir tane).
+        3. Haftalar kolaydan zora ilerlesin, konular tekrar etmesin.
+        4. Türkçe çıktı ver.
+        
+        Aşağıdaki JSON formatında çıktı ver:
+        {{
+            "goal": "{goal}",
+            "level": "{level}",
+            "duration_weeks": {duration_weeks},
+            "summary": "Müfredat özeti...",
+            "weeks": [
+                {{
+                    "week": 1,
+                    "focus": "Haftanın odağı",
+                    "topics": ["1. gün konusu", "2. gün konusu", "..."]
+                }}
+            ]
+        }}
+        
+        SADECE JSON döndür. Markdown bloğu kullanma.
+        """
+        return prompt
+    
+    def _week_prompt(
+        self,
+        goal: str,
+        level: str,
+        week: Dict,
+        outline: Dict,
+        start_day: int = 1,
+        previous: Optional[List[Dict]] = None
+    ) -> str:
+        """Tek bir haftanın günlük dersleri prompt'u (start_day > 1: yalnızca kalan günler)."""
+        week_no = week.get("week")
+        plan = "\n".join(
+            f"        - {w.get('week')}. hafta: {w.get('focus', '')}" for w in outline.get("weeks", [])
+        )
+        topics = ", ".join(str(t) for t in week.get("topics", []))
+        if start_day > 1:
+            done = ", ".join(str(lesson.get("theme", "")) for lesson in previous or [])
+            count_rule = (f"Bu haftanın ilk {start_day - 1} günü hazır ({done}). Yalnızca kalan "
+                          f"{8 - start_day} günü oluştur; \"day\" alanı {start_day}'den 7'ye kadar gitmeli.")
+        else:
+            count_rule = 'Tam olarak 7 günlük ders oluştur; "day" alanı 1\'den 7\'ye kadar gitmeli.'
         
-        try:
-            response = self.model.generate_content(prompt)
-            text = response.text.strip()
-            
-            # JSON temizleme
-            if "```json" in text:
-                text = text.split("```json")[1].split("```")[0]
-            elif "```" in text:
-                text = text.split("```")[1].split("```")[0]
-            
-            text = text.strip()
-            return json.loads(text)
-            
-        except Exception as e:
-            print(f"⚠️ Müfredat oluşturma hatası: {e}")
-            return {} # RoadmapAgent fallback kullanacak
-    def analyze_performance(self, performance_history: List[Dict]) -> Dict:
-        if not self.model or not performance_history:
-            return self._mock_analysis(performance_history)
+        prompt = f"""
+        "{goal}" hedefi için {level} seviyesindeki {outline.get('duration_weeks', len(outline.get('weeks', [])))} haftalık müfredatın {week_no}. haftasının günlük derslerini oluştur.
+        
+        Müfredatın haftalık planı:
+{plan}
+        
+        BU HAFTANIN ODAĞI: {week.get('focus', '')}
+        BU HAFTANIN KONULARI: {topics}
+        
+        GEREKSINIMLER:
+        1. {count_rule}
+        2. Her gün için belirli bir tema ve 3-4 görev olsun.
+        3. Görev tipleri: "theory" (okuma/izleme), "practice" (uygulama), "quiz" (test).
+        4. Diğer haftaların konularını tekrar etme.
+        5. Türkçe çıktı ver.
+        
+        Aşağıdaki JSON formatında çıktı ver:
+        [
+            {{
+                "day": {start_day},
+                "theme": "Günün konusu",
+                "objectives": ["Hedef 1", "Hedef 2"],
+                "tip": "Günün ipucu",
+                "tasks": [
+                    {{
+                        "task": "Görev başlığı",
+                        "type": "theory/practice/quiz",
+                        "duration_min": 20,
+                        "description": "Detaylı açıklama"
+                    }}
+                ]
+            }}
+        ]
+        
+        SADECE JSON döndür. Markdown bloğu kullanma.
+        """
+        return prompt
+    
+    def _curriculum_rest_prompt(self, goal: str, level: str, duration_weeks: int, lessons: List[Dict]) -> str:
+        """Yarım kalan müfredatın yalnızca eksik günleri için prompt."""
+        total = duration_weeks * 7
+        start_day = len(lessons) + 1
+        recent = ", ".join(str(lesson.get("theme", "")) for lesson in lessons[-7:])
+        
+        prompt = f"""
+        "{goal}" hedefi için {level} seviyesinde {duration_weeks} haftalık ({total} günlük) bir müfredatın ilk {start_day - 1} günü hazır.
+        Son günlerin konuları: {recent}
+        
+        Yalnızca {start_day}. günden {total}. güne kadar olan günleri oluştur.
+        
+        GEREKSINIMLER:
+        1. "day" alanı {start_day}'den {total}'ye kadar gitmeli.
+        2. Her gün için belirli bir tema ve 3-4 görev olsun.
+        3. Görev tipleri: "theory" (okuma/izleme), "practice" (uygulama), "quiz" (test).
+        4. Önceki günlerin konularını tekrar etme.
+        5. Türkçe çıktı ver.
+        
+        Aşağıdaki JSON formatında bir dizi döndür:
+        [
+            {{
+                "day": {start_day},
+                "theme": "Günün konusu",
+                "objectives": ["Hedef 1", "Hedef 2"],
+                "tip": "Günün ipucu",
+                "tasks": [
+                    {{
+                        "task": "Görev başlığı",
+                        "type": "theory/practice/quiz",
+                        "duration_min": 20,
+                        "description": "Detaylı açıklama"
+                    }}
+                ]
+            }}
+        ]
         
+        SADECE JSON döndür. Markdown bloğu kullanma.
+        """
+        return prompt
+    
+    def _missing_questions_prompt(
+        self, topic: str, level: str, missing: int, goal: str, existing: List[Dict]
+    ) -> str:
+        """Yarım kalan quiz için yalnızca eksik sayıda soru isteyen prompt."""
+        asked = "\n".join(f"- {q['question']}" for q in existing)
+        prompt = self._quiz_prompt(topic, level, missing, goal) + f"""
+Şu sorular zaten hazır, bunları TEKRARLAMA:
+{asked}
+"""
+        return prompt
+    
+    def _analysis_prompt(self, performance_history: List[Dict]) -> str:
+        """Performans analizi prompt'u."""
         prompt = f"""
         Bir öğrencinin performans geçmişini analiz et ve öneriler sun.
         
@@ -325,26 +1061,10 @@ SADECE JSON döndür.
         
         Sadece JSON döndür.
         """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            text = response.text.strip()
-            
-            if "```json" in text:
-                text = text.split("```json")[1].split("```")[0]
-            elif "```" in text:
-                text = text.split("```")[1].split("```")[0]
-            
-            return json.loads(text)
-        
-        except Exception as e:
-            print(f"⚠️ Performans analizi hatası: {e}")
-            return self._mock_analysis(performance_history)
+        return prompt
     
-    def explain_topic(self, topic: str, level: str = "beginner", goal: str = "") -> str:
-        if not self.model:
-            return f"📚 {topic} konusu hakkında bilgi: Bu konu {level} seviyesinde öğrenilecektir."
-        
+    def _topic_prompt(self, topic: str, level: str, goal: str) -> str:
+        """Konu anlatımı prompt'u."""
         level_desc = {
             "beginner": "yeni başlayan birine basit ve anlaşılır şekilde",
             "intermediate": "temel bilgisi olan birine orta düzeyde detaylı",
@@ -373,25 +1093,10 @@ YAPILANDIRMA:
 
 Sadece içeriği döndür, başka açıklama ekleme.
 """
-        
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
-        except Exception as e:
-            return f"📚 {topic} konusu hakkında bilgi alınamadı: {e}"
+        return prompt
     
-    def explain_wrong_answer(
-        self, 
-        question: str, 
-        user_answer: str, 
-        correct_answer: str, 
-        topic: str = "",
-        level: str = "beginner"
-    ) -> str:
-        """Yanlış cevap için açıklama üretir."""
-        if not self.model:
-            return f"Doğru cevap: {correct_answer}. Konuyu tekrar gözden geçirin."
-        
+    def _wrong_answer_prompt(self, question: str, user_answer: str, correct_answer: str, topic: str, level: str) -> str:
+        """Yanlış cevap açıklaması prompt'u."""
         prompt = f"""
 Bir öğrenci quiz sorusuna yanlış cevap verdi. Ona yardımcı ol.
 
@@ -410,12 +1115,90 @@ Lütfen:
 KISA VE NET AÇIKLA (maksimum 3-4 cümle).
 Türkçe yaz.
 """
+        return prompt
+    
+    def _wrong_answers_batch_prompt(self, keyed: Dict[str, Dict], topic: str, level: str) -> str:
+        """Toplu yanlış cevap açıklaması prompt'u."""
+        blocks = []
+        for key, item in keyed.items():
+            item_topic = item.get("topic") or topic
+            blocks.append(
+                f"[{key}]\n"
+                f"SORU: {item.get('question', '')}\n"
+                f"ÖĞRENCİNİN CEVABI: {item.get('user_answer', '')}\n"
+                f"DOĞRU CEVAP: {item.get('correct_answer', '')}"
+                + (f"\nKONU: {item_topic}" if item_topic else "")
+            )
+        questions = "\n\n".join(blocks)
+        example = ", ".join(f'"{key}": "Açıklama"' for key in keyed)
         
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text.strip()
-        except Exception as e:
-            return f"Doğru cevap: {correct_answer}. Bu konuyu tekrar gözden geçirmenizi öneririz."
+        prompt = f"""
+Bir öğrenci quizde aşağıdaki soruları yanlış cevapladı. Her biri için ona yardımcı ol.
+
+SEVİYE: {level}
+
+{questions}
+
+Her soru için:
+1. Doğru cevabın neden doğru olduğunu açıkla
+2. Öğrencinin neden yanlış yaptığını anlat
+3. Bu konuyu nasıl öğrenebileceğine dair kısa bir ipucu ver
+4. Cesaretlendirici ol
+
+Her açıklama KISA VE NET olsun (maksimum 3-4 cümle).
+Türkçe yaz.
+
+Köşeli parantezdeki soru numaralarını anahtar olarak kullanıp JSON formatında döndür:
+{{{example}}}
+
+SADECE JSON döndür.
+"""
+        return prompt
+    
+    def _validate_quiz(self, questions: Any, topic: str, num_questions: int) -> List[Dict]:
+        """Eksik alanlı soruları eler; yeterli soru yoksa mock quiz döner."""
+        # Validasyon
+        if not isinstance(questions, list) or len(questions) == 0:
+            print(f"⚠️ AI geçersiz format döndürdü, mock quiz kullanılıyor")
+            return self._fallback("generate_quiz_questions", self._mock_quiz(topic, num_questions))
+        
+        valid_questions = self._filter_quiz_questions(questions, topic)
+        
+        if len(valid_questions) >= num_questions // 2:
+            return valid_questions[:num_questions]
+        else:
+            print(f"⚠️ Yeterli geçerli soru üretilemedi ({len(valid_questions)}/{num_questions}), mock quiz kullanılıyor")
+            return self._fallback("generate_quiz_questions", self._mock_quiz(topic, num_questions))
+    
+    def _filter_quiz_questions(self, questions: Any, topic: str) -> List[Dict]:
+        """Gerekli alanları olan ve doğru cevabı seçeneklerde bulunan soruları döndürür."""
+        if not isinstance(questions, list):
+            return []
+        
+        # Her sorunun gerekli alanları olduğunu kontrol et
+        valid_questions = []
+        for q in questions:
+            if isinstance(q, dict) and all(key in q for key in ["question_id", "question", "options", "correct_answer"]):
+                # options listesinde correct_answer var mı kontrol et
+                if q["correct_answer"] in q["options"]:
+                    # topic alanı yoksa ekle
+                    if "topic" not in q:
+                        q["topic"] = topic
+                    valid_questions.append(q)
+                else:
+                    print(f"⚠️ Soru atlandı: Doğru cevap seçeneklerde yok - {q.get('question', '')[:50]}")
+        self.metrics.inc("generate_quiz_questions", "validation_drops", len(questions) - len(valid_questions))
+        return valid_questions
+    
+    def _normalize_assessment(self, questions: Any, topic: str, num_questions: int) -> List[Dict]:
+        """Eksik id/zorluk alanlarını tamamlar."""
+        if isinstance(questions, list) and len(questions) > 0:
+            for idx, q in enumerate(questions):
+                if "id" not in q: q["id"] = str(idx+1)
+                if "difficulty" not in q: q["difficulty"] = "medium"
+            return questions[:num_questions]
+        
+        return self._fallback("generate_assessment_questions", self._mock_quiz(topic, num_questions))
     
     def _mock_plan(self, profile: Dict, resources: List[Dict], day: int) -> Dict:
         daily_time = profile.get("daily_time", 1)
@@ -481,13 +1264,215 @@ Türkçe yaz.
         }
 
 
+def run_async(coro: Awaitable) -> Any:
+    """
+    Senkron koddan (ör. Streamlit betiği) bir coroutine çalıştırır.
+    Zaten çalışan bir olay döngüsü varsa coroutine ayrı bir thread'de çalışır.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+class AsyncAIService(AIService):
+    """
+    AIService'in asenkron çeşidi.
+    
+    Her metodun `<ad>_async` karşılığı vardır; ikisi de aynı akışı (bkz.
+    AIService._run) yürütür, yalnızca model çağrısı farklıdır. Aynı anda en fazla max_concurrency Gemini çağrısı
+    yapılır, böylece birbirinden bağımsız işler (ör. günün dersi ve quiz'i)
+    sırayla beklemek yerine eşzamanlı yürür.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        # max_concurrency (bkz. AIService) burada olay döngüsü başına semaforla uygulanır
+        super().__init__(*args, **kwargs)
+        # asyncio.Semaphore bir olay döngüsüne bağlanır; her asyncio.run yeni döngü açar
+        self._semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+    
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+    
+    async def _generate_async(
+        self,
+        method: str,
+        prompt: str,
+        parse: Optional[Callable[[str], Any]] = None,
+        **params
+    ) -> Any:
+        """_generate'in asenkron karşılığı: önbellek → model (semafor altında) → parse."""
+        key = self._cache_key(method, prompt, params)
+        hit, result = self._from_cache(method, key, parse)
+        if hit:
+            return result
+        
+        async with self._semaphore():
+            start = time.perf_counter()
+            generate_async = getattr(self.model, "generate_content_async", None)
+            try:
+                if generate_async is not None:
+                    response = await self.gateway.call_async(generate_async, prompt, **params)
+                else:
+                    response = await self.gateway.call_async(
+                        asyncio.to_thread, self.model.generate_content, prompt, **params
+                    )
+            except Exception:
+                self.metrics.inc(method, "errors")
+                raise
+        return self._finish_call(method, prompt, response, start, key, parse)
+    
+    async def _run_async(self, flow: Generator) -> Any:
+        """_run'ın asenkron karşılığı: akışın çağrıları _generate_async ile yapılır."""
+        try:
+            request = next(flow)
+            while True:
+                try:
+                    if isinstance(request, list):
+                        result = await self.gather(*(self._run_async(sub) for sub in request))
+                    else:
+                        result = await self._generate_async(*request)
+                except Exception as e:
+                    request = flow.throw(e)
+                else:
+                    request = flow.send(result)
+        except StopIteration as stop:
+            return stop.value
+    
+    async def generate_personalized_plan_async(
+        self,
+        profile: Dict,
+        resources: List[Dict],
+        day: int = 1
+    ) -> Dict:
+        return await self._run_async(self._plan_flow(profile, resources, day))
+    
+    async def generate_quiz_questions_async(
+        self,
+        topic: str,
+        level: str = "beginner",
+        num_questions: int = 10,
+        goal: str = ""
+    ) -> List[Dict]:
+        return await self._run_async(self._quiz_flow(topic, level, num_questions, goal))
+    
+    async def generate_assessment_questions_async(self, topic: str, num_questions: int = 10) -> List[Dict]:
+        return await self._run_async(self._assessment_flow(topic, num_questions))
+    
+    async def generate_curriculum_async(
+        self,
+        goal: str,
+        level: str = "beginner",
+        duration_weeks: int = 4
+    ) -> Dict:
+        return await self._run_async(self._curriculum_flow(goal, level, duration_weeks))
+    
+    async def analyze_performance_async(self, performance_history: List[Dict]) -> Dict:
+        return await self._run_async(self._analysis_flow(performance_history))
+    
+    async def explain_topic_async(self, topic: str, level: str = "beginner", goal: str = "") -> str:
+        return await self._run_async(self._topic_flow(topic, level, goal))
+    
+    async def explain_wrong_answer_async(
+        self,
+        question: str,
+        user_answer: str,
+        correct_answer: str,
+        topic: str = "",
+        level: str = "beginner"
+    ) -> str:
+        return await self._run_async(self._wrong_answer_flow(question, user_answer, correct_answer, topic, level))
+    
+    async def explain_wrong_answers_batch_async(
+        self,
+        items: List[Dict],
+        topic: str = "",
+        level: str = "beginner",
+        batch: Optional[bool] = None
+    ) -> Dict[str, str]:
+        return await self._run_async(self._wrong_answers_flow(items, topic, level, batch))
+    
+    # --- Eşzamanlı yardımcılar ---
+    
+    async def gather(self, *calls: Awaitable, return_exceptions: bool = False) -> List[Any]:
+        """Çağrıları eşzamanlı bekler (semafor sınırı _generate_async'te uygulanır)."""
+        return list(await asyncio.gather(*calls, return_exceptions=return_exceptions))
+    
+    async def generate_day_content_async(
+        self,
+        topic: str,
+        level: str = "beginner",
+        goal: str = "",
+        num_questions: int = 5
+    ) -> Dict:
+        """Günün ders içeriğini ve quiz sorularını eşzamanlı üretir."""
+        lesson, quiz = await self.gather(
+            self.explain_topic_async(topic, level, goal),
+            self.generate_quiz_questions_async(topic, level, num_questions, goal)
+        )
+        return {"lesson": lesson, "quiz": quiz}
+    
+    def generate_day_content(
+        self,
+        topic: str,
+        level: str = "beginner",
+        goal: str = "",
+        num_questions: int = 5
+    ) -> Dict:
+        """generate_day_content_async'in senkron koddan çağrılabilen hali."""
+        return run_async(self.generate_day_content_async(topic, level, goal, num_questions))
+
+
 # Singleton instance
 _ai_service: Optional[AIService] = None
+_async_ai_service: Optional[AsyncAIService] = None
+
+
+def _default_model() -> Any:
+    """
+    AI_FAKE_MODEL açıksa ağ gerektirmeyen sahte model (çevrimdışı yük testleri için).
+    Sahte yanıtlar paylaşılan önbelleğe yazılmasın diye bu durumda önbellek kapatılır.
+    """
+    if os.getenv("AI_FAKE_MODEL", "").lower() in ("1", "true", "yes"):
+        from .fake_gemini import FakeGeminiModel
+        print("🧪 Sahte Gemini modeli kullanılıyor (AI_FAKE_MODEL)")
+        return FakeGeminiModel.from_env()
+    return None
+
+
+def _build_service(cls):
+    """
+    Ortam ayarlarına göre servis kurar. AI_CASSETTE_MODE açıksa model
+    cassette ile sarılır; kaydın/tekrarın eksiksiz ve diskteki önbellekten
+    bağımsız olması için önbellek kapatılır. Kayıt modunda kaydedilecek
+    model yoksa (API anahtarı yok) servis mock yanıtlarla çalışır.
+    """
+    from .cassette import CassetteModel, get_cassette
+    model = _default_model()
+    cassette = get_cassette()
+    service = cls(model=model, use_cache=model is None and cassette is None)
+    if cassette is not None and (service.model is not None or not cassette.recording):
+        service.model = CassetteModel(cassette, service.model)
+    elif cassette is not None:
+        print("⚠️ Cassette kayıt modunda ama model yok; kayıt yapılmadan mock yanıtlar kullanılacak")
+    return service
 
 
 def get_ai_service() -> AIService:
     global _ai_service
     if _ai_service is None:
-        _ai_service = AIService()
+        _ai_service = _build_service(AIService)
     return _ai_service
 
+
+def get_async_ai_service() -> AsyncAIService:
+    global _async_ai_service
+    if _async_ai_service is None:
+        _async_ai_service = _build_service(AsyncAIService)
+    return _async_ai_service
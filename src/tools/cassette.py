@@ -0,0 +1,394 @@
+"""
+Kayıt/Tekrar (Cassette) Katmanı
+===============================
+Gemini modeli ve Google Custom Search servisinin altına girer:
+
+- record: gerçek (ya da sahte) servise giden her istek, yanıtı/hatası ve
+  süresiyle birlikte JSON Lines dosyasına yazılır; akışlı yanıtlarda her
+  parçanın geliş anı da saklanır
+- replay: aynı istekler ağa çıkmadan dosyadan yanıtlanır. preserve_timing
+  açıksa kaydedilen gecikmeler (time_scale ile ölçeklenerek) beklenir
+
+Böylece RoadmapAgent, QuizValidationAgent ve app.py akışlarındaki performans
+değişiklikleri gerçek biçimli yanıtlarla, ağ olmadan ve tekrarlanabilir
+şekilde ölçülebilir.
+
+İstekler normalize prompt + parametrelerle (make_cache_key) eşlenir; aynı
+istek birden çok kez kaydedildiyse sırayla, bittiğinde sonuncusu döner.
+Kayıtta olmayan istek CassetteMiss fırlatır (AIService fallback'e düşer).
+
+Ayarlar: AI_CASSETTE_MODE ("record" / "replay"), AI_CASSETTE_PATH,
+AI_CASSETTE_PRESERVE_TIMING, AI_CASSETTE_TIME_SCALE
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from .ai_cache import make_cache_key
+from .ai_gateway import is_retryable
+from .fake_gemini import FakeResponse, FakeUsage
+
+MODES = ("record", "replay")
+
+# Arama anahtarına girmeyen (ortama bağlı) parametreler
+_SEARCH_IGNORED_PARAMS = ("cx", "key")
+
+
+class CassetteMiss(LookupError):
+    """Tekrar modunda kayıtta bulunmayan istek."""
+
+
+class RecordedAPIError(Exception):
+    """Kaydedilmiş API hatasının tekrarı; code ve retryable alanları geçidin yeniden deneme kararında kullanılır."""
+
+    def __init__(self, code: Optional[int], message: str, retryable: Optional[bool] = None):
+        super().__init__(message)
+        self.code = code
+        self.retryable = retryable
+
+
+def _error_record(error: BaseException) -> Dict[str, Any]:
+    code = None
+    for attr in ("code", "status_code", "status"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            code = value
+            break
+    # Orijinal hata türü tekrarda kaybolduğundan geçidin kararı da kaydedilir
+    return {"type": type(error).__name__, "message": str(error), "code": code, "retryable": is_retryable(error)}
+
+
+def _raise_recorded(error: Dict[str, Any]):
+    if error.get("type") in ("ConnectionError", "TimeoutError"):
+        raise {"ConnectionError": ConnectionError, "TimeoutError": TimeoutError}[error["type"]](error["message"])
+    raise RecordedAPIError(error.get("code"), error.get("message", ""), error.get("retryable"))
+
+
+def _usage_record(usage: Any) -> Optional[Dict[str, int]]:
+    if usage is None:
+        return None
+    return {
+        "prompt_token_count": int(getattr(usage, "prompt_token_count", 0) or 0),
+        "candidates_token_count": int(getattr(usage, "candidates_token_count", 0) or 0),
+    }
+
+
+def _usage(record: Optional[Dict[str, int]]) -> Optional[FakeUsage]:
+    return FakeUsage(record["prompt_token_count"], record["candidates_token_count"]) if record else None
+
+
+class Cassette:
+    """İstek/yanıt kayıtlarını tutan JSON Lines dosyası."""
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        preserve_timing: bool = False,
+        time_scale: float = 1.0,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Args:
+            path: kayıt dosyası (.jsonl)
+            mode: "record" (dosyayı baştan yazar) ya da "replay"
+            preserve_timing: tekrarda kaydedilen gecikmeler beklensin mi
+            time_scale: bekleme çarpanı (0.5: iki kat hızlı)
+            sleep: senkron bekleme fonksiyonu
+        """
+        if mode not in MODES:
+            raise ValueError(f"geçersiz cassette modu: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.preserve_timing = preserve_timing
+        self.time_scale = time_scale
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._entries: Dict[str, List[Dict]] = defaultdict(list)
+        self._served: Counter = Counter()
+        self.counters: Counter = Counter()
+
+        if mode == "record":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.path.write_text("", encoding="utf-8")
+        else:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["key"]].append(entry)
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == "record"
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def record(self, entry: Dict[str, Any]):
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self._entries[entry["key"]].append(entry)
+            self.counters["recorded"] += 1
+
+    def lookup(self, key: str, kind: str) -> Dict[str, Any]:
+        """Anahtarın sıradaki kaydı; hepsi kullanıldıysa sonuncusu."""
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.counters["misses"] += 1
+                raise CassetteMiss(f"kayıtta yok ({kind}, {key[:12]})")
+            index = min(self._served[key], len(entries) - 1)
+            self._served[key] += 1
+            self.counters["replayed"] += 1
+            return entries[index]
+
+    def delay(self, seconds: float) -> float:
+        """Tekrarda beklenecek süre."""
+        return max(0.0, seconds * self.time_scale) if self.preserve_timing else 0.0
+
+    def wait(self, seconds: float):
+        delay = self.delay(seconds)
+        if delay:
+            self._sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"mode": self.mode, "entries": len(self), "recorded": self.counters["recorded"],
+                    "replayed": self.counters["replayed"], "misses": self.counters["misses"]}
+
+
+class CassetteModel:
+    """Gemini modelinin yerine geçer: kayıtta içteki modeli çağırıp yazar, tekrarda dosyadan yanıtlar."""
+
+    def __init__(self, cassette: Cassette, model: Any = None):
+        if cassette.recording and model is None:
+            raise ValueError("kayıt modu için gerçek (ya da sahte) bir model gerekli")
+        self.cassette = cassette
+        self.model = model
+
+    @staticmethod
+    def _key(prompt: str, stream: bool, params: Dict[str, Any]) -> str:
+        return make_cache_key("gemini", prompt, {**params, "stream": stream})
+
+    def _entry(self, key: str, prompt: str, start: float, **fields) -> Dict[str, Any]:
+        return {"kind": "gemini", "key": key, "prompt": prompt,
+                "latency_s": round(time.perf_counter() - start, 4), **fields}
+
+    # --- Kayıt ---
+
+    def _record_call(self, key: str, prompt: str, call: Callable[[], Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            response = call()
+        except Exception as e:
+            self.cassette.record(self._entry(key, prompt, start, error=_error_record(e)))
+            raise
+        self.cassette.record(self._entry(
+            key, prompt, start, text=response.text,
+            usage=_usage_record(getattr(response, "usage_metadata", None))
+        ))
+        return response
+
+    def _record_stream(self, key: str, prompt: str, params: Dict[str, Any]) -> Iterator[Any]:
+        start = time.perf_counter()
+        chunks: List[Dict[str, Any]] = []
+        usage = None
+        try:
+            for chunk in self.model.generate_content(prompt, stream=True, **params):
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                chunks.append({"text": chunk.text, "at_s": round(time.perf_counter() - start, 4)})
+                yield chunk
+        except Exception as e:
+            self.cassette.record(self._entry(key, prompt, start, chunks=chunks, error=_error_record(e)))
+            raise
+        self.cassette.record(self._entry(key, prompt, start, chunks=chunks, usage=_usage_record(usage)))
+
+    async def _record_stream_async(self, key: str, prompt: str, params: Dict[str, Any]) -> AsyncIterator[Any]:
+        start = time.perf_counter()
+        chunks: List[Dict[str, Any]] = []
+        usage = None
+        try:
+            async for chunk in self._inner_stream_async(prompt, params):
+                usage = getattr(chunk, "usage_metadata", None) or usage
+                chunks.append({"text": chunk.text, "at_s": round(time.perf_counter() - start, 4)})
+                yield chunk
+        except Exception as e:
+            self.cassette.record(self._entry(key, prompt, start, chunks=chunks, error=_error_record(e)))
+            raise
+        self.cassette.record(self._entry(key, prompt, start, chunks=chunks, usage=_usage_record(usage)))
+
+    async def _inner_stream_async(self, prompt: str, params: Dict[str, Any]) -> AsyncIterator[Any]:
+        """İçteki modelin async akışı; async arayüzü yoksa senkron akış thread'de tüketilir."""
+        generate_async = getattr(self.model, "generate_content_async", None)
+        if generate_async is not None:
+            async for chunk in await generate_async(prompt, stream=True, **params):
+                yield chunk
+            return
+        iterator = iter(await asyncio.to_thread(self.model.generate_content, prompt, stream=True, **params))
+        end = object()
+        while True:
+            chunk = await asyncio.to_thread(next, iterator, end)
+            if chunk is end:
+                return
+            yield chunk
+
+    # --- Tekrar ---
+
+    @staticmethod
+    def _stream_steps(entry: Dict[str, Any]) -> Iterator[tuple]:
+        """Kayıtlı akışın (beklenecek_süre, parça) adımları; hata kaydı varsa son adımda parça None."""
+        chunks = entry.get("chunks", [])
+        previous = 0.0
+        for i, chunk in enumerate(chunks):
+            last = i == len(chunks) - 1 and "error" not in entry
+            yield chunk["at_s"] - previous, FakeResponse(chunk["text"], _usage(entry.get("usage")) if last else None)
+            previous = chunk["at_s"]
+        if "error" in entry:
+            yield entry["latency_s"] - previous, None
+
+    def _replay_stream(self, entry: Dict[str, Any]) -> Iterator[FakeResponse]:
+        for seconds, chunk in self._stream_steps(entry):
+            self.cassette.wait(seconds)
+            if chunk is None:
+                _raise_recorded(entry["error"])
+            yield chunk
+
+    async def _replay_stream_async(self, entry: Dict[str, Any]) -> AsyncIterator[FakeResponse]:
+        for seconds, chunk in self._stream_steps(entry):
+            delay = self.cassette.delay(seconds)
+            if delay:
+                await asyncio.sleep(delay)
+            if chunk is None:
+                _raise_recorded(entry["error"])
+            yield chunk
+
+    @staticmethod
+    def _replay_response(entry: Dict[str, Any]) -> FakeResponse:
+        if "error" in entry:
+            _raise_recorded(entry["error"])
+        return FakeResponse(entry["text"], _usage(entry.get("usage")))
+
+    # --- Model arayüzü ---
+
+    def generate_content(self, prompt: str, stream: bool = False, **params) -> Any:
+        key = self._key(prompt, stream, params)
+        if self.cassette.recording:
+            if stream:
+                return self._record_stream(key, prompt, params)
+            return self._record_call(key, prompt, lambda: self.model.generate_content(prompt, **params))
+
+        entry = self.cassette.lookup(key, "gemini")
+        if stream:
+            return self._replay_stream(entry)
+        self.cassette.wait(entry["latency_s"])
+        return self._replay_response(entry)
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, **params) -> Any:
+        key = self._key(prompt, stream, params)
+        if self.cassette.recording:
+            if stream:
+                return self._record_stream_async(key, prompt, params)
+            start = time.perf_counter()
+            generate_async = getattr(self.model, "generate_content_async", None)
+            try:
+                if generate_async is not None:
+                    response = await generate_async(prompt, **params)
+                else:
+                    response = await asyncio.to_thread(self.model.generate_content, prompt, **params)
+            except Exception as e:
+                self.cassette.record(self._entry(key, prompt, start, error=_error_record(e)))
+                raise
+            self.cassette.record(self._entry(
+                key, prompt, start, text=response.text,
+                usage=_usage_record(getattr(response, "usage_metadata", None))
+            ))
+            return response
+
+        entry = self.cassette.lookup(key, "gemini")
+        if stream:
+            return self._replay_stream_async(entry)
+        delay = self.cassette.delay(entry["latency_s"])
+        if delay:
+            await asyncio.sleep(delay)
+        return self._replay_response(entry)
+
+
+class _Request:
+    def __init__(self, execute: Callable[[], Dict]):
+        self.execute = execute
+
+
+class _CseResource:
+    def __init__(self, owner: "CassetteSearchService"):
+        self._owner = owner
+
+    def list(self, **params) -> _Request:
+        return _Request(lambda: self._owner._execute(params))
+
+
+class CassetteSearchService:
+    """googleapiclient customsearch servisinin yerine geçer (service.cse().list(...).execute())."""
+
+    def __init__(self, cassette: Cassette, service: Any = None):
+        if cassette.recording and service is None:
+            raise ValueError("kayıt modu için Google Search servisi gerekli")
+        self.cassette = cassette
+        self.service = service
+
+    def cse(self) -> _CseResource:
+        return _CseResource(self)
+
+    @staticmethod
+    def _key(params: Dict[str, Any]) -> str:
+        request = {k: v for k, v in params.items() if k not in _SEARCH_IGNORED_PARAMS}
+        return make_cache_key("customsearch", str(request.pop("q", "")), request)
+
+    def _execute(self, params: Dict[str, Any]) -> Dict:
+        key = self._key(params)
+        request = {k: v for k, v in params.items() if k not in _SEARCH_IGNORED_PARAMS}
+        if self.cassette.recording:
+            start = time.perf_counter()
+            entry = {"kind": "search", "key": key, "request": request}
+            try:
+                result = self.service.cse().list(**params).execute()
+            except Exception as e:
+                entry.update(latency_s=round(time.perf_counter() - start, 4), error=_error_record(e))
+                self.cassette.record(entry)
+                raise
+            entry.update(latency_s=round(time.perf_counter() - start, 4), response=result)
+            self.cassette.record(entry)
+            return result
+
+        entry = self.cassette.lookup(key, "search")
+        self.cassette.wait(entry["latency_s"])
+        if "error" in entry:
+            _raise_recorded(entry["error"])
+        return entry["response"]
+
+
+# Singleton instance
+_cassette: Optional[Cassette] = None
+
+
+def get_cassette() -> Optional[Cassette]:
+    """AI_CASSETTE_MODE ayarlıysa paylaşılan cassette; değilse None."""
+    global _cassette
+    mode = os.getenv("AI_CASSETTE_MODE", "").strip().lower()
+    if _cassette is None and mode:
+        _cassette = Cassette(
+            os.getenv("AI_CASSETTE_PATH", "data/cassettes/session.jsonl"),
+            mode=mode,
+            preserve_timing=os.getenv("AI_CASSETTE_PRESERVE_TIMING", "false").lower() in ("1", "true", "yes"),
+            time_scale=float(os.getenv("AI_CASSETTE_TIME_SCALE", "1.0"))
+        )
+        print(f"📼 Cassette {mode} modunda: {_cassette.path}")
+    return _cassette
@@ -0,0 +1,415 @@
+"""
+Sahte Gemini Modeli
+===================
+genai.GenerativeModel yerine AIService'e verilebilen, ağ gerektirmeyen ve
+tekrarlanabilir bir model. AIService'in ayrıştırma, doğrulama, tamamlama ve
+yeniden deneme yolları API anahtarı olmadan çalıştırılabilir:
+
+    model = FakeGeminiModel(seed=7, latency=lognormal(0.8, 0.5),
+                            faults={"rate_limit": 0.05, "truncate": 0.1, "fence": 0.3})
+    service = AIService(model=model)
+
+- Yanıtlar: önce sıraya eklenenler (enqueue), sonra prompt'a göre kurallar
+  (script), yoksa prompt türüne göre üretilen gerçekçi JSON/metin
+- Gecikme: sabit sayı ya da constant/uniform/lognormal dağılımları; akışta
+  ilk parça bu gecikmeden sonra, sonraki parçalar chunk_delay aralıklarla gelir
+- Hata enjeksiyonu (olasılıklar): rate_limit (429), server_error (503),
+  disconnect (bağlantı kopması), truncate (yarıda kesilmiş yanıt),
+  fence (```json bloğu), prose (JSON'un önünde/arkasında açıklama metni)
+
+Rastgelelik her çağrı için seed + prompt + o prompt'un kaçıncı kez
+sorulduğundan türetilir; eşzamanlı çağrıların sırası sonucu değiştirmez.
+
+Ortamdan kurulum (get_ai_service için): AI_FAKE_MODEL=1, AI_FAKE_SEED,
+AI_FAKE_LATENCY ("0.5", "uniform:0.2:1.5", "lognormal:0.8:0.5"),
+AI_FAKE_FAULTS ("rate_limit=0.05,truncate=0.1")
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+FAULTS = ("rate_limit", "server_error", "disconnect", "truncate", "fence", "prose")
+
+Latency = Union[float, Callable[[random.Random], float]]
+
+
+def constant(seconds: float) -> Callable[[random.Random], float]:
+    return lambda rng: seconds
+
+
+def uniform(low: float, high: float) -> Callable[[random.Random], float]:
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal(median: float, sigma: float = 0.5) -> Callable[[random.Random], float]:
+    """Uzun kuyruklu gecikme: yarısı median'ın altında, az sayıda çok yavaş çağrı."""
+    return lambda rng: rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """"0.5", "uniform:0.2:1.5" ya da "lognormal:0.8:0.5" biçimindeki ayarı çözer."""
+    kind, *args = spec.strip().split(":")
+    try:
+        if not args:
+            return constant(float(kind))
+        values = [float(a) for a in args]
+        if kind == "uniform":
+            return uniform(*values)
+        if kind == "lognormal":
+            return lognormal(*values)
+    except (TypeError, ValueError):
+        pass
+    raise ValueError(f"geçersiz gecikme ayarı: {spec}")
+
+
+def parse_faults(spec: str) -> Dict[str, float]:
+    """"rate_limit=0.05,truncate=0.1" biçimindeki ayarı çözer."""
+    faults = {}
+    for part in spec.split(","):
+        if part.strip():
+            name, _, rate = part.partition("=")
+            faults[name.strip()] = float(rate)
+    return faults
+
+
+class FakeAPIError(Exception):
+    """API hatası taklidi; code alanı geçidin yeniden deneme kararında kullanılır."""
+
+    def __init__(self, code: int, message: str = ""):
+        super().__init__(f"{code} {message}".strip())
+        self.code = code
+
+
+class FakeUsage:
+    def __init__(self, prompt_token_count: int, candidates_token_count: int):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+
+class FakeResponse:
+    def __init__(self, text: str, usage_metadata: Optional[FakeUsage] = None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+def _tokens(text: str) -> int:
+    # Gemini Türkçe metinde kabaca 4 karakter/token
+    return max(1, len(text) // 4)
+
+
+class _Rule:
+    def __init__(self, pattern: str, response: Any, times: Optional[int], regex: bool):
+        self.pattern = re.compile(pattern) if regex else None
+        self.text = pattern
+        self.response = response
+        self.remaining = times
+
+    def matches(self, prompt: str) -> bool:
+        if self.remaining == 0:
+            return False
+        return bool(self.pattern.search(prompt)) if self.pattern else self.text in prompt
+
+
+class FakeGeminiModel:
+    """generate_content / generate_content_async (stream=True dahil) sağlayan sahte model."""
+
+    def __init__(
+        self,
+        seed: int = 0,
+        latency: Latency = 0.0,
+        chunk_delay: float = 0.0,
+        chunk_chars: int = 80,
+        faults: Optional[Dict[str, float]] = None,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Args:
+            seed: tekrarlanabilirlik için tohum
+            latency: yanıt (akışta ilk parça) gecikmesi: saniye ya da rng → saniye
+            chunk_delay: akışta parçalar arası gecikme (s)
+            chunk_chars: akıştaki parça uzunluğu
+            faults: hata adı → olasılık (bkz. FAULTS)
+            sleep: senkron bekleme fonksiyonu (testlerde sahte saat verilebilir)
+        """
+        unknown = set(faults or {}) - set(FAULTS)
+        if unknown:
+            raise ValueError(f"bilinmeyen hata türü: {', '.join(sorted(unknown))}")
+        self.seed = seed
+        self.latency = latency if callable(latency) else constant(float(latency))
+        self.chunk_delay = chunk_delay
+        self.chunk_chars = max(1, chunk_chars)
+        self.faults = dict(faults or {})
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._queue: deque = deque()
+        self._rules: List[_Rule] = []
+        self._seen: Counter = Counter()
+        self.calls = 0
+        self.fault_counts: Counter = Counter()
+        self.prompts: deque = deque(maxlen=100)
+
+    @classmethod
+    def from_env(cls) -> "FakeGeminiModel":
+        return cls(
+            seed=int(os.getenv("AI_FAKE_SEED", "0")),
+            latency=parse_latency(os.getenv("AI_FAKE_LATENCY", "0")),
+            chunk_delay=float(os.getenv("AI_FAKE_CHUNK_DELAY", "0")),
+            faults=parse_faults(os.getenv("AI_FAKE_FAULTS", ""))
+        )
+
+    # --- Senaryo ---
+
+    def enqueue(self, *responses: Any) -> "FakeGeminiModel":
+        """Sıradaki çağrılara sırayla dönecek yanıtlar (metin, FakeResponse ya da fırlatılacak hata)."""
+        with self._lock:
+            self._queue.extend(responses)
+        return self
+
+    def script(self, pattern: str, response: Any, times: Optional[int] = None, regex: bool = False) -> "FakeGeminiModel":
+        """
+        Prompt'ta pattern geçen çağrılara verilecek yanıt.
+
+        response: metin, FakeResponse, hata ya da prompt → metin fonksiyonu.
+        times: kuralın en fazla kaç kez kullanılacağı (None: sınırsız).
+        """
+        with self._lock:
+            self._rules.append(_Rule(pattern, response, times, regex))
+        return self
+
+    # --- Çağrı ---
+
+    def _plan(self, prompt: str) -> Tuple[random.Random, Any, List[str]]:
+        """Bu çağrının rng'sini, yanıtını ve enjekte edilecek hataları belirler."""
+        with self._lock:
+            self.calls += 1
+            self.prompts.append(prompt)
+            digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+            occurrence = self._seen[digest]
+            self._seen[digest] += 1
+            response = None
+            if self._queue:
+                response = self._queue.popleft()
+            else:
+                for rule in self._rules:
+                    if rule.matches(prompt):
+                        if rule.remaining is not None:
+                            rule.remaining -= 1
+                        response = rule.response
+                        break
+        rng = random.Random(f"{self.seed}:{digest}:{occurrence}")
+        faults = [name for name in FAULTS if rng.random() < self.faults.get(name, 0.0)]
+        with self._lock:
+            self.fault_counts.update(faults)
+        return rng, response, faults
+
+    def _respond(self, prompt: str, rng: random.Random, response: Any, faults: List[str]) -> str:
+        if isinstance(response, BaseException):
+            raise response
+        if isinstance(response, FakeResponse):
+            response = response.text
+        if callable(response):
+            response = response(prompt)
+        text = response if response is not None else default_response(prompt, rng)
+        if "rate_limit" in faults:
+            raise FakeAPIError(429, "Resource has been exhausted (e.g. check quota).")
+        if "server_error" in faults:
+            raise FakeAPIError(503, "The model is overloaded. Please try again later.")
+        if "truncate" in faults and len(text) > 1:
+            text = text[:max(1, int(len(text) * rng.uniform(0.3, 0.9)))]
+        if "fence" in faults:
+            text = f"```json\n{text}\n```"
+        if "prose" in faults:
+            text = f"İşte istediğin içerik:\n\n{text}\n\nBaşka bir şey ister misin?"
+        return text
+
+    def _chunks(self, text: str) -> List[str]:
+        return [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+
+    def _stream(self, prompt: str, text: str, faults: List[str]) -> Iterator[FakeResponse]:
+        chunks = self._chunks(text)
+        cut = len(chunks) // 2 if "disconnect" in faults else None
+        for i, chunk in enumerate(chunks):
+            if i == cut:
+                raise ConnectionError("akış bağlantısı koptu")
+            if i:
+                self._sleep(self.chunk_delay)
+            usage = FakeUsage(_tokens(prompt), _tokens(text)) if i == len(chunks) - 1 else None
+            yield FakeResponse(chunk, usage)
+
+    def generate_content(self, prompt: str, stream: bool = False, **params) -> Any:
+        rng, response, faults = self._plan(prompt)
+        self._sleep(max(0.0, self.latency(rng)))
+        text = self._respond(prompt, rng, response, faults)
+        if stream:
+            return self._stream(prompt, text, faults)
+        if "disconnect" in faults:
+            raise ConnectionError("bağlantı koptu")
+        return FakeResponse(text, FakeUsage(_tokens(prompt), _tokens(text)))
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, **params) -> Any:
+        rng, response, faults = self._plan(prompt)
+        await asyncio.sleep(max(0.0, self.latency(rng)))
+        text = self._respond(prompt, rng, response, faults)
+        if stream:
+            return self._astream(prompt, text, faults)
+        if "disconnect" in faults:
+            raise ConnectionError("bağlantı koptu")
+        return FakeResponse(text, FakeUsage(_tokens(prompt), _tokens(text)))
+
+    async def _astream(self, prompt: str, text: str, faults: List[str]):
+        chunks = self._chunks(text)
+        cut = len(chunks) // 2 if "disconnect" in faults else None
+        for i, chunk in enumerate(chunks):
+            if i == cut:
+                raise ConnectionError("akış bağlantısı koptu")
+            if i:
+                await asyncio.sleep(self.chunk_delay)
+            usage = FakeUsage(_tokens(prompt), _tokens(text)) if i == len(chunks) - 1 else None
+            yield FakeResponse(chunk, usage)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"calls": self.calls, "faults": dict(self.fault_counts)}
+
+
+# --- Prompt türüne göre varsayılan yanıtlar (AIService prompt'larıyla uyumlu) ---
+
+def _int(pattern: str, prompt: str, default: int) -> int:
+    match = re.search(pattern, prompt)
+    return int(match.group(1)) if match else default
+
+
+def _quoted(pattern: str, prompt: str, default: str) -> str:
+    match = re.search(pattern, prompt)
+    return match.group(1) if match else default
+
+
+def _lesson(day: int, theme: str) -> Dict:
+    return {
+        "day": day,
+        "theme": theme,
+        "objectives": [f"{theme} kavramlarını öğrenmek", f"{theme} üzerine pratik yapmak"],
+        "tip": "Küçük adımlarla ilerle ve not al.",
+        "tasks": [
+            {"task": f"{theme} - okuma", "type": "theory", "duration_min": 20, "description": f"{theme} konusunu oku."},
+            {"task": f"{theme} - uygulama", "type": "practice", "duration_min": 25, "description": "Örnekleri kendin yaz."},
+            {"task": f"{theme} - mini test", "type": "quiz", "duration_min": 10, "description": "Kısa testi çöz."}
+        ]
+    }
+
+
+def _questions(topic: str, count: int, rng: random.Random, assessment: bool = False) -> List[Dict]:
+    token = rng.randrange(16 ** 6)
+    questions = []
+    for i in range(1, count + 1):
+        options = [f"{topic} seçenek {c}" for c in "ABCD"]
+        question = {
+            "question": f"{topic} ile ilgili {i}. soru ({token:06x})?",
+            "options": options,
+            "correct_answer": options[rng.randrange(4)],
+        }
+        if assessment:
+            question.update(id=str(i), difficulty=("easy", "medium", "hard")[min(2, (i - 1) * 3 // count)],
+                            topic_area=topic)
+        else:
+            question.update(question_id=f"q{i}", topic=topic)
+        questions.append(question)
+    return questions
+
+
+def _explanation(topic: str) -> str:
+    return (f"Doğru cevap, {topic} konusundaki temel kurala dayanıyor. Seçtiğin cevap bu kuralın "
+            f"bir istisnasıyla karışmış olabilir. Konuyu kısa bir örnekle tekrar etmeni öneririm; "
+            f"bu hatayı yapman öğrenmenin doğal bir parçası!")
+
+
+def default_response(prompt: str, rng: random.Random) -> str:
+    """Prompt türünü tanıyıp AIService'in beklediği biçimde yanıt üretir."""
+    dumps = lambda value: json.dumps(value, ensure_ascii=False, indent=2)
+
+    if "quiz sorusu oluştur" in prompt:
+        topic = _quoted(r'Günlük ders konusu: "(.+?)"', prompt, "Konu")
+        return dumps(_questions(topic, _int(r"(\d+) adet çoktan seçmeli", prompt, 5), rng))
+
+    if "bilgi seviyesini belirlemek" in prompt:
+        topic = _quoted(r'"(.+?)" konusu için', prompt, "Konu")
+        return dumps(_questions(topic, _int(r"(\d+) adet test sorusu", prompt, 10), rng, assessment=True))
+
+    if "HAFTALIK ana hatlarını" in prompt:
+        weeks = _int(r"(\d+) haftalık bir öğrenme müfredatının", prompt, 4)
+        goal = _quoted(r'"(.+?)" hedefi', prompt, "Hedef")
+        return dumps({
+            "goal": goal,
+            "summary": f"{goal} için {weeks} haftalık kademeli program.",
+            "duration_weeks": weeks,
+            "weeks": [
+                {"week": w, "focus": f"{goal} - {w}. aşama",
+                 "topics": [f"{goal} {w}.{d}" for d in range(1, 8)]}
+                for w in range(1, weeks + 1)
+            ]
+        })
+
+    if "haftasının günlük derslerini" in prompt:
+        start = _int(r"\"day\" alanı (\d+)'den 7'ye", prompt, 1)
+        topics = _quoted(r"BU HAFTANIN KONULARI: (.*)", prompt, "").split(", ")
+        return dumps([
+            _lesson(day, topics[day - 1] if day <= len(topics) and topics[day - 1] else f"Gün {day}")
+            for day in range(start, 8)
+        ])
+
+    match = re.search(r"Yalnızca (\d+)\. günden (\d+)\. güne", prompt)
+    if match:
+        return dumps([_lesson(day, f"Gün {day} konusu") for day in range(int(match.group(1)), int(match.group(2)) + 1)])
+
+    if "haftalık detaylı bir öğrenme müfredatı" in prompt:
+        weeks = _int(r"(\d+) haftalık detaylı", prompt, 4)
+        goal = _quoted(r'"(.+?)" hedefi', prompt, "Hedef")
+        return dumps({
+            "goal": goal,
+            "duration_weeks": weeks,
+            "summary": f"{goal} için {weeks} haftalık program.",
+            "daily_lessons": [_lesson(day, f"{goal} - Gün {day}") for day in range(1, weeks * 7 + 1)]
+        })
+
+    if "günlük çalışma planı" in prompt:
+        day = _int(r"Gün: (\d+)", prompt, 1)
+        plan = _lesson(day, f"Gün {day} - Odak konusu")
+        return dumps({
+            "type": "learning_plan", "day": day, "theme": plan["theme"], "tasks": plan["tasks"],
+            "resources": [], "learning_objectives": plan["objectives"], "tips": plan["tip"]
+        })
+
+    if "performans geçmişini analiz" in prompt:
+        return dumps({
+            "overall_trend": rng.choice(["improving", "stable", "declining"]),
+            "strengths": ["Düzenli çalışma"],
+            "areas_to_improve": ["Pratik süresi"],
+            "recommendations": ["Her gün kısa bir tekrar yap", "Yanlış soruları yeniden çöz"],
+            "motivation_message": "Harika gidiyorsun, devam et!"
+        })
+
+    if "soruları yanlış cevapladı" in prompt:
+        keys = re.findall(r"^\[(\w+)\]$", prompt, re.MULTILINE)
+        return dumps({key: _explanation("bu") for key in keys})
+
+    if "yanlış cevap verdi" in prompt:
+        return _explanation(_quoted(r"KONU: (.*)", prompt, "bu").strip())
+
+    topic = _quoted(r'"(.+?)" konusunu', prompt, "Konu")
+    sections = [
+        f"## {topic}\n\n{topic}, öğrenme yolculuğunda sık karşılaşacağın temel bir konudur.",
+        "### Temel kavramlar\n\n" + " ".join(f"{topic} ile ilgili {i}. önemli nokta." for i in range(1, 6 + rng.randrange(4))),
+        f"### Örnek\n\n```python\n# {topic} örneği\nprint('merhaba')\n```",
+        "### Özet\n\nKavramları tekrar et ve küçük örneklerle pekiştir."
+    ]
+    return "\n\n".join(sections)
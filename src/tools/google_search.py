@@ -1,6 +1,8 @@
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional
 import os
 
+from .cassette import CassetteSearchService, get_cassette
+
 try:
     from googleapiclient.discovery import build
     GOOGLE_API_AVAILABLE = True
@@ -9,21 +11,36 @@ except ImportError:
 
 
 class GoogleSearchTool:    
-    def __init__(self, api_key: Optional[str] = None, search_engine_id: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        search_engine_id: Optional[str] = None,
+        service: Any = None
+    ):
+        """
+        Args:
+            service: hazır customsearch servisi (ör. CassetteSearchService);
+                verilirse API anahtarı gerekmez
+        """
         self.api_key = api_key or os.getenv("GOOGLE_SEARCH_API_KEY", "")
         self.search_engine_id = search_engine_id or os.getenv("GOOGLE_SEARCH_ENGINE_ID", "")
-        self.service = None
+        self.service = service
         
         # API yapılandırılmışsa servisi başlat
-        if self._is_configured() and GOOGLE_API_AVAILABLE:
+        if self.service is None and self._is_configured() and GOOGLE_API_AVAILABLE:
             try:
                 self.service = build("customsearch", "v1", developerKey=self.api_key)
             except Exception as e:
                 print(f"⚠️ Google Search API başlatılamadı: {e}")
                 self.service = None
+        
+        # AI_CASSETTE_MODE: aramalar kaydedilir ya da kayıttan yanıtlanır
+        cassette = get_cassette() if service is None else None
+        if cassette is not None and (self.service is not None or not cassette.recording):
+            self.service = CassetteSearchService(cassette, self.service)
     
     def _is_configured(self) -> bool:
-        return bool(self.api_key and self.search_engine_id)
+        return bool(self.api_key and self.search_engine_id) or self.service is not None
     
     def search(self, query: str, max_results: int = 5) -> List[Dict]:
         # API yapılandırılmamışsa mock veri döndür
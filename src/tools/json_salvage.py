@@ -0,0 +1,200 @@
+"""
+Toleranslı JSON Ayıklama
+========================
+Gemini yanıtları çoğu zaman kod bloğu, öncesinde/sonrasında açıklama metni
+içerir ya da uzun çıktılarda yarıda kesilir. Bu modül metindeki en dıştaki
+dizi/nesneyi bulur ve kesilmiş yanıtlardan tamamlanmış her elemanı kurtarır:
+
+    salvage_json('[{"a": 1}, {"a": 2}, {"a"')    → ([{"a": 1}, {"a": 2}], False)
+    salvage_json('{"daily_lessons": [{...}, {..') → ({"daily_lessons": [{...}]}, False)
+
+Kurallar:
+- Dizilerde yalnızca tamamlanmış elemanlar tutulur (yarım eleman atılır)
+- Nesnelerde tamamlanmış anahtarlar tutulur; son değer yarım bir dizi/nesne
+  ise kurtarılabilen kısmı tutulur
+- Sondaki fazla virgül ("[1, 2,]") tolere edilir
+"""
+
+import json
+from typing import Any, List, Tuple
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+# Metin içinde denenecek en fazla başlangıç noktası ('[' veya '{')
+MAX_CANDIDATES = 20
+
+
+class PartialJSONError(ValueError):
+    """Yanıt yarım: kurtarılabilen değer .value'da."""
+
+    def __init__(self, value: Any, message: str = "JSON yanıtı yarıda kesilmiş"):
+        super().__init__(message)
+        self.value = value
+
+
+class _Incomplete(Exception):
+    pass
+
+
+def _skip_ws(text: str, i: int) -> int:
+    while i < len(text) and text[i] in _WHITESPACE:
+        i += 1
+    return i
+
+
+def _parse_partial(text: str, i: int) -> Tuple[Any, int, bool]:
+    """i konumundaki değeri ayrıştırır: (değer, bitiş, tamamlandı mı)."""
+    try:
+        value, end = _decoder.raw_decode(text, i)
+        return value, end, True
+    except json.JSONDecodeError:
+        pass
+    if text[i] == "[":
+        return _partial_array(text, i)
+    if text[i] == "{":
+        return _partial_object(text, i)
+    raise _Incomplete()
+
+
+def _partial_array(text: str, i: int) -> Tuple[List, int, bool]:
+    items: List[Any] = []
+    i += 1
+    while True:
+        i = _skip_ws(text, i)
+        if i >= len(text):
+            return items, i, False
+        if text[i] == "]":
+            return items, i + 1, True
+        try:
+            value, end = _decoder.raw_decode(text, i)
+        except json.JSONDecodeError:
+            return items, i, False
+        items.append(value)
+        i = _skip_ws(text, end)
+        if i < len(text) and text[i] == ",":
+            i += 1
+            continue
+        if i < len(text) and text[i] == "]":
+            return items, i + 1, True
+        return items, i, False
+
+
+def _partial_object(text: str, i: int) -> Tuple[dict, int, bool]:
+    obj: dict = {}
+    i += 1
+    while True:
+        i = _skip_ws(text, i)
+        if i >= len(text):
+            return obj, i, False
+        if text[i] == "}":
+            return obj, i + 1, True
+        try:
+            key, end = _decoder.raw_decode(text, i)
+        except json.JSONDecodeError:
+            return obj, i, False
+        if not isinstance(key, str):
+            return obj, i, False
+        i = _skip_ws(text, end)
+        if i >= len(text) or text[i] != ":":
+            return obj, i, False
+        i = _skip_ws(text, i + 1)
+        if i >= len(text):
+            return obj, i, False
+        try:
+            value, end, complete = _parse_partial(text, i)
+        except _Incomplete:
+            return obj, i, False
+        obj[key] = value
+        if not complete:
+            return obj, end, False
+        i = _skip_ws(text, end)
+        if i < len(text) and text[i] == ",":
+            i += 1
+            continue
+        if i < len(text) and text[i] == "}":
+            return obj, i + 1, True
+        return obj, i, False
+
+
+def _is_truncated(text: str, i: int) -> bool:
+    """i'de başlayan değer metnin sonuna kadar kapanmıyor mu (bozuk değil, yarım)?"""
+    depth = 0
+    in_string = False
+    escape = False
+    for ch in text[i:]:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "[{":
+            depth += 1
+        elif ch in "]}":
+            depth -= 1
+            if depth <= 0:
+                return False
+        elif ch == "," and depth == 0:
+            return False
+    return True
+
+
+def _strip_fence(text: str) -> str:
+    """Kod bloğu varsa içini döndürür (kapanış yoksa bloğun geri kalanını)."""
+    if "```" not in text:
+        return text
+    body = text.split("```", 1)[1]
+    first_line, _, rest = body.partition("\n")
+    if first_line.strip().isalpha():  # ```json, ```JSON ...
+        body = rest
+    return body.split("```", 1)[0]
+
+
+def salvage_json(text: str) -> Tuple[Any, bool]:
+    """
+    Metindeki ilk geçerli JSON dizisini/nesnesini döndürür.
+
+    Returns:
+        (değer, tamamlandı mı). Yarım yanıtlarda kurtarılan kısım döner.
+
+    Raises:
+        json.JSONDecodeError: metinde kurtarılabilir JSON yoksa
+    """
+    body = _strip_fence(text)
+    tried = 0
+    for i, ch in enumerate(body):
+        if ch not in "[{":
+            continue
+        tried += 1
+        if tried > MAX_CANDIDATES:
+            break
+        try:
+            value, stop, complete = _parse_partial(body, i)
+        except _Incomplete:
+            continue
+        if complete:
+            return value, True
+        # Boş olsa bile yarıda kesilmiş dış değer tercih edilir; içindeki
+        # yarım elemanı ayrı bir aday olarak denemek yanlış yapı döndürür
+        if value or _is_truncated(body, stop):
+            return value, False
+    raise json.JSONDecodeError("Yanıtta JSON bulunamadı", text, 0)
+
+
+def extract_json(text: str) -> Any:
+    """
+    Yanıttaki JSON'u ayrıştırır; açıklama metni ve kod bloklarını yok sayar.
+
+    Raises:
+        PartialJSONError: yanıt yarımsa (kurtarılan değer .value'da)
+        json.JSONDecodeError: JSON bulunamazsa
+    """
+    value, complete = salvage_json(text)
+    if not complete:
+        raise PartialJSONError(value)
+    return value
+
@@ -0,0 +1,144 @@
+"""AI çağrı geçidi testleri: hız sınırı, yeniden deneme, devre kesici"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytest
+
+from tools.ai_gateway import AIGateway, CircuitOpenError, TokenBucket, is_retryable
+from tools.ai_service import AIService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class ApiError(Exception):
+    def __init__(self, code):
+        super().__init__(f"{code} hata")
+        self.code = code
+
+
+def _gateway(clock, **kwargs):
+    params = {"rate_per_minute": 0, "max_retries": 3, "failure_threshold": 3, "reset_timeout": 30}
+    params.update(kwargs)
+    return AIGateway(sleep=clock.sleep, clock=clock, **params)
+
+
+def test_transient_errors_are_retried_with_backoff():
+    clock = FakeClock()
+    gateway = _gateway(clock)
+    attempts = []
+
+    def flaky():
+        attempts.append(clock.now)
+        if len(attempts) < 3:
+            raise ApiError(429)
+        return "tamam"
+
+    assert gateway.call(flaky) == "tamam"
+    assert len(attempts) == 3
+    assert gateway.metrics()["retries"] == 2 and gateway.metrics()["circuit_state"] == "closed"
+
+    def bad_request():
+        attempts.append(clock.now)
+        raise ApiError(400)
+
+    with pytest.raises(ApiError):
+        gateway.call(bad_request)
+    assert len(attempts) == 4  # 400 yeniden denenmez
+    assert is_retryable(ConnectionError()) and is_retryable(ApiError(503))
+    assert not is_retryable(ValueError("geçersiz argüman"))
+    # Mesajdaki anahtar kelimeler yalnızca google-api hatalarında dikkate alınır
+    assert not is_retryable(Exception("503 Service Unavailable"))
+    assert not is_retryable(ValueError("quota alanı eksik"))
+
+
+def test_circuit_opens_short_circuits_and_recovers():
+    clock = FakeClock()
+    gateway = _gateway(clock, max_retries=0)
+
+    class DownModel:
+        calls = 0
+
+        def generate_content(self, prompt, **params):
+            DownModel.calls += 1
+            raise ApiError(503)
+
+    service = AIService(api_key="", use_cache=False, gateway=gateway)
+    service.model = DownModel()
+    for _ in range(5):
+        quiz = service.generate_quiz_questions("Döngüler", num_questions=2)
+        assert quiz[0]["source"] == "mock"
+
+    # 3 hatadan sonra devre açıldı: kalan çağrılar API'ye gitmedi
+    assert DownModel.calls == 3
+    metrics = gateway.metrics()
+    assert metrics["circuit_state"] == "open" and metrics["short_circuited"] == 2
+
+    # Süre dolunca tek deneme çağrısı; başarılıysa devre kapanır
+    clock.now += 31
+    assert gateway.call(lambda: "geri geldi") == "geri geldi"
+    assert gateway.metrics()["circuit_state"] == "closed"
+
+    # Yarı açık durumda başarısız deneme devreyi yeniden açar
+    for _ in range(3):
+        with pytest.raises(ApiError):
+            gateway.call(service.model.generate_content, "x")
+    clock.now += 31
+    with pytest.raises(ApiError):
+        gateway.call(service.model.generate_content, "x")
+    with pytest.raises(CircuitOpenError):
+        gateway.call(lambda: "açık")
+
+
+def test_token_bucket_spaces_calls_to_quota():
+    clock = FakeClock()
+    bucket = TokenBucket(rate_per_minute=60, burst=2, clock=clock)
+    assert bucket.reserve() == 0 and bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(1.0)
+    assert bucket.reserve() == pytest.approx(2.0)
+
+    gateway = AIGateway(rate_per_minute=60, burst=1, max_wait=5, sleep=clock.sleep, clock=clock)
+    start = clock.now
+    for _ in range(4):
+        gateway.call(lambda: None)
+    assert clock.now - start == pytest.approx(3.0)
+    assert gateway.metrics()["rate_limited"] == 3
+
+
+def test_streams_retry_only_before_first_chunk():
+    clock = FakeClock()
+    gateway = _gateway(clock)
+    attempts = []
+
+    def flaky_stream():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ApiError(503)  # ilk parçadan önce: yeniden denenir
+        yield "a"
+        if len(attempts) == 2:
+            raise ConnectionError("koptu")  # ilk parçadan sonra: iletilir
+        yield "b"
+
+    chunks = []
+    with pytest.raises(ConnectionError):
+        for chunk in gateway.stream(flaky_stream):
+            chunks.append(chunk)
+    assert chunks == ["a"] and len(attempts) == 2
+    metrics = gateway.metrics()
+    assert (metrics["retries"], metrics["failures"], metrics["successes"]) == (1, 2, 0)
+    assert metrics["consecutive_failures"] == 2
+
+    # Başarı akış bitince sayılır
+    stream = gateway.stream(flaky_stream)
+    assert next(stream) == "a" and gateway.metrics()["successes"] == 0
+    assert list(stream) == ["b"] and gateway.metrics()["successes"] == 1
+    assert gateway.metrics()["consecutive_failures"] == 0
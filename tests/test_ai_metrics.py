@@ -0,0 +1,151 @@
+"""AI çağrı metrikleri testleri: gecikme, token, hata/fallback sayaçları, exporter'lar"""
+import sys
+import os
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tools.ai_cache import ExplanationMemo, ResponseCache
+from tools.ai_gateway import AIGateway
+from tools.ai_metrics import AIMetrics, Histogram, InMemoryExporter, PrometheusTextfileExporter
+from tools.ai_service import AIService
+
+
+class _Usage:
+    prompt_token_count = 12
+    candidates_token_count = 30
+
+
+class _Response:
+    def __init__(self, text, usage=None):
+        self.text = text
+        self.usage_metadata = usage
+
+
+class ScriptedModel:
+    """Sırayla verilen yanıtları dönen model; Exception öğeleri fırlatılır."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+
+    def generate_content(self, prompt, **params):
+        item = self.responses.pop(0)
+        if isinstance(item, Exception):
+            raise item
+        return item
+
+
+def _service(tmp_path, *responses, metrics=None):
+    service = AIService(
+        api_key="",
+        explanation_memo=ExplanationMemo(),
+        gateway=AIGateway(rate_per_minute=0, max_retries=0, sleep=lambda s: None),
+        metrics=metrics or AIMetrics()
+    )
+    service.model = ScriptedModel(*responses)
+    service.cache = ResponseCache(str(tmp_path / "cache.db"))
+    return service
+
+
+def test_histogram_quantiles_use_bucket_bounds():
+    hist = Histogram(buckets=(0.1, 1.0, 10.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        hist.observe(value)
+    assert hist.quantile(0.5) == 1.0
+    assert hist.quantile(0.95) == 10.0
+    snap = hist.snapshot()
+    assert snap["count"] == 4
+    assert snap["buckets"][-1] == (float("inf"), 4)
+
+
+def test_calls_record_latency_chars_and_tokens(tmp_path):
+    service = _service(tmp_path, _Response("Değişkenler değer saklar.", _Usage()))
+    service.explain_topic("Değişkenler")
+    service.explain_topic("Değişkenler")  # önbellekten
+
+    counters = service.metrics_snapshot()["methods"]["explain_topic"]["counters"]
+    assert counters["calls"] == 1
+    assert counters["cache_hits"] == 1
+    assert counters["prompt_chars"] > 0
+    assert counters["response_chars"] == len("Değişkenler değer saklar.")
+    assert counters["prompt_tokens"] == 12
+    assert counters["response_tokens"] == 30
+    assert service.metrics_snapshot()["methods"]["explain_topic"]["latency"]["count"] == 1
+
+
+def test_parse_failures_errors_and_fallbacks_are_counted(tmp_path):
+    service = _service(tmp_path, _Response("JSON yok"), RuntimeError("400 geçersiz istek"))
+    assert service.generate_quiz_questions("Python", "beginner", 2)  # mock sorular
+    service.explain_topic("Fonksiyonlar")
+
+    methods = service.metrics_snapshot()["methods"]
+    assert methods["generate_quiz_questions"]["counters"]["parse_failures"] == 1
+    assert methods["generate_quiz_questions"]["counters"]["fallbacks"] == 1
+    assert methods["explain_topic"]["counters"]["errors"] == 1
+    assert methods["explain_topic"]["counters"]["fallbacks"] == 1
+
+
+def test_validation_drops_are_counted(tmp_path):
+    questions = [
+        {"question_id": "q1", "question": "?", "options": ["A", "B"], "correct_answer": "A"},
+        {"question_id": "q2", "question": "?", "options": ["A", "B"], "correct_answer": "C"},
+        {"question": "eksik alanlı"},
+    ]
+    service = _service(tmp_path, _Response(json.dumps(questions)))
+    assert len(service.generate_quiz_questions("Python", "beginner", 1)) == 1
+    counters = service.metrics_snapshot()["methods"]["generate_quiz_questions"]["counters"]
+    assert counters["validation_drops"] == 2
+
+
+def test_exporters_receive_snapshots_on_interval(tmp_path):
+    now = [0.0]
+    memory = InMemoryExporter()
+    prom = PrometheusTextfileExporter(str(tmp_path / "metrics" / "ai.prom"))
+    metrics = AIMetrics(exporters=[memory, prom], export_interval=10, clock=lambda: now[0])
+    service = _service(tmp_path, _Response("a"), _Response("b"), metrics=metrics)
+
+    service.explain_topic("Bir")
+    assert memory.last is None  # aralık dolmadı
+    now[0] = 11
+    service.explain_topic("İki")
+    assert memory.last["methods"]["explain_topic"]["counters"]["calls"] == 2
+
+    text = (tmp_path / "metrics" / "ai.prom").read_text(encoding="utf-8")
+    assert 'ai_calls_total{method="explain_topic"} 2' in text
+    assert 'ai_call_latency_seconds_count{method="explain_topic"} 2' in text
+    assert "ai_gateway_circuit_open 0" in text
+    assert "circuit_state" not in text  # sayısal olmayan göstergeler yazılmaz
+
+
+def test_concurrent_writers_export_once_per_interval(tmp_path):
+    import threading
+
+    now = [0.0]
+    memory = InMemoryExporter()
+    prom = PrometheusTextfileExporter(str(tmp_path / "ai.prom"))
+    metrics = AIMetrics(exporters=[memory, prom], export_interval=10, clock=lambda: now[0])
+    now[0] = 11
+
+    barrier = threading.Barrier(8)
+
+    def work():
+        barrier.wait()
+        for _ in range(50):
+            metrics.inc("explain_topic", "errors")
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(memory.snapshots) == 1
+    assert [p.name for p in tmp_path.iterdir()] == ["ai.prom"]  # geçici dosya kalmadı
+
+    # Eşzamanlı doğrudan aktarmalar birbirinin geçici dosyasını ezmez
+    threads = [threading.Thread(target=metrics.export) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert 'ai_errors_total{method="explain_topic"} 400' in (tmp_path / "ai.prom").read_text(encoding="utf-8")
+    assert [p.name for p in tmp_path.iterdir()] == ["ai.prom"]
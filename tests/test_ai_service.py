@@ -0,0 +1,370 @@
+"""AIService önbellek ve çağrı katmanı testleri (gerçek API gerektirmez)"""
+import sys
+import os
+import json
+import asyncio
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from tools.ai_cache import ExplanationMemo, ResponseCache, make_cache_key
+from tools.ai_gateway import AIGateway
+from tools.ai_service import AIService, AsyncAIService
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class CountingModel:
+    """Her çağrıyı sayan, sabit yanıt dönen basit model."""
+
+    def __init__(self, text):
+        self.text = text
+        self.calls = 0
+
+    def generate_content(self, prompt, **params):
+        self.calls += 1
+        return _Response(self.text)
+
+
+class SlowAsyncModel(CountingModel):
+    """generate_content_async'i gecikmeyle yanıtlayan, eşzamanlılığı ölçen model."""
+
+    def __init__(self, text, latency=0.05):
+        super().__init__(text)
+        self.latency = latency
+        self.active = 0
+        self.peak = 0
+
+    async def generate_content_async(self, prompt, **params):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.latency)
+        self.active -= 1
+        if "quiz sorusu oluştur" in prompt:
+            return _Response(json.dumps([
+                {"question_id": "q1", "question": "?", "options": ["A", "B"], "correct_answer": "A"}
+            ]))
+        return _Response(self.text)
+
+
+def _unlimited(**kwargs):
+    """Hız sınırı olmayan, beklemeden yeniden deneyen geçit."""
+    return AIGateway(rate_per_minute=0, sleep=lambda s: None, **kwargs)
+
+
+def _service(tmp_path, text, **kwargs):
+    service = AIService(api_key="", explanation_memo=ExplanationMemo(), gateway=_unlimited(), **kwargs)
+    service.model = CountingModel(text)
+    service.cache = ResponseCache(str(tmp_path / "cache.db"))
+    return service
+
+
+def test_cache_key_ignores_indentation_but_not_params():
+    a = make_cache_key("m", "  Soru:\n      Python\n\n\n  Cevap")
+    b = make_cache_key("m", "Soru:\nPython\n\nCevap")
+    assert a == b
+    assert make_cache_key("m", "x", {"temperature": 0.2}) != make_cache_key("m", "x", {"temperature": 0.9})
+    assert make_cache_key("m1", "x") != make_cache_key("m2", "x")
+
+
+def test_cached_methods_hit_and_opted_out_methods_miss(tmp_path):
+    service = _service(tmp_path, "Değişkenler değer saklar.")
+    assert service.explain_topic("Değişkenler") == "Değişkenler değer saklar."
+    assert service.explain_topic("Değişkenler") == "Değişkenler değer saklar."
+    assert service.model.calls == 1
+
+    # Quiz soruları varsayılan olarak önbelleğe alınmaz (çeşitlilik)
+    quiz = [{"question_id": "q1", "question": "?", "options": ["A", "B"], "correct_answer": "A"}]
+    service.model.text = "```json\n" + json.dumps(quiz) + "\n```"
+    service.generate_quiz_questions("Değişkenler", num_questions=1)
+    service.generate_quiz_questions("Değişkenler", num_questions=1)
+    assert service.model.calls == 3
+
+    service.set_cache_policy("generate_quiz_questions", True)
+    service.generate_quiz_questions("Döngüler", num_questions=1)
+    service.generate_quiz_questions("Döngüler", num_questions=1)
+    assert service.model.calls == 4
+
+    stats = service.cache_stats()
+    assert stats["by_method"]["explain_topic"] == {"hits": 1, "misses": 1}
+    assert stats["hits"] == 2 and stats["entries"] == 2
+
+
+def test_unparseable_responses_are_not_cached(tmp_path):
+    service = _service(tmp_path, "üzgünüm, JSON üretemedim")
+    assert service.generate_curriculum("Python") == {}
+    service.model.text = json.dumps({"goal": "Python", "daily_lessons": []})
+    assert service.generate_curriculum("Python")["goal"] == "Python"
+    assert service.model.calls == 2
+
+
+def test_ttl_and_lru_bounds(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), ttl_seconds=0.05, max_entries=3)
+    cache.set("a", "1")
+    assert cache.get("a") == "1"
+    import time
+    time.sleep(0.06)
+    assert cache.get("a") is None
+    assert cache.expirations == 1
+
+    cache.ttl_seconds = 3600
+    for key in "bcde":
+        cache.set(key, key)
+    cache.get("b")  # b en son okunan: LRU'da tutulur
+    cache.purge()
+    assert len(cache) == 3
+    assert cache.get("b") == "b" and cache.get("c") is None
+
+
+def test_async_day_content_runs_concurrently_within_limit(tmp_path):
+    service = AsyncAIService(api_key="", max_concurrency=2, gateway=_unlimited())
+    service.model = SlowAsyncModel("Döngüler tekrar eder. " * 10, latency=0.1)
+
+    start = time.perf_counter()
+    day = service.generate_day_content("Döngüler", num_questions=1)
+    elapsed = time.perf_counter() - start
+    assert day["lesson"].startswith("Döngüler") and day["quiz"][0]["question_id"] == "q1"
+    assert elapsed < 0.18  # sıralı olsaydı ~0.2 s
+
+    async def many():
+        return await service.gather(*(service.explain_topic_async(f"Konu {i}") for i in range(6)))
+
+    service.model.peak = 0
+    assert len(asyncio.run(many())) == 6
+    assert service.model.peak == 2
+
+
+def test_async_service_shares_cache_and_falls_back_to_threads(tmp_path):
+    service = AsyncAIService(api_key="", gateway=_unlimited())
+    service.model = CountingModel("Listeler sıralıdır.")  # generate_content_async yok
+    service.cache = ResponseCache(str(tmp_path / "cache.db"))
+
+    assert asyncio.run(service.explain_topic_async("Listeler")) == "Listeler sıralıdır."
+    assert service.explain_topic("Listeler") == "Listeler sıralıdır."
+    assert service.model.calls == 1
+
+
+def _wrong_items():
+    return [
+        {"id": str(i), "question": f"Soru {i}?", "user_answer": "B", "correct_answer": "A"}
+        for i in (1, 2, 4)
+    ]
+
+
+def test_wrong_answers_are_explained_in_one_call(tmp_path):
+    service = _service(tmp_path, json.dumps({"1": "Bir.", "2": "İki.", "4": "Dört."}))
+    explanations = service.explain_wrong_answers_batch(_wrong_items(), topic="Döngüler")
+    assert explanations == {"1": "Bir.", "2": "İki.", "4": "Dört."}
+    assert service.model.calls == 1
+
+
+def test_batch_falls_back_per_missing_item(tmp_path):
+    class PartialModel(CountingModel):
+        def generate_content(self, prompt, **params):
+            self.calls += 1
+            if "[4]" in prompt:
+                return _Response('```json\n{"1": "Bir.", "4": ""}\n```')
+            return _Response("Tek açıklama.")
+
+    service = _service(tmp_path, "")
+    service.model = PartialModel("")
+    explanations = service.explain_wrong_answers_batch(_wrong_items())
+    assert explanations == {"1": "Bir.", "2": "Tek açıklama.", "4": "Tek açıklama."}
+    assert service.model.calls == 3
+
+    # Ayrıştırılamayan toplu yanıt: her soru tek tek açıklanır
+    service = _service(tmp_path / "yeni", "JSON değil")
+    explanations = service.explain_wrong_answers_batch(_wrong_items(), batch=False)
+    assert set(explanations) == {"1", "2", "4"}
+    assert service.model.calls == 3
+
+
+def test_batches_are_split_by_configured_size_in_sync_and_async(tmp_path, monkeypatch):
+    import re
+
+    class GroupModel(CountingModel):
+        def generate_content(self, prompt, **params):
+            self.calls += 1
+            return _Response(json.dumps({i: f"Açıklama {i}." for i in re.findall(r"\[(\d+)\]", prompt)}))
+
+    items = [
+        {"id": str(i), "question": f"Soru {i}?", "user_answer": "B", "correct_answer": "A"}
+        for i in range(1, 6)
+    ]
+    expected = {str(i): f"Açıklama {i}." for i in range(1, 6)}
+    monkeypatch.setenv("AI_EXPLANATION_BATCH_SIZE", "2")
+    for cls in (AIService, AsyncAIService):
+        service = cls(model=GroupModel(""), use_cache=False, gateway=_unlimited())
+        assert service.explanation_batch_size == 2
+        if cls is AIService:
+            explanations = service.explain_wrong_answers_batch(items)
+        else:
+            explanations = asyncio.run(service.explain_wrong_answers_batch_async(items))
+        assert explanations == expected
+        assert service.model.calls == 3  # 2 + 2 + 1
+
+
+def test_async_batch_without_batching_runs_in_parallel():
+    service = AsyncAIService(api_key="", max_concurrency=3, explanation_memo=ExplanationMemo(), gateway=_unlimited())
+    service.model = SlowAsyncModel("Açıklama.", latency=0.1)
+    start = time.perf_counter()
+    explanations = asyncio.run(service.explain_wrong_answers_batch_async(_wrong_items(), batch=False))
+    assert time.perf_counter() - start < 0.25
+    assert explanations == {"1": "Açıklama.", "2": "Açıklama.", "4": "Açıklama."}
+    assert service.model.peak == 3
+
+
+def test_wrong_answer_explanations_are_memoized_across_services(tmp_path):
+    memo = ExplanationMemo(max_entries=2)
+    first = AIService(api_key="", explanation_memo=memo, gateway=_unlimited())
+    first.model = CountingModel("Çünkü A doğru.")
+    second = AIService(api_key="", explanation_memo=memo, gateway=_unlimited())
+    second.model = CountingModel("başka")
+
+    # Streamlit yeniden çalıştırması ve başka bir kullanıcı: API'ye gidilmez
+    for service in (first, first, second):
+        assert service.explain_wrong_answer("Soru 1?", "B", "A", topic="Döngüler") == "Çünkü A doğru."
+    assert first.model.calls == 1 and second.model.calls == 0
+
+    # Toplu yol bellekteki soruları atlar ve yenilerini belleğe yazar
+    second.model.text = json.dumps({"2": "İki.", "3": "Üç."})
+    items = [{"id": str(i), "question": f"Soru {i}?", "user_answer": "B", "correct_answer": "A"} for i in (1, 2, 3)]
+    assert second.explain_wrong_answers_batch(items) == {"1": "Çünkü A doğru.", "2": "İki.", "3": "Üç."}
+    assert second.model.calls == 1
+    second.explain_wrong_answers_batch(items[1:])
+    assert second.model.calls == 1
+
+    # LRU: en uzun süredir kullanılmayan (Soru 1) atılır
+    assert len(memo) == 2 and memo.evictions == 1
+    assert memo.stats()["hits"] >= 4
+
+
+class _Chunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class StreamingModel(CountingModel):
+    """stream=True ile metni parça parça veren model."""
+
+    def __init__(self, chunks, fail_after=None):
+        super().__init__("".join(chunks))
+        self.chunks = chunks
+        self.fail_after = fail_after
+
+    def generate_content(self, prompt, stream=False, **params):
+        self.calls += 1
+        if not stream:
+            return _Response(self.text)
+        return self._stream()
+
+    def _stream(self):
+        for i, chunk in enumerate(self.chunks):
+            if self.fail_after is not None and i == self.fail_after:
+                raise ConnectionError("bağlantı koptu")
+            yield _Chunk(chunk)
+
+
+def test_explain_topic_stream_yields_chunks_and_caches_full_text(tmp_path):
+    service = _service(tmp_path, "")
+    service.model = StreamingModel(["# Döngüler\n", "for ve while ", "tekrar eder."])
+
+    assert list(service.explain_topic_stream("Döngüler")) == ["# Döngüler\n", "for ve while ", "tekrar eder."]
+    assert service.stream_stats()["streams"] == 1
+
+    # Tam metin explain_topic ile aynı anahtarla önbellekte
+    assert service.explain_topic("Döngüler") == "# Döngüler\nfor ve while tekrar eder."
+    assert list(service.explain_topic_stream("Döngüler")) == ["# Döngüler\nfor ve while tekrar eder."]
+    assert service.model.calls == 1
+
+
+def test_interrupted_stream_is_not_cached(tmp_path):
+    service = _service(tmp_path, "")
+    service.model = StreamingModel(["Yarım ", "metin"], fail_after=1)
+    assert list(service.explain_topic_stream("Listeler")) == ["Yarım "]
+    assert service.cache.get(make_cache_key(service.model_name, service._topic_prompt("Listeler", "beginner", ""))) is None
+
+
+def test_lesson_stream_marks_only_complete_ai_content(tmp_path):
+    from agents.content_curator_agent import ContentCuratorAgent
+
+    curator = ContentCuratorAgent()
+    curator.ai_service = _service(tmp_path, "")
+    curator.ai_service.model = StreamingModel(["# Döngüler\n", "for ve while döngüleri ", "bir bloğu tekrar tekrar çalıştırır."])
+    stream = curator.stream_lesson_content("Döngüler")
+    assert "".join(stream).startswith("# Döngüler") and stream.complete
+
+    # Yarım akış ekranda kalır ama tam sayılmaz; fallback eklenmez
+    curator.ai_service.model = StreamingModel(["Yarım ", "metin"], fail_after=1)
+    stream = curator.stream_lesson_content("Listeler")
+    assert list(stream) == ["Yarım "] and not stream.complete
+
+    # Eşiğin altındaki kısa yanıt fallback ile tamamlanır
+    curator.ai_service.model = StreamingModel(["Kısa"])
+    stream = curator.stream_lesson_content("Kümeler")
+    chunks = list(stream)
+    assert chunks[0] == "Kısa" and "AI Servisi Çalışmıyor" in chunks[-1] and not stream.complete
+
+
+def test_truncated_quiz_requests_only_missing_questions(tmp_path):
+    class TruncatingModel(CountingModel):
+        def __init__(self):
+            super().__init__("")
+            self.prompts = []
+
+        def generate_content(self, prompt, **params):
+            self.calls += 1
+            self.prompts.append(prompt)
+            if "zaten hazır" in prompt:
+                return _Response(json.dumps([
+                    {"question_id": "q1", "question": "Yeni soru?", "options": ["A", "B"], "correct_answer": "A"}
+                ]))
+            full = json.dumps([
+                {"question_id": f"q{i}", "question": f"Soru {i}?", "options": ["A", "B"], "correct_answer": "A"}
+                for i in range(1, 6)
+            ])
+            return _Response(full[:full.index('"Soru 5?"')])
+
+    service = _service(tmp_path, "")
+    service.model = TruncatingModel()
+    questions = service.generate_quiz_questions("Döngüler", num_questions=5)
+
+    assert [q["question"] for q in questions] == ["Soru 1?", "Soru 2?", "Soru 3?", "Soru 4?", "Yeni soru?"]
+    assert [q["question_id"] for q in questions] == ["q1", "q2", "q3", "q4", "q5"]
+    assert service.model.calls == 2
+    assert "1 adet çoktan seçmeli" in service.model.prompts[1] and "- Soru 4?" in service.model.prompts[1]
+
+
+def test_async_twins_share_the_sync_flow_including_partial_recovery():
+    class TruncatedCurriculumModel:
+        def __init__(self):
+            self.sync_calls = 0
+            self.async_calls = 0
+
+        def _respond(self, prompt):
+            days = [{"day": d, "theme": f"Gün {d}", "tasks": []} for d in range(1, 8)]
+            if "Yalnızca 4. günden" in prompt:
+                return _Response(json.dumps(days[3:]))
+            text = json.dumps({"summary": "Özet", "daily_lessons": days})
+            return _Response(text[:text.index('{"day": 4')])
+
+        def generate_content(self, prompt, **params):
+            self.sync_calls += 1
+            return self._respond(prompt)
+
+        async def generate_content_async(self, prompt, **params):
+            self.async_calls += 1
+            return self._respond(prompt)
+
+    model = TruncatedCurriculumModel()
+    kwargs = {"model": model, "use_cache": False, "gateway": _unlimited()}
+    expected = AIService(**kwargs).generate_curriculum("Python", "beginner", 1)
+    assert [d["theme"] for d in expected["daily_lessons"]] == [f"Gün {d}" for d in range(1, 8)]
+    assert model.sync_calls == 2
+
+    service = AsyncAIService(**kwargs)
+    assert asyncio.run(service.generate_curriculum_async("Python", "beginner", 1)) == expected
+    assert (model.sync_calls, model.async_calls) == (2, 2)  # tamamlama çağrısı da asenkron yoldan
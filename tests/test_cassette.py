@@ -0,0 +1,157 @@
+"""Kayıt/tekrar (cassette) katmanı testleri: Gemini ve Google Search trafiği"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytest
+
+from agents.roadmap_agent import RoadmapAgent
+from tools.ai_gateway import AIGateway
+from tools.ai_metrics import AIMetrics
+from tools.ai_service import AIService
+from tools.cassette import Cassette, CassetteMiss, CassetteModel, CassetteSearchService, RecordedAPIError
+from tools.fake_gemini import FakeAPIError, FakeGeminiModel
+from tools.google_search import GoogleSearchTool
+
+
+def _service(model):
+    return AIService(model=model, use_cache=False, metrics=AIMetrics(),
+                     gateway=AIGateway(rate_per_minute=0, sleep=lambda s: None))
+
+
+def _record(path, model):
+    return _service(CassetteModel(Cassette(str(path), mode="record"), model))
+
+
+def _replay(path, **kwargs):
+    return _service(CassetteModel(Cassette(str(path), mode="replay", **kwargs)))
+
+
+def test_replay_serves_recorded_responses_without_model(tmp_path):
+    path = tmp_path / "session.jsonl"
+    recorder = _record(path, FakeGeminiModel(seed=2, faults={"fence": 0.5}))
+    agent = RoadmapAgent()
+    agent.ai_service = recorder
+    recorded = agent.generate_curriculum("Python öğrenmek", "beginner", duration_weeks=2)
+    recorded_quiz = recorder.generate_quiz_questions("Döngüler", "beginner", 5)
+
+    replayer = _replay(path)
+    agent.ai_service = replayer
+    assert agent.generate_curriculum("Python öğrenmek", "beginner", duration_weeks=2) == recorded
+    assert replayer.generate_quiz_questions("Döngüler", "beginner", 5) == recorded_quiz
+    assert replayer.model.cassette.stats()["misses"] == 0
+
+
+def test_recorded_latency_is_preserved_on_request(tmp_path):
+    path = tmp_path / "session.jsonl"
+    _record(path, FakeGeminiModel(latency=0.02)).explain_topic("Listeler")
+
+    waits = []
+    replayer = _replay(path, preserve_timing=True, time_scale=0.5, sleep=waits.append)
+    replayer.explain_topic("Listeler")
+    assert len(waits) == 1 and 0.009 <= waits[0] < 0.05
+
+    waits.clear()
+    _replay(path, sleep=waits.append).explain_topic("Listeler")
+    assert waits == []
+
+
+def test_streams_replay_chunks_and_usage(tmp_path):
+    path = tmp_path / "session.jsonl"
+    recorded = list(_record(path, FakeGeminiModel(chunk_chars=40)).explain_topic_stream("Sözlükler"))
+
+    replayer = _replay(path)
+    assert list(replayer.explain_topic_stream("Sözlükler")) == recorded
+    counters = replayer.metrics_snapshot()["methods"]["explain_topic_stream"]["counters"]
+    assert counters["calls_with_usage"] == 1
+
+
+def test_async_streams_are_recorded_and_replayed_separately(tmp_path):
+    import asyncio
+
+    async def collect(model, stream):
+        response = await model.generate_content_async("Kümeleri anlat", stream=stream)
+        if not stream:
+            return response.text
+        return [chunk.text async for chunk in response]
+
+    path = tmp_path / "session.jsonl"
+    recorder = CassetteModel(Cassette(str(path), mode="record"), FakeGeminiModel(chunk_chars=40))
+    recorded_chunks = asyncio.run(collect(recorder, True))
+    recorded_text = asyncio.run(collect(recorder, False))
+    assert len(recorded_chunks) > 1
+
+    replayer = CassetteModel(Cassette(str(path), mode="replay"))
+    assert asyncio.run(collect(replayer, True)) == recorded_chunks
+    assert asyncio.run(collect(replayer, False)) == recorded_text
+    assert replayer.cassette.stats()["misses"] == 0
+
+
+def test_errors_are_recorded_and_replayed_in_order(tmp_path):
+    path = tmp_path / "session.jsonl"
+    model = FakeGeminiModel().enqueue(FakeAPIError(429, "quota"))
+    recorded = _record(path, model).explain_topic("Fonksiyonlar")
+
+    replayer = _replay(path)
+    assert replayer.explain_topic("Fonksiyonlar") == recorded
+    assert replayer.gateway.metrics()["retries"] == 1
+
+    with pytest.raises(RecordedAPIError) as error:
+        _replay(path).model.generate_content(replayer._topic_prompt("Fonksiyonlar", "beginner", ""))
+    assert error.value.code == 429
+
+
+def test_unknown_request_is_a_miss(tmp_path):
+    path = tmp_path / "session.jsonl"
+    _record(path, FakeGeminiModel()).explain_topic("Listeler")
+    replayer = _replay(path)
+    with pytest.raises(CassetteMiss):
+        replayer.model.generate_content("kayıtta olmayan prompt")
+    assert "bilgi alınamadı" in replayer.explain_topic("Kümeler")  # fallback
+
+
+class _SearchService:
+    """googleapiclient customsearch taklidi."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def cse(self):
+        return self
+
+    def list(self, **params):
+        self.params = params
+        return self
+
+    def execute(self):
+        self.calls += 1
+        return {"items": [{"title": f"{self.params['q']} rehberi", "link": "https://docs.python.org/3/"}]}
+
+
+def test_search_traffic_is_recorded_and_replayed(tmp_path):
+    path = tmp_path / "search.jsonl"
+    real = _SearchService()
+    recorder = GoogleSearchTool("key", "engine-1", service=CassetteSearchService(Cassette(str(path), "record"), real))
+    recorded = recorder.search_learning_resources("Python", max_results=3)
+    assert real.calls == 1
+
+    # Arama motoru kimliği anahtara girmez; anahtar olmadan da tekrar edilir
+    replayer = GoogleSearchTool(service=CassetteSearchService(Cassette(str(path), "replay")))
+    assert replayer.search_learning_resources("Python", max_results=3) == recorded
+    assert recorded[0]["source"] == "google_api"
+
+
+def test_record_mode_without_model_falls_back_to_mock(tmp_path, monkeypatch):
+    import tools.ai_service as ai_service
+    import tools.cassette as cassette
+
+    monkeypatch.setenv("AI_CASSETTE_MODE", "record")
+    monkeypatch.setenv("AI_CASSETTE_PATH", str(tmp_path / "session.jsonl"))
+    monkeypatch.setenv("GEMINI_API_KEY", "")
+    monkeypatch.delenv("AI_FAKE_MODEL", raising=False)
+    monkeypatch.setattr(cassette, "_cassette", None)
+    monkeypatch.setattr(ai_service, "_ai_service", None)
+
+    service = ai_service.get_ai_service()
+    assert service.model is None
+    assert service.generate_quiz_questions("Döngüler", "beginner", 3)  # mock quiz
@@ -0,0 +1,68 @@
+"""Çok süreçli erişim testleri: aynı depoya paralel yazan süreçler güncelleme kaybetmemeli"""
+import sys
+import os
+import json
+from concurrent.futures import ProcessPoolExecutor
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.user import UserManager
+from memory.memory_bank import MemoryBank
+
+WORKERS = 4
+ROUNDS = 15
+
+
+def _hammer_users(path: str, backend: str, shared_uid: str, worker: int) -> str:
+    um = UserManager(path, backend=backend)
+    ok, own_uid = um.register(f"worker{worker}", f"worker{worker}@test.com", "pw")
+    assert ok, own_uid
+    for i in range(ROUNDS):
+        um.record_progress(shared_uid, f"lesson_{worker}_{i}", 0.5, quiz_score=worker * 10 + i)
+        um.advance_day(own_uid)
+    return own_uid
+
+
+def _hammer_memory(path: str, journal: bool, worker: int):
+    bank = MemoryBank(path, journal=journal, compact_every=7)
+    for i in range(ROUNDS):
+        bank.append_performance({"worker": worker, "i": i})
+
+
+def test_parallel_user_updates_are_not_lost(tmp_path):
+    for backend in ("json", "sharded", "sqlite"):
+        path = str(tmp_path / backend / "users.json")
+        um = UserManager(path, backend=backend)
+        _, shared_uid = um.register("ortak", "ortak@test.com", "pw")
+
+        with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+            own_uids = list(pool.map(_hammer_users, [path] * WORKERS, [backend] * WORKERS,
+                                     [shared_uid] * WORKERS, range(WORKERS)))
+
+        fresh = UserManager(path, backend=backend)
+        shared = fresh.get_user(shared_uid)
+        assert len(shared.quiz_scores) == WORKERS * ROUNDS, backend
+        assert len(shared.completed_lessons) == WORKERS * ROUNDS, backend
+        assert fresh.get_user_stats(shared_uid)["quiz_count"] == WORKERS * ROUNDS, backend
+        assert len(set(own_uids)) == WORKERS
+        for uid in own_uids:
+            assert fresh.get_user(uid).current_day == 1 + ROUNDS % 7, backend
+        assert fresh.store.count() == WORKERS + 1
+
+        if backend == "json":
+            # Dosya her an geçerli JSON olarak kalır
+            json.loads((tmp_path / backend / "users.json").read_text(encoding="utf-8"))
+
+
+def test_parallel_memory_bank_appends_are_not_lost(tmp_path):
+    for journal in (False, True):
+        path = str(tmp_path / f"journal_{journal}" / "store.json")
+        MemoryBank(path, journal=journal)
+
+        with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+            list(pool.map(_hammer_memory, [path] * WORKERS, [journal] * WORKERS, range(WORKERS)))
+
+        performance = MemoryBank(path, journal=journal)._read()["performance"]
+        assert len(performance) == WORKERS * ROUNDS
+        assert {(p["worker"], p["i"]) for p in performance} == {
+            (w, i) for w in range(WORKERS) for i in range(ROUNDS)
+        }
@@ -0,0 +1,133 @@
+"""Sahte Gemini modeli testleri: varsayılan yanıtlar, tekrarlanabilirlik, hata enjeksiyonu"""
+import sys
+import os
+import asyncio
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytest
+
+from agents.roadmap_agent import RoadmapAgent
+from tools.ai_gateway import AIGateway
+from tools.ai_metrics import AIMetrics
+from tools.ai_service import AIService, AsyncAIService
+from tools.fake_gemini import FakeAPIError, FakeGeminiModel, parse_faults, parse_latency
+
+
+def _service(model, cls=AIService, **kwargs):
+    return cls(
+        model=model,
+        use_cache=False,
+        gateway=AIGateway(rate_per_minute=0, sleep=lambda s: None),
+        metrics=AIMetrics(),
+        **kwargs
+    )
+
+
+def _counters(service, method):
+    return service.metrics_snapshot()["methods"][method]["counters"]
+
+
+def test_default_responses_go_through_real_parsing_paths():
+    service = _service(FakeGeminiModel(seed=1))
+
+    quiz = service.generate_quiz_questions("Döngüler", "beginner", 5)
+    assert len(quiz) == 5 and all(q["correct_answer"] in q["options"] for q in quiz)
+    assert len(service.generate_assessment_questions("Python", 10)) == 10
+    explanations = service.explain_wrong_answers_batch(
+        [{"id": f"q{i}", "question": "?", "user_answer": "B", "correct_answer": "A"} for i in range(3)],
+        "Döngüler", "beginner"
+    )
+    assert set(explanations) == {"q0", "q1", "q2"}
+    assert "Döngüler" in "".join(service.explain_topic_stream("Döngüler"))
+
+    methods = service.metrics_snapshot()["methods"]
+    assert sum(m["counters"]["fallbacks"] for m in methods.values()) == 0
+
+
+def test_roadmap_agent_runs_offline_with_fake_model():
+    agent = RoadmapAgent(max_workers=4)
+    agent.ai_service = _service(FakeGeminiModel(seed=3))
+    curriculum = agent.generate_curriculum("Python öğrenmek", "beginner", duration_weeks=3)
+    days = [lesson["day"] for lesson in curriculum["daily_lessons"]]
+    assert days == list(range(1, 22))
+    assert _counters(agent.ai_service, "generate_week_lessons")["calls"] == 3
+
+
+def test_same_seed_gives_same_responses_and_faults():
+    faults = {"truncate": 0.3, "fence": 0.5, "rate_limit": 0.2}
+
+    def run(seed):
+        model = FakeGeminiModel(seed=seed, faults=faults)
+        outputs = []
+        for i in range(20):
+            try:
+                outputs.append(model.generate_content(f"\"Konu {i % 4}\" konusunu açıkla").text)
+            except FakeAPIError as e:
+                outputs.append(e.code)
+        return outputs, model.stats()
+
+    assert run(5) == run(5)
+    assert run(5) != run(6)
+
+
+def test_rate_limits_are_retried_by_gateway():
+    model = FakeGeminiModel().enqueue(FakeAPIError(429), FakeAPIError(429))
+    service = _service(model)
+    assert service.explain_topic("Değişkenler").startswith("## Değişkenler")
+    assert model.calls == 3
+    assert service.gateway.metrics()["retries"] == 2
+
+
+def test_truncated_and_fenced_quiz_is_salvaged():
+    model = FakeGeminiModel(faults={"fence": 1.0, "prose": 1.0})
+    valid = json.dumps([
+        {"question_id": f"q{i}", "question": f"Soru {i}?", "options": ["A", "B"], "correct_answer": "A"}
+        for i in range(1, 4)
+    ])
+    model.script("quiz sorusu oluştur", valid[:valid.rfind("{")], times=1)  # yarıda kesilmiş ilk yanıt
+    service = _service(model)
+
+    quiz = service.generate_quiz_questions("Döngüler", "beginner", 5)
+    assert len(quiz) == 5
+    counters = _counters(service, "generate_quiz_questions")
+    assert counters["partial_responses"] == 1
+    assert counters["fallbacks"] == 0
+
+
+def test_streaming_disconnect_is_not_cached_and_falls_back():
+    model = FakeGeminiModel(chunk_chars=10, faults={"disconnect": 1.0})
+    service = _service(model)
+    chunks = list(service.explain_topic_stream("Listeler"))
+    assert len(chunks) > 1  # kopmadan önce gelen parçalar
+    assert _counters(service, "explain_topic_stream")["errors"] == 1
+
+
+def test_async_service_uses_async_api_with_latency():
+    model = FakeGeminiModel(latency=0.05)
+    service = _service(model, cls=AsyncAIService, max_concurrency=4)
+
+    async def run():
+        return await service.gather(*(service.explain_topic_async(f"Konu {i}") for i in range(4)))
+
+    loop = asyncio.new_event_loop()
+    try:
+        start = loop.time()
+        results = loop.run_until_complete(run())
+        elapsed = loop.time() - start
+    finally:
+        loop.close()
+    assert len(results) == 4 and elapsed < 0.15
+
+
+def test_settings_parsing():
+    import random
+    rng = random.Random(0)
+    assert parse_latency("0.5")(rng) == 0.5
+    assert 0.2 <= parse_latency("uniform:0.2:1.5")(rng) <= 1.5
+    assert parse_latency("lognormal:0.8:0.5")(rng) > 0
+    assert parse_faults("rate_limit=0.05, truncate=0.1") == {"rate_limit": 0.05, "truncate": 0.1}
+    with pytest.raises(ValueError):
+        parse_latency("gauss:1")
+    with pytest.raises(ValueError):
+        FakeGeminiModel(faults={"explode": 1.0})
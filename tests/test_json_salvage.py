@@ -0,0 +1,46 @@
+"""Toleranslı JSON ayıklama testleri"""
+import sys
+import os
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pytest
+
+from tools.json_salvage import PartialJSONError, extract_json, salvage_json
+
+
+def _days(n):
+    return [{"day": i + 1, "theme": f"Gün {i + 1}", "tasks": []} for i in range(n)]
+
+
+def test_prose_and_fences_around_json_are_ignored():
+    assert extract_json('Tabii! İşte müfredat:\n{"a": [1, 2]}\nUmarım faydalı olur.') == {"a": [1, 2]}
+    assert extract_json('```json\n[1, 2, 3]\n```\nNot: [önemli]') == [1, 2, 3]
+    assert extract_json('[Not] önce açıklama, sonra {"ok": true}') == {"ok": True}
+    assert extract_json('[1, 2, 3,]') == [1, 2, 3]
+    with pytest.raises(json.JSONDecodeError):
+        extract_json("üzgünüm, JSON üretemedim")
+
+
+def test_truncated_array_keeps_complete_elements():
+    text = json.dumps(_days(10), ensure_ascii=False)
+    cut = text[:text.index('"Gün 8"')]
+    value, complete = salvage_json("```json\n" + cut)
+    assert not complete
+    assert [d["day"] for d in value] == list(range(1, 8))
+
+    with pytest.raises(PartialJSONError) as exc:
+        extract_json(cut)
+    assert len(exc.value.value) == 7
+
+
+def test_truncated_nested_curriculum_is_salvaged():
+    text = json.dumps({"goal": "Python", "summary": "Özet", "daily_lessons": _days(56)}, ensure_ascii=False)
+    cut = text[:text.index('"Gün 41"') - 10]
+    value, complete = salvage_json(cut)
+    assert not complete
+    assert value["goal"] == "Python" and len(value["daily_lessons"]) == 40
+
+    # Yarım ilk eleman: iç nesne değil boş dış dizi döner
+    assert salvage_json('[{"day": 1, "theme": "Yar') == ([], False)
+
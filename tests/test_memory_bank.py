@@ -0,0 +1,108 @@
+"""MemoryBank journal modu testleri"""
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from memory.memory_bank import MemoryBank
+
+
+def test_journal_appends_and_replays(tmp_path):
+    path = tmp_path / "store.json"
+    bank = MemoryBank(str(path), journal=True, compact_every=1000)
+    snapshot_before = path.read_text(encoding="utf-8")
+
+    bank.save_user_profile({"goal": "Python"})
+    for i in range(5):
+        bank.append_performance({"daily_score": i})
+    bank.save_recommendations("Python", [{"title": "docs"}])
+
+    # Snapshot değişmez, olaylar journal dosyasına eklenir
+    assert path.read_text(encoding="utf-8") == snapshot_before
+    assert len(bank.journal_path.read_text(encoding="utf-8").splitlines()) == 7
+
+    reopened = MemoryBank(str(path), journal=True)
+    data = reopened._read()
+    assert data["user_profile"] == {"goal": "Python"}
+    assert [p["daily_score"] for p in data["performance"]] == [0, 1, 2, 3, 4]
+    assert data["recommendations"][0]["key"] == "Python"
+
+
+def test_journal_compaction(tmp_path):
+    path = tmp_path / "store.json"
+    bank = MemoryBank(str(path), journal=True, compact_every=3)
+
+    for i in range(7):
+        bank.append_performance({"daily_score": i})
+
+    # 6. olayda sıkıştırıldı; journal'da sadece sonuncusu kaldı
+    assert len(bank.journal_path.read_text(encoding="utf-8").splitlines()) == 1
+    assert [p["daily_score"] for p in bank._read()["performance"]] == list(range(7))
+
+    # Journal modunu kapatan okuyucu da aynı veriyi görür
+    assert len(MemoryBank(str(path), journal=False)._read()["performance"]) == 7
+
+
+def test_journal_ignores_torn_tail_and_compacted_events(tmp_path):
+    path = tmp_path / "store.json"
+    bank = MemoryBank(str(path), journal=True)
+    bank.append_performance({"daily_score": 1})
+    bank.compact()
+
+    # Sıkıştırma sonrası kalan eski satır ve yarım yazılmış satır tekrar uygulanmaz
+    with open(bank.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"seq": 1, "op": "append", "key": "performance", "value": {"daily_score": 1}}\n')
+        f.write('{"seq": 2, "op": "app')
+    reopened = MemoryBank(str(path), journal=True)
+    assert len(reopened._read()["performance"]) == 1
+
+    # Yarım satır açılışta kesilir, yeni olaylar sağlam satırlar olarak eklenir
+    reopened.append_performance({"daily_score": 2})
+    assert [p["daily_score"] for p in reopened._read()["performance"]] == [1, 2]
+
+
+def test_performance_history_is_rolled_up(tmp_path):
+    from agents.progress_agent import ProgressAgent
+
+    for journal in (False, True):
+        bank = MemoryBank(str(tmp_path / f"store_{journal}.json"), journal=journal)
+        for score in range(10, 60):
+            bank.append_performance({"daily_score": score})
+        agent = ProgressAgent(memory_service=bank)
+        before = agent.get_progress_summary()
+
+        assert bank.compact_performance(keep=10) == 40
+        data = bank._read()
+        assert len(data["performance"]) == 10
+        assert sum(b["count"] for b in data["performance_rollups"]) == 40
+        assert agent.get_progress_summary() == before == {
+            "total_days": 50, "average_score": 34.5, "best_score": 59, "trend": "improving"
+        }
+
+
+def test_snapshot_codec_can_change_between_runs(tmp_path):
+    path = str(tmp_path / "store.json")
+    MemoryBank(path, codec="json-pretty").save_user_profile({"goal": "Türkçe"})
+    bank = MemoryBank(path, codec="json")
+    assert bank.get_user_profile() == {"goal": "Türkçe"}
+    bank.append_performance({"daily_score": 5})
+    assert "\n" not in (tmp_path / "store.json").read_text(encoding="utf-8")
+    assert MemoryBank(path)._read()["performance"][0]["daily_score"] == 5
+
+
+def test_atomic_writes_use_umask_without_changing_it(tmp_path):
+    from memory import file_utils
+
+    previous = os.umask(0o027)
+    try:
+        assert file_utils._current_umask() in (0o027, 0o022)  # 022: /proc olmayan sistemler
+        umask = file_utils._current_umask()
+        path = tmp_path / "new.json"
+        file_utils._UMASK, saved = umask, file_utils._UMASK
+        try:
+            file_utils.atomic_write_json(path, {"a": 1})
+        finally:
+            file_utils._UMASK = saved
+        assert os.stat(path).st_mode & 0o777 == 0o666 & ~umask
+        assert os.umask(0o027) == 0o027
+    finally:
+        os.umask(previous)
@@ -0,0 +1,125 @@
+"""RoadmapAgent haftalık paralel müfredat üretimi testleri (gerçek API gerektirmez)"""
+import sys
+import os
+import json
+import re
+import threading
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from agents.roadmap_agent import RoadmapAgent
+from tools.ai_gateway import AIGateway
+from tools.ai_service import AIService
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class CurriculumModel:
+    """Taslak ve hafta prompt'larına yanıt veren; seçilen haftaları ilk denemede bozan model."""
+
+    def __init__(self, weeks, flaky_weeks=(), broken_weeks=(), latency=0.05):
+        self.weeks = weeks
+        self.flaky_weeks = set(flaky_weeks)
+        self.broken_weeks = set(broken_weeks)
+        self.latency = latency
+        self.week_calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt, **params):
+        if "HAFTALIK ana hatlarını" in prompt:
+            return _Response(json.dumps({
+                "summary": "Özet",
+                "weeks": [{"week": i + 1, "focus": f"Odak {i + 1}", "topics": []} for i in range(self.weeks)]
+            }))
+
+        week = int(re.search(r"müfredatın (\d+)\. haftasının", prompt).group(1))
+        with self._lock:
+            self.week_calls.append(week)
+            first_try = self.week_calls.count(week) == 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.latency)
+        with self._lock:
+            self.active -= 1
+
+        if week in self.broken_weeks or (week in self.flaky_weeks and first_try):
+            return _Response('[{"day": 1, "theme": "Yarım')
+        return _Response(json.dumps([
+            {"day": d, "theme": f"H{week} G{d}", "tasks": [{"task": "t", "type": "theory"}]} for d in range(1, 8)
+        ]))
+
+
+def _agent(model, **kwargs):
+    agent = RoadmapAgent(**kwargs)
+    agent.ai_service = AIService(api_key="test", use_cache=False, gateway=AIGateway(rate_per_minute=0))
+    agent.ai_service.model = model
+    return agent
+
+
+def test_weeks_are_generated_concurrently_and_renumbered():
+    model = CurriculumModel(weeks=4)
+    curriculum = _agent(model, max_workers=2).generate_curriculum("Python", "beginner", 4)
+
+    days = curriculum["daily_lessons"]
+    assert [d["day"] for d in days] == list(range(1, 29))
+    assert days[7]["theme"] == "H2 G1" and days[7]["week"] == 2
+    assert model.peak == 2
+    assert sorted(model.week_calls) == [1, 2, 3, 4]
+
+
+def test_only_failed_weeks_are_retried_then_filled_from_template():
+    model = CurriculumModel(weeks=3, flaky_weeks=[2], broken_weeks=[3])
+    curriculum = _agent(model, week_retries=1).generate_curriculum("Python", "beginner", 3)
+
+    assert sorted(model.week_calls) == [1, 2, 2, 3, 3]
+    days = curriculum["daily_lessons"]
+    assert len(days) == 21
+    assert days[8]["theme"] == "H2 G2"
+    assert all(d.get("source") == "fallback" for d in days[14:])
+    assert days[14]["day"] == 15
+
+
+def test_truncated_week_requests_only_remaining_days():
+    class TruncatedWeekModel(CurriculumModel):
+        def generate_content(self, prompt, **params):
+            if "Yalnızca kalan 3 günü" in prompt:
+                self.week_calls.append("kalan")
+                return _Response(json.dumps([
+                    {"day": d, "theme": f"Devam G{d}", "tasks": []} for d in range(5, 8)
+                ]))
+            response = super().generate_content(prompt, **params)
+            if "HAFTALIK ana hatlarını" in prompt:
+                return response
+            return _Response(response.text[:response.text.index('"H1 G5"')])
+
+    model = TruncatedWeekModel(weeks=1)
+    curriculum = _agent(model).generate_curriculum("Python", "beginner", 1)
+
+    assert model.week_calls == [1, "kalan"]
+    assert [d["theme"] for d in curriculum["daily_lessons"]][3:] == ["H1 G4", "Devam G5", "Devam G6", "Devam G7"]
+    assert [d["day"] for d in curriculum["daily_lessons"]] == list(range(1, 8))
+
+
+def test_salvaged_days_are_kept_when_remaining_days_fail():
+    class FailingRestModel(CurriculumModel):
+        def generate_content(self, prompt, **params):
+            if "Yalnızca kalan" in prompt:
+                self.week_calls.append("kalan")
+                return _Response('[{"day": 5, "theme": "Devam G5", "tasks": []}, {"day": 6, "the')
+            response = super().generate_content(prompt, **params)
+            if "HAFTALIK ana hatlarını" in prompt:
+                return response
+            return _Response(response.text[:response.text.index('"H1 G5"')])
+
+    model = FailingRestModel(weeks=1)
+    days = _agent(model).generate_curriculum("Python", "beginner", 1)["daily_lessons"]
+
+    assert model.week_calls == [1, "kalan"]
+    assert [d["theme"] for d in days][:5] == ["H1 G1", "H1 G2", "H1 G3", "H1 G4", "Devam G5"]
+    assert [d.get("source") for d in days[5:]] == ["fallback", "fallback"]
+    assert [d["day"] for d in days] == list(range(1, 8))
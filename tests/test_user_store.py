@@ -0,0 +1,573 @@
+"""Kullanıcı depolama motorları testleri"""
+import sys
+import os
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models.user import UserManager
+
+
+def test_sqlite_store_roundtrip(tmp_path):
+    um = UserManager(str(tmp_path / "users.json"), backend="sqlite")
+
+    success, uid = um.register("ali", "ali@test.com", "1234")
+    assert success
+
+    um.record_progress(uid, "quiz_day_1", 0.5, 80)
+    user = um.get_user(uid)
+    assert user.quiz_scores[0]["score"] == 80
+
+    assert um.register("ali", "baska@test.com", "1234") == (False, "Bu kullanıcı adı zaten alınmış!")
+    assert um.register("veli", "ali@test.com", "1234") == (False, "Bu email zaten kayıtlı!")
+
+    ok, logged_in = um.login("ali@test.com", "1234")
+    assert ok and logged_in.user_id == uid
+    assert um.login("ali@test.com", "yanlis") == (False, None)
+
+
+def test_sqlite_migrates_legacy_json(tmp_path):
+    legacy_path = tmp_path / "users.json"
+    json_um = UserManager(str(legacy_path), backend="json")
+    _, uid = json_um.register("ayse", "ayse@test.com", "pw")
+    json_um.advance_day(uid)
+
+    sqlite_um = UserManager(str(legacy_path), backend="sqlite")
+    assert (tmp_path / "users.db").exists()
+    user = sqlite_um.get_user(uid)
+    assert user.username == "ayse"
+    assert user.current_day == 2
+
+    # İkinci açılışta tekrar taşıma yapılmaz
+    sqlite_um.advance_day(uid)
+    reopened = UserManager(str(legacy_path), backend="sqlite")
+    assert reopened.get_user(uid).current_day == 3
+    assert json.loads(legacy_path.read_text(encoding="utf-8"))["users"][uid]["current_day"] == 2
+
+
+def test_sharded_store_rewrites_only_one_user(tmp_path):
+    legacy_path = tmp_path / "users.json"
+    json_um = UserManager(str(legacy_path), backend="json")
+    _, first = json_um.register("ayse", "ayse@test.com", "pw")
+
+    um = UserManager(str(legacy_path), backend="sharded")
+    shard_dir = tmp_path / "users"
+    assert um.get_user(first).username == "ayse"
+
+    _, second = um.register("veli", "veli@test.com", "pw")
+    first_file = shard_dir / f"{first}.json"
+    index_file = shard_dir / "_index.json"
+    before = (first_file.stat().st_mtime_ns, index_file.stat().st_mtime_ns)
+
+    # İlerleme kaydı yalnızca o kullanıcının dosyasını değiştirir
+    um.advance_day(second)
+    assert (first_file.stat().st_mtime_ns, index_file.stat().st_mtime_ns) == before
+    assert json.loads((shard_dir / f"{second}.json").read_text(encoding="utf-8"))["current_day"] == 2
+
+    assert um.store.find_by_email("veli@test.com")["user_id"] == second
+    assert um.store.count() == 2
+    assert um.login("ayse@test.com", "pw")[0]
+
+
+def test_sharded_index_change_with_same_mtime_and_size_is_seen(tmp_path):
+    from memory.codecs import read_document, write_document
+
+    um = UserManager(str(tmp_path / "users.json"), backend="sharded")
+    _, uid = um.register("ali", "ali@test.com", "pw")
+    assert um.store.find_by_username("ali")["user_id"] == uid
+
+    # Başka bir süreç indeksi aynı boyutta yeniden yazar; mtime değişmemiş görünür
+    index_file = tmp_path / "users" / "_index.json"
+    stat = index_file.stat()
+    index = read_document(index_file)
+    index["users"][uid] = ["ala@test.com", "ala"]
+    write_document(index_file, index)
+    os.utime(index_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert index_file.stat().st_size == stat.st_size
+
+    assert um.store.find_by_username("ala")["user_id"] == uid
+
+
+def test_codecs_roundtrip_and_are_detected_on_read(tmp_path):
+    from memory.codecs import MSGPACK_AVAILABLE, ORJSON_AVAILABLE, get_codec
+    from models.user_store import JsonUserStore
+
+    names = ["json-pretty", "json"] + (["orjson"] if ORJSON_AVAILABLE else []) + (["msgpack"] if MSGPACK_AVAILABLE else [])
+    path = tmp_path / "users.json"
+    um = UserManager(str(path), backend="json")
+    _, uid = um.register("şule", "sule@test.com", "pw")
+    um.record_progress(uid, "quiz_day_1", 0.5, 70)
+    expected = um.store.get(uid)
+
+    sizes = {}
+    for name in names:
+        # Önceki codec'le yazılmış dosya okunur, yeni codec'le yeniden yazılır
+        store = JsonUserStore(path, codec=get_codec(name))
+        record = store.get(uid)
+        assert record["username"] == "şule"
+        store.put(uid, record)
+        expected["version"] = record["version"]
+        assert JsonUserStore(path, codec=get_codec("json")).get(uid) == expected
+        sizes[name] = path.stat().st_size
+
+    assert sizes["json"] < sizes["json-pretty"]
+    assert UserManager(str(path), backend="json").login("sule@test.com", "pw")[0]
+
+
+def test_indexes_follow_other_writers(tmp_path):
+    for backend in ("json", "sharded", "sqlite"):
+        path = str(tmp_path / backend / "users.json")
+        first = UserManager(path, backend=backend)
+        second = UserManager(path, backend=backend)
+
+        _, uid = first.register("mehmet", "mehmet@test.com", "pw")
+        assert first.login("mehmet@test.com", "pw")[0]
+
+        # Başka bir yöneticinin yazdığı kullanıcı, indeks yeniden kurularak görülür
+        _, other_uid = second.register("zeynep", "zeynep@test.com", "pw")
+        ok, user = first.login("zeynep@test.com", "pw")
+        assert ok and user.user_id == other_uid
+        assert first.register("zeynep", "z2@test.com", "pw")[0] is False
+
+
+def test_indexes_do_not_reread_records_after_other_writers(tmp_path):
+    for backend in ("json", "sharded", "sqlite"):
+        path = str(tmp_path / backend / "users.json")
+        first = UserManager(path, backend=backend)
+        second = UserManager(path, backend=backend)
+        _, uid = first.register("kaan", "kaan@test.com", "pw")
+
+        # Yabancı yazmalardan sonra indeks tüm kayıtları okuyup çözmeden güncellenir
+        def no_full_scan():
+            raise AssertionError("indeks tüm kayıtları yeniden okudu")
+        first.store.iter_records = no_full_scan
+
+        _, other_uid = second.register("lale", "lale@test.com", "pw")
+        assert first.index.user_id_for_email("lale@test.com") == other_uid
+        assert first.index.user_id_for_username("kaan") == uid
+
+
+def test_own_write_does_not_hide_other_writers_from_index(tmp_path):
+    path = str(tmp_path / "users.json")
+    first = UserManager(path, backend="json")
+    second = UserManager(path, backend="json")
+    _, uid = first.register("oya", "oya@test.com", "pw")
+    assert first.index.user_id_for_email("oya@test.com") == uid
+
+    # İndeks güncelken araya başka bir yazıcı girer, ardından kendi yazmamız gelir
+    _, other_uid = second.register("pelin", "pelin@test.com", "pw")
+    first.advance_day(uid)
+    assert first.index.user_id_for_email("pelin@test.com") == other_uid
+
+
+def test_json_login_reuses_parsed_file_until_it_changes(tmp_path, monkeypatch):
+    import models.user_store as user_store
+
+    path = tmp_path / "users.json"
+    um = UserManager(str(path), backend="json")
+    _, uid = um.register("selin", "selin@test.com", "pw")
+    um.login("selin@test.com", "pw")
+
+    reads = []
+    original = user_store.read_document
+    monkeypatch.setattr(user_store, "read_document", lambda p: reads.append(p) or original(p))
+    for _ in range(5):
+        ok, user = um.login("selin@test.com", "pw")
+        assert ok
+    assert reads == []
+
+    # Dönen kayıt değiştirilse de önbellekteki belge bozulmaz; başka yazıcının değişikliği görülür
+    user.current_day = 99
+    UserManager(str(path), backend="json").advance_day(uid)
+    assert um.login("selin@test.com", "pw")[1].current_day == 2
+
+
+def test_write_back_coalesces_writes(tmp_path):
+    path = tmp_path / "users.json"
+    um = UserManager(str(path), backend="json", write_back=True, flush_interval=60)
+    _, uid = um.register("can", "can@test.com", "pw")
+    on_disk = path.read_text(encoding="utf-8")
+
+    um.record_progress(uid, "quiz_day_1", 0.5, 90)
+    um.update_progress(uid, 2, [1])
+    assert um.get_user(uid).current_day == 2
+
+    # flush() çağrılana kadar dosya değişmez
+    assert path.read_text(encoding="utf-8") == on_disk
+    um.flush()
+
+    fresh = UserManager(str(path), backend="json")
+    user = fresh.get_user(uid)
+    assert user.current_day == 2
+    assert user.quiz_scores[0]["score"] == 90
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_transaction_writes_once_and_detects_conflicts(tmp_path):
+    from models.user_store import ConcurrentUpdateError
+
+    um = UserManager(str(tmp_path / "users.json"), backend="sqlite")
+    _, uid = um.register("deniz", "deniz@test.com", "pw")
+
+    writes = []
+    original_put_many = um.store.put_many
+    um.store.put_many = lambda *a, **kw: writes.append(1) or original_put_many(*a, **kw)
+
+    with um.transaction(uid) as user:
+        um.record_progress(uid, "quiz_day_1", 0.5, 70)
+        um.update_progress(uid, 2, [1])
+        um.advance_day(uid)
+        assert user.current_day == 3
+    assert len(writes) == 1
+
+    stored = um.get_user(uid)
+    assert (stored.current_day, stored.completed_days, len(stored.quiz_scores)) == (3, [1], 1)
+
+    # Başka bir yazıcı araya girerse transaction çakışma hatası verir
+    other = UserManager(str(tmp_path / "users.json"), backend="sqlite")
+    try:
+        with um.transaction(uid) as user:
+            user.current_day = 10
+            other.advance_day(uid)
+        assert False, "ConcurrentUpdateError bekleniyordu"
+    except ConcurrentUpdateError:
+        pass
+    assert um.get_user(uid).current_day == 4
+
+    # Blokta hata olursa hiçbir şey yazılmaz
+    try:
+        with um.transaction(uid) as user:
+            user.current_day = 99
+            raise RuntimeError("iptal")
+    except RuntimeError:
+        pass
+    assert um.get_user(uid).current_day == 4
+
+
+def test_update_with_retry_reapplies_after_conflict(tmp_path):
+    um = UserManager(str(tmp_path / "users.json"), backend="sqlite")
+    other = UserManager(str(tmp_path / "users.json"), backend="sqlite")
+    _, uid = um.register("can", "can@test.com", "pw")
+
+    attempts = []
+
+    def apply(user):
+        attempts.append(1)
+        um.record_progress(uid, "day_1", 1.0)
+        um.update_progress(uid, 2, [1])
+        if len(attempts) == 1:
+            other.record_progress(uid, "quiz_day_1", 0.5, 90)
+
+    um.update_with_retry(uid, apply)
+    assert len(attempts) == 2
+
+    user = um.get_user(uid)
+    assert (user.current_day, user.completed_days) == (2, [1])
+    assert user.completed_lessons == ["quiz_day_1", "day_1"]
+    assert user.total_study_hours == 1.5
+
+
+def test_failed_transaction_does_not_leak_into_dirty_write_back_cache(tmp_path):
+    path = tmp_path / "users.json"
+    um = UserManager(str(path), backend="json", write_back=True, flush_interval=60)
+    _, uid = um.register("ece", "ece@test.com", "pw")
+    um.advance_day(uid)  # kullanıcı artık kirli
+
+    try:
+        with um.transaction(uid) as user:
+            user.current_week = 99
+            user.quiz_scores.append({"lesson_id": "x", "score": 1})
+            raise RuntimeError("iptal")
+    except RuntimeError:
+        pass
+    assert um.get_user(uid).current_week == 1
+    um.flush()
+
+    user = UserManager(str(path), backend="json").get_user(uid)
+    assert (user.current_week, user.current_day, user.quiz_scores) == (1, 2, [])
+
+
+def test_failed_flush_keeps_users_dirty(tmp_path):
+    import pytest
+
+    path = tmp_path / "users.json"
+    um = UserManager(str(path), backend="json", write_back=True, flush_interval=60)
+    _, uid = um.register("nil", "nil@test.com", "pw")
+    um.flush()
+    um.advance_day(uid)
+
+    put_many = um.store.put_many
+
+    def failing_put_many(records, expected_versions=None):
+        um.store.put_many = put_many
+        raise OSError("disk dolu")
+
+    um.store.put_many = failing_put_many
+    with pytest.raises(OSError):
+        um.flush()
+    assert UserManager(str(path), backend="json").get_user(uid).current_day == 1
+
+    um.flush()
+    assert UserManager(str(path), backend="json").get_user(uid).current_day == 2
+
+
+def test_conflicting_write_back_flush_is_merged(tmp_path):
+    path = tmp_path / "users.json"
+    um = UserManager(str(path), backend="json", write_back=True, flush_interval=60)
+    _, uid = um.register("mert", "mert@test.com", "pw")
+    um.flush()
+
+    um.record_progress(uid, "quiz_day_1", 0.5, 80)
+    # Başka bir yazıcı aynı kullanıcıya araya girer
+    other = UserManager(str(path), backend="json")
+    other.record_progress(uid, "quiz_day_2", 1.0, 60)
+    other.update_progress(uid, 1, [1])
+
+    um.flush()
+    assert um.flush_conflicts == {"merged": 1, "retry_later": 0}
+    user = UserManager(str(path), backend="json").get_user(uid)
+    assert sorted(s["score"] for s in user.quiz_scores) == [60, 80]
+    assert user.total_study_hours == 1.5
+    assert user.completed_days == [1]
+    assert user.progress_stats["quiz_count"] == 2
+
+
+def test_compaction_keeps_dirty_write_back_users(tmp_path):
+    path = tmp_path / "users.json"
+    um = UserManager(str(path), backend="json", write_back=True, flush_interval=60, history_keep=2)
+    _, uid = um.register("ada", "ada@test.com", "pw")
+    for i in range(3):
+        um.record_progress(uid, f"quiz_day_{i}", 0.1, 50 + i)
+    um.flush()
+
+    # compact_history'nin kendi flush'ı ile önbelleği temizlemesi arasında kirlenen kullanıcı
+    flush = um.flush
+    um.flush = lambda: None
+    um.advance_day(uid)
+    assert um.compact_history() == 1
+    um.flush = flush
+    um.flush()
+
+    user = UserManager(str(path), backend="json").get_user(uid)
+    assert user.current_day == 2
+    assert um.get_user_stats(uid)["quiz_count"] == 3
+
+
+def test_progress_stats_are_incremental_and_backfilled(tmp_path):
+    path = tmp_path / "users.json"
+    um = UserManager(str(path), backend="json")
+    _, uid = um.register("ece", "ece@test.com", "pw")
+    for lesson, score in [("quiz_day_1", 60), ("quiz_day_1", 90), ("quiz_day_2", 30)]:
+        um.record_progress(uid, lesson, 0.5, score)
+
+    stats = um.get_user_stats(uid)
+    assert stats["quiz_count"] == 3
+    assert stats["average_quiz_score"] == 60.0
+    assert (stats["min_quiz_score"], stats["max_quiz_score"]) == (30, 90)
+    assert stats["best_scores_by_lesson"] == {"quiz_day_1": 90, "quiz_day_2": 30}
+    assert stats["total_lessons"] == 2
+
+    # Özetleri olmayan eski kayıt toplu olarak doldurulur
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["users"][uid]["progress_stats"] = None
+    path.write_text(json.dumps(data), encoding="utf-8")
+    assert um.backfill_progress_stats() == 1
+    assert um.get_user_stats(uid) == stats
+
+
+def test_backfill_reapplies_to_records_changed_by_another_writer(tmp_path):
+    path = tmp_path / "users.json"
+    um = UserManager(str(path), backend="sqlite")
+    _, uid = um.register("ece", "ece@test.com", "pw")
+    um.record_progress(uid, "quiz_day_1", 0.5, 60)
+    record = um.store.get(uid)
+    record["progress_stats"] = None
+    um.store.put(uid, record)
+
+    # Toplu yazmadan hemen önce başka bir yazıcı aynı kullanıcıyı değiştirir
+    other = UserManager(str(path), backend="sqlite")
+    put_many = um.store.put_many
+
+    def racing_put_many(records, expected_versions=None):
+        other.advance_day(uid)
+        um.store.put_many = put_many
+        return put_many(records, expected_versions)
+
+    um.store.put_many = racing_put_many
+    assert um.backfill_progress_stats() == 1
+    user = UserManager(str(path), backend="sqlite").get_user(uid)
+    assert user.current_day == 2  # diğer yazıcının değişikliği ezilmedi
+    assert user.progress_stats["quiz_count"] == 1
+
+
+def test_history_is_rolled_up_without_changing_stats(tmp_path):
+    from datetime import datetime, timedelta
+
+    path = tmp_path / "users.json"
+    um = UserManager(str(path), backend="json", history_keep=10)
+    _, uid = um.register("deniz", "deniz@test.com", "pw")
+
+    # 40 gün öncesinden bugüne yayılmış geçmiş: eskiler haftalık, yakınlar günlük kovalara düşer
+    data = json.loads(path.read_text(encoding="utf-8"))
+    record = data["users"][uid]
+    now = datetime.now()
+    record["quiz_scores"] = [
+        {"lesson_id": f"quiz_day_{i % 4}", "score": 40 + i, "date": (now - timedelta(days=40 - i)).isoformat()}
+        for i in range(40)
+    ]
+    record["completed_lessons"] = [f"day_{i}" for i in range(40)]
+    record["progress_stats"] = None
+    path.write_text(json.dumps(data), encoding="utf-8")
+    before = um.get_user_stats(uid)
+
+    assert um.compact_history() == 1
+    user = um.get_user(uid)
+    assert len(user.quiz_scores) == 10 and len(user.completed_lessons) == 10
+    assert user.history_rollups["completed_lessons"] == 30
+    periods = [b["period"] for b in user.history_rollups["quiz_scores"]]
+    assert any("-W" in p for p in periods) and any("-W" not in p for p in periods)
+    assert sum(b["count"] for b in user.history_rollups["quiz_scores"]) == 30
+    assert um.get_user_stats(uid) == before
+
+    # Özetler kaybolsa bile sıkıştırılmış geçmişten yeniden hesaplanır
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["users"][uid]["progress_stats"] = None
+    path.write_text(json.dumps(data), encoding="utf-8")
+    assert um.get_user_stats(uid) == before
+
+    history = um.get_quiz_history(uid)
+    assert sum(b["count"] for b in history) == 40
+    assert history[-1]["max"] == 79
+
+    # record_progress listeler 2*keep'i aşınca kendiliğinden sıkıştırır
+    for i in range(11):
+        um.record_progress(uid, f"quiz_new_{i}", 0.1, 100)
+    user = um.get_user(uid)
+    assert len(user.quiz_scores) == 10
+    assert um.get_user_stats(uid)["quiz_count"] == 51
+
+
+def test_curricula_are_stored_once_by_content(tmp_path):
+    path = tmp_path / "users.json"
+    um = UserManager(str(path), backend="json")
+    curriculum = {"goal": "Python", "daily_lessons": [{"day": d, "theme": f"Gün {d}"} for d in range(1, 29)]}
+
+    user_ids = []
+    for name in ("a", "b"):
+        _, uid = um.register(name, f"{name}@test.com", "pw")
+        um.save_curriculum(uid, dict(curriculum), {"goal": "Python"}, {"level": "beginner"})
+        user_ids.append(uid)
+
+    # İki kullanıcı aynı blob'u paylaşır; users.json yalnızca referans tutar
+    assert len(list((tmp_path / "curricula").glob("*.json"))) == 1
+    assert "Gün 28" not in path.read_text(encoding="utf-8")
+
+    for uid in user_ids:
+        loaded = um.load_curriculum(uid)
+        assert loaded["curriculum"] == curriculum
+        assert um.get_user(uid).curriculum == curriculum
+
+    sqlite_um = UserManager(str(tmp_path / "sqlite" / "users.json"), backend="sqlite")
+    _, uid = sqlite_um.register("c", "c@test.com", "pw")
+    sqlite_um.save_curriculum(uid, curriculum, {"goal": "Python"}, {"level": "beginner"})
+    assert UserManager(str(tmp_path / "sqlite" / "users.json"), backend="sqlite").load_curriculum(uid)["curriculum"] == curriculum
+
+
+def test_missing_blob_is_not_cached(tmp_path):
+    from models.user_store import encode_blob
+
+    reader = UserManager(str(tmp_path / "users.json"), backend="sqlite")
+    writer = UserManager(str(tmp_path / "users.json"), backend="sqlite")
+    key, text = encode_blob({"goal": "Go"})
+
+    # Başka bir süreç blob'u sonradan yazarsa okuyucu onu görür
+    assert reader._resolve_curriculum(key) is None
+    writer.store.put_blob(key, text)
+    assert reader._resolve_curriculum(key) == {"goal": "Go"}
+
+    # Bulunan blob ise depoya tekrar sorulmaz
+    reader.store.get_blob = lambda k: None
+    assert reader._resolve_curriculum(key) == {"goal": "Go"}
+
+
+def test_heavy_fields_are_loaded_lazily(tmp_path):
+    from models.user import is_loaded
+
+    um = UserManager(str(tmp_path / "users.json"), backend="sqlite")
+    _, uid = um.register("lazy", "lazy@test.com", "pw")
+    first_id = um.save_curriculum(uid, {"goal": "A", "daily_lessons": []}, {"goal": "A"}, {}, curriculum_id="c1")
+    um.save_curriculum(uid, {"goal": "B", "daily_lessons": []}, {"goal": "B"}, {}, curriculum_id="c2")
+    um.record_progress(uid, "quiz_day_1", 0.5, 75)
+
+    ok, user = um.login("lazy@test.com", "pw")
+    assert ok and user.username == "lazy"
+    for name in ("curriculums", "curriculum", "quiz_scores", "completed_lessons"):
+        assert not is_loaded(user, name)
+
+    # Yüklenmeden yazılan alanlar aynen korunur
+    um.advance_day(uid)
+    assert um.load_curriculum(uid, first_id)["curriculum"]["goal"] == "A"
+    assert [c["id"] for c in um.get_all_curriculums(uid, include_content=False)] == ["c1", "c2"]
+
+    user = um.get_user(uid)
+    assert user.curriculum["goal"] == "B"
+    assert user.quiz_scores[0]["score"] == 75
+    assert is_loaded(user, "quiz_scores") and not is_loaded(user, "curriculums")
+
+
+def test_legacy_records_are_migrated_once(tmp_path):
+    from models.migrations import CURRENT_SCHEMA_VERSION
+
+    path = tmp_path / "users.json"
+    legacy = {
+        "user_id": "user_1", "username": "eski", "email": "eski@test.com", "password_hash": "x",
+        "created_at": "2025-01-02T03:04:05", "current_day": 3, "completed_days": None,
+        "curriculum": {"goal": "Eski", "daily_lessons": []},
+        "quiz_scores": [{"lesson_id": "quiz_day_1", "score": 50, "date": "2025-01-02"}]
+    }
+    path.write_text(json.dumps({"users": {"user_1": legacy}}), encoding="utf-8")
+
+    um = UserManager(str(path), backend="json")
+    stored = json.loads(path.read_text(encoding="utf-8"))
+    record = stored["users"]["user_1"]
+    assert stored["meta"]["schema_version"] == CURRENT_SCHEMA_VERSION
+    assert record["schema_version"] == CURRENT_SCHEMA_VERSION
+    assert record["curriculum"] is None and "curriculum" not in record["curriculums"][0]
+    assert record["progress_stats"]["quiz_count"] == 1
+
+    # Aktif müfredat id'si kararlıdır ve okumalar arasında değişmez
+    first = um.get_user("user_1")
+    assert first.active_curriculum_id == "curr_20250102030405"
+    assert UserManager(str(path), backend="json").get_user("user_1").active_curriculum_id == first.active_curriculum_id
+    assert um.load_curriculum("user_1")["curriculum"]["goal"] == "Eski"
+    assert first.completed_days == []
+
+
+def test_export_import_streams_users_between_backends(tmp_path):
+    import io
+    from models.user_transfer import export_users, import_users
+
+    source = UserManager(str(tmp_path / "src" / "users.json"), backend="sqlite")
+    curriculum = {"goal": "Go", "daily_lessons": [{"day": 1, "theme": "Giriş"}]}
+    user_ids = []
+    for i in range(7):
+        _, uid = source.register(f"u{i}", f"u{i}@test.com", "pw")
+        source.save_curriculum(uid, dict(curriculum), {"goal": "Go"}, {"level": "beginner"})
+        source.record_progress(uid, "quiz_day_1", 0.5, 50 + i)
+        user_ids.append(uid)
+
+    buffer = io.StringIO()
+    assert export_users(source, buffer) == 7
+    lines = buffer.getvalue().splitlines()
+    # Paylaşılan müfredat bir kez yazılır
+    assert sum(1 for line in lines if line.startswith('{"_blob"')) == 1
+
+    target = UserManager(str(tmp_path / "dst" / "users.json"), backend="sharded")
+    assert import_users(target, io.StringIO(buffer.getvalue()), batch_size=3) == 7
+    assert target.store.count() == 7
+    for i, uid in enumerate(user_ids):
+        assert target.get_user_stats(uid)["max_quiz_score"] == 50 + i
+        assert target.load_curriculum(uid)["curriculum"]["goal"] == "Go"
+    assert target.login("u3@test.com", "pw")[0]
+
+    # Tekrar aktarımda mevcut kullanıcılar atlanabilir
+    assert import_users(target, io.StringIO(buffer.getvalue()), skip_existing=True) == 0